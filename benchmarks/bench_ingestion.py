@@ -0,0 +1,79 @@
+"""Compare the peak memory and time of the ways of ingesting the measurement table.
+
+Builds a temporary copy of `hawaii.sqlite` whose measurement table is repeated `--scale`
+times (to stand in for decades of multi-station data) and measures, with `tracemalloc`:
+
+- `execute`: materializing the whole table with a single `execute()`.
+- `load_table`: materializing the whole table from batches with compacted dtypes.
+- `sql aggregate`: building the climatology cube within the database
+  (`aggregate_cube`).
+
+Run from the project root:
+
+    python benchmarks/bench_ingestion.py --scale 20
+"""
+
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "src"))
+
+from data.climatology import aggregate_cube  # noqa: E402
+from data.load_data import (  # noqa: E402
+    BATCH_SIZE,
+    HAWAII_DB_PATH,
+    get_table,
+    load_table,
+)
+
+
+@click.command()
+@click.option("-s", "--scale", default=20, show_default=True, help="Table copies.")
+def bench_ingestion(scale: int) -> None:
+    """Report the peak memory and time of each way of ingesting measurement."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "hawaii.sqlite"
+        shutil.copy(HAWAII_DB_PATH, path)
+        # Each pass copies the original rows, so the table grows to `scale` copies.
+        with sqlite3.connect(path) as connection:
+            rows = connection.execute("SELECT count(*) FROM measurement").fetchone()[0]
+            for _ in range(scale - 1):
+                connection.execute(
+                    "INSERT INTO measurement (station, date, prcp, tobs) "
+                    "SELECT station, date, prcp, tobs FROM measurement WHERE id <= ?",
+                    (rows,),
+                )
+        connection.close()
+
+        table = get_table(name="measurement", path=path)
+        ingestions = {
+            "execute": lambda: table.execute(),
+            # Bypass the cache so that every call reads the table.
+            "load_table": lambda: load_table.__wrapped__(name="measurement", path=path),
+            "sql aggregate": lambda: aggregate_cube(table),
+        }
+
+        click.echo(f"measurement rows: {rows * scale:,}, batch size: {BATCH_SIZE:,}")
+        click.echo(f"{'ingestion':<20}{'peak (MB)':>12}{'time (s)':>10}")
+        for name, ingest in ingestions.items():
+            # Time without tracing, which slows down allocations.
+            start = time.perf_counter()
+            ingest()
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            ingest()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            click.echo(f"{name:<20}{peak / 1024**2:>12.1f}{seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    bench_ingestion()
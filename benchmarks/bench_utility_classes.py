@@ -0,0 +1,93 @@
+"""Micro-benchmark of `utils.funcs.update_utility_classes`.
+
+Compares the current implementation, both with a cold cache (every call computed) and
+a warm cache (the repeated updates made by callbacks), against the original list and
+regex based implementation kept below for reference. Run from the project root:
+
+    python benchmarks/bench_utility_classes.py
+"""
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "src"))
+
+from utils.constants import (  # noqa: E402
+    BG_COLOR_DARK,
+    BG_COLOR_LIGHT,
+    HOVER_COLOR_DARK,
+    TEXT_COLOR_DARK,
+    TEXT_COLOR_LIGHT,
+)
+from utils.funcs import _update_utility_classes, update_utility_classes  # noqa: E402
+
+CURRENT_CLASSES = (
+    "px-4 py-2 flex space-x-2 items-center "
+    f"{BG_COLOR_DARK} {TEXT_COLOR_LIGHT} {HOVER_COLOR_DARK}"
+)
+UPDATE = {
+    "current_classes": CURRENT_CLASSES,
+    "remove_classes": [BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
+    "add_classes": [BG_COLOR_LIGHT, TEXT_COLOR_DARK],
+}
+
+
+def reference_update_utility_classes(
+    current_classes: str,
+    remove_classes: list[str] | None = None,
+    add_classes: list[str] | None = None,
+) -> str:
+    """Update a utility class string using the original implementation (no warnings)."""
+    current_class_list = current_classes.split()
+    prefix_pattern = r"^-?([a-z:]+)"
+
+    for remove_class in remove_classes or []:
+        current_class_list.remove(remove_class)
+
+    for add_class in add_classes or []:
+        if add_class in current_class_list:
+            raise RuntimeError(add_class)
+        prefix = re.search(prefix_pattern, add_class).group(1)
+        prefix_match_classes = []
+        for util_class in current_class_list:
+            if re.search(prefix, util_class):
+                prefix_match_classes.append(util_class)
+        current_class_list.append(add_class)
+    return " ".join(current_class_list)
+
+
+def cold_update_utility_classes(**kwargs) -> str:
+    """Update a utility class string with the cache cleared beforehand."""
+    _update_utility_classes.cache_clear()
+    return update_utility_classes(**kwargs)
+
+
+@click.command()
+@click.option("-n", "--number", default=100_000, show_default=True, help="Calls.")
+def bench_utility_classes(number: int) -> None:
+    """Time repeated calls of each implementation of `update_utility_classes`."""
+    implementations = {
+        "reference (original)": reference_update_utility_classes,
+        "current, cold cache": cold_update_utility_classes,
+        "current, warm cache": update_utility_classes,
+    }
+
+    timings = {
+        name: min(timeit.repeat(lambda: func(**UPDATE), number=number, repeat=5))
+        for name, func in implementations.items()
+    }
+
+    reference = timings["reference (original)"]
+    click.echo(f"{'implementation':<24}{'us/call':>10}{'speedup':>10}")
+    for name, seconds in timings.items():
+        click.echo(
+            f"{name:<24}{seconds / number * 1e6:>10.2f}{reference / seconds:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    bench_utility_classes()
@@ -0,0 +1,459 @@
+"""Load test the app's HTTP endpoints under gunicorn.
+
+Boots `src.app:server` under gunicorn for each combination of worker class and worker
+count, then simulates concurrent users browsing the app for a fixed duration. Each user
+repeatedly navigates to a random page and makes the requests a browser makes: the page
+itself, `_dash-layout`, `_dash-dependencies`, the page routing callback fired on
+navigation (the sidebar callback runs clientside) and, on the dashboard, the station
+options, figure, table and time series callbacks. Each visit of the dashboard selects a
+random station (or all stations), table page and sort order, so that the callbacks are
+not all answered from the same cached results. The shared on-disk callback cache is
+disabled so that each worker computes the results itself. Reports the throughput and
+the p50/p95/p99 latency of each request and the memory of each worker. Run from the
+project root:
+
+    python benchmarks/load_test.py --workers 2 --workers 4 -k sync -k gthread
+
+The `gevent` worker class is skipped when gevent is not installed.
+"""
+
+from __future__ import annotations
+
+import http.client
+import importlib.util
+import json
+import random
+import threading
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from server import process_memory, run_gunicorn, worker_pids
+
+PAGES = ["/", "/background", "/dashboard", "/quarto"]
+FIGURE_IDS = ["figure-bar", "figure-temp", "figure-precip"]
+# Browsers accept compressed responses, the bodies are read but not decompressed.
+HEADERS = {"Accept-Encoding": "gzip, deflate, br"}
+JSON_HEADERS = {**HEADERS, "Content-Type": "application/json"}
+# Number of pages of the dashboard climate table (61 days of June and December).
+TABLE_PAGES = 4
+# Sort orders of the dashboard climate table picked from by each visit.
+TABLE_SORTS = [
+    [],
+    [{"column_id": "Precipitation", "direction": "desc"}],
+    [{"column_id": "Temperature", "direction": "asc"}],
+    [
+        {"column_id": "Month", "direction": "asc"},
+        {"column_id": "Temperature", "direction": "desc"},
+    ],
+]
+CALLBACK_PATH = "/_dash-update-component"
+
+
+def station_input(station: str | None) -> dict:
+    """Return the station selector input of the dashboard callbacks."""
+    return {"id": "station-select", "property": "value", "value": station}
+
+
+def pages_callback(pathname: str) -> dict:
+    """Return the body of the page routing callback fired on navigating to a page."""
+    return {
+        "output": ".._pages_content.children..._pages_store.data..",
+        "outputs": [
+            {"id": "_pages_content", "property": "children"},
+            {"id": "_pages_store", "property": "data"},
+        ],
+        "inputs": [
+            {"id": "_pages_location", "property": "pathname", "value": pathname},
+            {"id": "_pages_location", "property": "search", "value": ""},
+        ],
+        "changedPropIds": ["_pages_location.pathname"],
+        "state": [],
+    }
+
+
+def station_options_callback() -> dict:
+    """Return the body of the callback loading the options of the station selector."""
+    return {
+        "output": "station-select.options",
+        "outputs": {"id": "station-select", "property": "options"},
+        "inputs": [
+            {"id": "station-select", "property": "id", "value": "station-select"}
+        ],
+        "changedPropIds": [],
+        "state": [],
+    }
+
+
+def figure_callback(figure_id: str, station: str | None = None) -> dict:
+    """Return the body of the callback loading the dashboard figure `figure_id`."""
+    graph_id = {"index": figure_id, "type": "figure"}
+    store_id = {"index": figure_id, "type": "figure-loaded"}
+    return {
+        "output": '..{"index":["MATCH"],"type":"figure"}.figure...'
+        '{"index":["MATCH"],"type":"figure-loaded"}.data..',
+        "outputs": [
+            {"id": graph_id, "property": "figure"},
+            {"id": store_id, "property": "data"},
+        ],
+        "inputs": [
+            {"id": graph_id, "property": "id", "value": graph_id},
+            station_input(station),
+        ],
+        "changedPropIds": [],
+        "state": [{"id": store_id, "property": "data", "value": False}],
+    }
+
+
+def table_callback(
+    page_current: int = 0,
+    sort_by: list[dict[str, str]] | None = None,
+    station: str | None = None,
+) -> dict:
+    """Return the body of the callback loading a page of the dashboard climate table."""
+    values = {"page_current": page_current, "page_size": 20, "sort_by": sort_by or []}
+    return {
+        "output": "..table-climate.data...table-climate.page_count..",
+        "outputs": [
+            {"id": "table-climate", "property": "data"},
+            {"id": "table-climate", "property": "page_count"},
+        ],
+        "inputs": [
+            *(
+                {"id": "table-climate", "property": prop, "value": value}
+                for prop, value in values.items()
+            ),
+            {"id": "table-climate", "property": "filter_query", "value": ""},
+            station_input(station),
+        ],
+        "changedPropIds": [],
+        "state": [],
+    }
+
+
+def timeseries_callback(station: str | None = None) -> dict:
+    """Return the body of the callback loading the dashboard time series chart."""
+    return {
+        "output": "figure-timeseries.figure",
+        "outputs": {"id": "figure-timeseries", "property": "figure"},
+        "inputs": [
+            {"id": "date-range", "property": "start_date", "value": None},
+            {"id": "date-range", "property": "end_date", "value": None},
+            station_input(station),
+            {"id": "figure-timeseries", "property": "relayoutData", "value": None},
+        ],
+        "changedPropIds": [],
+        "state": [],
+    }
+
+
+def navigation_requests(
+    pathname: str,
+    station: str | None = None,
+    page_current: int = 0,
+    sort_by: list[dict[str, str]] | None = None,
+) -> list[tuple[str, str, str, dict | None]]:
+    """Return the requests made by a browser navigating to `pathname`.
+
+    Parameters
+    ----------
+    pathname : str
+        Path of the page.
+    station : str | None, optional
+        Station selected on the dashboard, by default None (all stations).
+    page_current : int, optional
+        Page of the dashboard climate table, by default 0.
+    sort_by : list[dict[str, str]] | None, optional
+        Sort order of the dashboard climate table, by default None (unsorted).
+
+    Returns
+    -------
+    list[tuple[str, str, str, dict | None]]
+        Name, method, path and JSON body (None for GET requests) of each request.
+    """
+    requests = [
+        (f"GET {pathname}", "GET", pathname, None),
+        ("GET /_dash-layout", "GET", "/_dash-layout", None),
+        ("GET /_dash-dependencies", "GET", "/_dash-dependencies", None),
+        ("POST pages callback", "POST", CALLBACK_PATH, pages_callback(pathname)),
+    ]
+    if pathname == "/dashboard":
+        callbacks = {
+            "station options": station_options_callback(),
+            **{fid: figure_callback(fid, station=station) for fid in FIGURE_IDS},
+            "table": table_callback(page_current, sort_by=sort_by, station=station),
+            "timeseries": timeseries_callback(station=station),
+        }
+        requests.extend(
+            (f"POST {name} callback", "POST", CALLBACK_PATH, body)
+            for name, body in callbacks.items()
+        )
+    return requests
+
+
+def fetch_stations(port: int) -> list[str]:
+    """Return the id of each station offered by the station selector.
+
+    Parameters
+    ----------
+    port : int
+        Port of the server on localhost.
+
+    Returns
+    -------
+    list[str]
+        Id of each station.
+    """
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        connection.request(
+            "POST",
+            CALLBACK_PATH,
+            body=json.dumps(station_options_callback()),
+            headers={"Content-Type": "application/json"},
+        )
+        response = json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+    options = response["response"]["station-select"]["options"]
+    return [option["value"] for option in options]
+
+
+def simulate_user(
+    port: int,
+    deadline: float,
+    seed: int,
+    stations: list[str],
+    results: list[tuple[str, float, bool]],
+) -> None:
+    """Navigate to random pages until `deadline`, appending each request's result.
+
+    Parameters
+    ----------
+    port : int
+        Port of the server on localhost.
+    deadline : float
+        `time.perf_counter` value at which to stop.
+    seed : int
+        Seed of the user's page, station, table page and sort order choices.
+    stations : list[str]
+        Id of each station the user may select.
+    results : list[tuple[str, float, bool]]
+        Request name, latency in seconds and success of each request made.
+    """
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    while time.perf_counter() < deadline:
+        requests = navigation_requests(
+            rng.choice(PAGES),
+            station=rng.choice([None, *stations]),
+            page_current=rng.randrange(TABLE_PAGES),
+            sort_by=rng.choice(TABLE_SORTS),
+        )
+        for name, method, path, body in requests:
+            start = time.perf_counter()
+            try:
+                connection.request(
+                    method,
+                    path,
+                    body=json.dumps(body) if body is not None else None,
+                    headers=JSON_HEADERS if body is not None else HEADERS,
+                )
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                ok = False
+            results.append((name, time.perf_counter() - start, ok))
+    connection.close()
+
+
+def run_load(
+    port: int, users: int, duration: float, stations: list[str], seed: int = 0
+) -> list[tuple[str, float, bool]]:
+    """Run `users` concurrent users against the server for `duration` seconds.
+
+    Parameters
+    ----------
+    port : int
+        Port of the server on localhost.
+    users : int
+        Number of concurrent users.
+    duration : float
+        Seconds to run for.
+    stations : list[str]
+        Id of each station the users may select.
+    seed : int, optional
+        Seed of the first user, the others use the following seeds, by default 0.
+
+    Returns
+    -------
+    list[tuple[str, float, bool]]
+        Request name, latency in seconds and success of every request made.
+    """
+    results: list[tuple[str, float, bool]] = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(
+            target=simulate_user, args=(port, deadline, seed, stations, results)
+        )
+        for seed in range(seed, seed + users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(results: list[tuple[str, float, bool]], duration: float) -> list[dict]:
+    """Compute the throughput and latency percentiles of each request name.
+
+    Parameters
+    ----------
+    results : list[tuple[str, float, bool]]
+        Request name, latency in seconds and success of each request.
+    duration : float
+        Seconds the load ran for.
+
+    Returns
+    -------
+    list[dict]
+        One row per request name, followed by a row for all requests.
+    """
+    groups: dict[str, list[tuple[float, bool]]] = {}
+    for name, latency, ok in results:
+        groups.setdefault(name, []).append((latency, ok))
+    groups["total"] = [(latency, ok) for _, latency, ok in results]
+
+    rows = []
+    for name, group in groups.items():
+        latencies_ms = np.array([latency for latency, _ in group]) * 1000
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+        rows.append(
+            {
+                "request": name,
+                "count": len(group),
+                "failures": sum(not ok for _, ok in group),
+                "rps": len(group) / duration,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+            }
+        )
+    return rows
+
+
+def echo_report(rows: list[dict], memory: list[dict[str, int]]) -> None:
+    """Print the request summary and the memory of each worker."""
+    click.echo(
+        f"{'request':<30}{'count':>8}{'fails':>7}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    for row in rows:
+        click.echo(
+            f"{row['request']:<30}{row['count']:>8}{row['failures']:>7}"
+            f"{row['rps']:>9.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+            f"{row['p99_ms']:>9.1f}"
+        )
+
+    click.echo(f"\n{'worker':>8}{'rss (MB)':>12}{'pss (MB)':>12}")
+    for i, mem in enumerate(memory):
+        click.echo(f"{i:>8}{mem['rss'] / 1024:>12.1f}{mem['pss'] / 1024:>12.1f}")
+    total_pss = sum(mem["pss"] for mem in memory) / 1024
+    click.echo(f"{'total':>8}{'':>12}{total_pss:>12.1f}")
+
+
+@click.command()
+@click.option(
+    "-w",
+    "--workers",
+    multiple=True,
+    type=int,
+    default=[2],
+    show_default=True,
+    help="Worker count, repeat to compare several.",
+)
+@click.option(
+    "-k",
+    "--worker-class",
+    "worker_classes",
+    multiple=True,
+    type=click.Choice(["sync", "gthread", "gevent"]),
+    default=["sync"],
+    show_default=True,
+    help="Gunicorn worker class, repeat to compare several.",
+)
+@click.option("--threads", default=4, show_default=True, help="Threads (gthread).")
+@click.option("-u", "--users", default=10, show_default=True, help="Concurrent users.")
+@click.option("-d", "--duration", default=30.0, show_default=True, help="Seconds.")
+@click.option("-p", "--port", default=8050, show_default=True, help="Port to bind.")
+@click.option(
+    "-o", "--output", type=click.Path(path_type=Path), help="Write results as JSON."
+)
+def load_test(
+    workers: tuple[int, ...],
+    worker_classes: tuple[str, ...],
+    threads: int,
+    users: int,
+    duration: float,
+    port: int,
+    output: Path | None,
+) -> None:
+    """Load test the app for each worker class and worker count."""
+    reports = []
+    for worker_class in worker_classes:
+        if worker_class == "gevent" and importlib.util.find_spec("gevent") is None:
+            click.echo("\nSkipping the gevent worker class, gevent is not installed.")
+            continue
+
+        for worker_count in workers:
+            click.echo(
+                f"\n{worker_class} x {worker_count} workers"
+                + (f" x {threads} threads" if worker_class == "gthread" else "")
+                + f", {users} users for {duration:g}s"
+            )
+            with run_gunicorn(
+                port=port,
+                workers=worker_count,
+                worker_class=worker_class,
+                threads=threads if worker_class == "gthread" else 1,
+                env={"CALLBACK_CACHE_DISK": "false"},
+            ) as master:
+                stations = fetch_stations(port)
+                # Warm up every worker so that data is loaded, with other choices than
+                # the measured users so that their results are not all cached already.
+                run_load(
+                    port=port,
+                    users=worker_count,
+                    duration=2,
+                    stations=stations,
+                    seed=users,
+                )
+                results = run_load(
+                    port=port, users=users, duration=duration, stations=stations
+                )
+                memory = [process_memory(pid) for pid in worker_pids(master.pid)]
+
+            rows = summarize(results, duration=duration)
+            echo_report(rows, memory=memory)
+            reports.append(
+                {
+                    "worker_class": worker_class,
+                    "workers": worker_count,
+                    "threads": threads if worker_class == "gthread" else 1,
+                    "users": users,
+                    "duration_s": duration,
+                    "requests": rows,
+                    "memory_kb": memory,
+                }
+            )
+
+    if output is not None:
+        output.write_text(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    load_test()
@@ -0,0 +1,135 @@
+"""Helpers for running the app under gunicorn and inspecting its worker processes.
+
+Functions:
+    run_gunicorn
+    worker_pids
+    process_memory
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parents[1]
+
+
+@contextmanager
+def run_gunicorn(
+    port: int,
+    workers: int = 2,
+    worker_class: str = "sync",
+    threads: int = 1,
+    env: dict[str, str] | None = None,
+    timeout: float = 60,
+) -> Iterator[subprocess.Popen]:
+    """Run `gunicorn src.app:server` from the project root until the context exits.
+
+    Parameters
+    ----------
+    port : int
+        Port to bind to on localhost.
+    workers : int, optional
+        Number of worker processes, by default 2.
+    worker_class : str, optional
+        Gunicorn worker class, by default "sync".
+    threads : int, optional
+        Threads per worker (gthread worker class only), by default 1.
+    env : dict[str, str] | None, optional
+        Additional environment variables for the server, by default None.
+    timeout : float, optional
+        Seconds to wait for the server to respond, by default 60.
+
+    Yields
+    ------
+    subprocess.Popen
+        The gunicorn master process.
+    """
+    cmd = [
+        "gunicorn",
+        "src.app:server",
+        f"--bind=127.0.0.1:{port}",
+        f"--workers={workers}",
+    ]
+    # The worker class is picked by `gunicorn.conf.py` from the environment, so that it
+    # can apply gevent's monkey patching before the app is preloaded.
+    worker_env = {"WORKER_CLASS": worker_class, "THREADS": str(threads)}
+    process = subprocess.Popen(
+        cmd,
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **worker_env, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_ready(f"http://127.0.0.1:{port}/", timeout=timeout)
+        # Give every worker the chance to finish booting, not just the first one.
+        while len(worker_pids(process.pid)) < workers:
+            time.sleep(0.1)
+        yield process
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def _wait_until_ready(url: str, timeout: float) -> None:
+    """Poll `url` until it responds or `timeout` seconds have passed."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise TimeoutError(f"The server at {url} did not respond within {timeout}s.")
+
+
+def worker_pids(master_pid: int) -> list[int]:
+    """Return the process ids of the children (workers) of a gunicorn master.
+
+    Parameters
+    ----------
+    master_pid : int
+        Process id of the gunicorn master.
+
+    Returns
+    -------
+    list[int]
+        Process ids of the workers.
+    """
+    children = Path(f"/proc/{master_pid}/task/{master_pid}/children").read_text()
+    return [int(pid) for pid in children.split()]
+
+
+def process_memory(pid: int) -> dict[str, int]:
+    """Read the resident (RSS), proportional (PSS) and shared memory of a process.
+
+    PSS splits each shared page evenly between the processes sharing it, so the sum of
+    PSS across workers is the memory actually used by them. Linux only.
+
+    Parameters
+    ----------
+    pid : int
+        Process id.
+
+    Returns
+    -------
+    dict[str, int]
+        Memory in kB, keys are "rss", "pss" and "shared".
+    """
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value, *_ = line.split()
+        fields[name.rstrip(":")] = int(value)
+
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "shared": fields["Shared_Clean"] + fields["Shared_Dirty"],
+    }
@@ -0,0 +1,58 @@
+"""Measure the memory used by each gunicorn worker with and without preloading.
+
+Boots the app under gunicorn with `PRELOAD_APP` set to "false" and then "true", makes
+the requests a browser makes when navigating to every page (including the dashboard's
+data callbacks, see `load_test.navigation_requests`) enough times for each worker to
+load all datasets and figures, and reports the RSS, PSS and shared memory of each
+worker. The shared on-disk callback cache is disabled so that each worker computes the
+results itself rather than reading those of another worker. Run from the project root:
+
+    python benchmarks/worker_rss.py --workers 4
+"""
+
+import json
+import urllib.request
+
+import click
+from load_test import HEADERS, JSON_HEADERS, PAGES, navigation_requests
+from server import process_memory, run_gunicorn, worker_pids
+
+
+@click.command()
+@click.option("-w", "--workers", default=4, show_default=True, help="Worker count.")
+@click.option("-p", "--port", default=8050, show_default=True, help="Port to bind.")
+def worker_rss(workers: int, port: int) -> None:
+    """Report memory per gunicorn worker with `PRELOAD_APP` off and on."""
+    for preload in ["false", "true"]:
+        env = {"PRELOAD_APP": preload, "CALLBACK_CACHE_DISK": "false"}
+        with run_gunicorn(port=port, workers=workers, env=env) as master:
+            # Enough requests for every worker to serve each of them at least once.
+            for _ in range(workers * 4):
+                for page in PAGES:
+                    for _, method, path, body in navigation_requests(page):
+                        request = urllib.request.Request(
+                            f"http://127.0.0.1:{port}{path}",
+                            data=json.dumps(body).encode()
+                            if body is not None
+                            else None,
+                            headers=JSON_HEADERS if body is not None else HEADERS,
+                            method=method,
+                        )
+                        with urllib.request.urlopen(request) as r:
+                            r.read()
+
+            memory = [process_memory(pid) for pid in worker_pids(master.pid)]
+
+        click.echo(f"\nPRELOAD_APP={preload}")
+        click.echo(f"{'worker':>8}{'rss (MB)':>12}{'pss (MB)':>12}{'shared (MB)':>14}")
+        for i, mem in enumerate(memory):
+            click.echo(
+                f"{i:>8}{mem['rss'] / 1024:>12.1f}{mem['pss'] / 1024:>12.1f}"
+                f"{mem['shared'] / 1024:>14.1f}"
+            )
+        total_pss = sum(mem["pss"] for mem in memory) / 1024
+        click.echo(f"{'total':>8}{'':>12}{total_pss:>12.1f}")
+
+
+if __name__ == "__main__":
+    worker_rss()
@@ -0,0 +1,111 @@
+"""Gunicorn configuration for serving the app (`gunicorn src.app:server`).
+
+Gunicorn loads this file automatically when it is started from the project root (as it
+is by the `Procfile`).
+
+Processed datasets are built once by the master process before any workers are forked
+and are stored in the on-disk dataset cache (see `data/cache.py`). Workers memory-map
+the cached datasets read-only, so every worker shares the same physical pages instead
+of holding a private copy. With `PRELOAD_APP` enabled (the default) the whole app,
+including the memory-mapped datasets, is imported by the master and inherited by the
+workers. When the database changes, each worker folds the new rows into its own copy of
+the datasets on access (see `data/process_data.py`), no restart is needed.
+
+Workers are threaded (`gthread`) by default: a request waiting on I/O, e.g. reading the
+database from the shared Google Drive mount, only holds up its own thread, so each
+worker serves `THREADS` requests at once instead of one. Database connections are kept
+per thread (see `data/load_data.py`) and the shared datasets are guarded by locks, the
+`sync` worker class is still supported. The `gevent` worker class serves many mostly
+idle connections (e.g. slow clients) per worker, its monkey patching is applied here so
+that it also covers the app imported by the master. Queries to sqlite do not yield to
+other greenlets though, prefer `gthread` when requests wait on the database.
+
+Select the worker class with `WORKER_CLASS` rather than gunicorn's `--worker-class`
+(and `THREADS` rather than `--threads`): the app is preloaded before any server hook
+runs, so only this file can apply gevent's patching in time. Starting with a different
+`--worker-class` fails with an error.
+
+Each worker writes its request metrics to files in `PROMETHEUS_MULTIPROC_DIR`, summed
+over every worker by whichever worker serves `/metrics` (see `utils/metrics.py`).
+
+The number of workers is gunicorn's `WEB_CONCURRENCY` environment variable (by default
+1), about one per CPU core is a good start, more threads per worker mostly help while
+requests wait on I/O.
+
+Environment Variables:
+    PRELOAD_APP: "true" or "false", import the app in the master before forking, by
+        default "true".
+    WORKER_CLASS: "gthread", "sync" or "gevent", by default "gthread".
+    THREADS: Threads of each `gthread` worker, by default 8.
+    WORKER_CONNECTIONS: Concurrent connections of each `gevent` worker, by default
+        1000.
+    PROMETHEUS_MULTIPROC_DIR: Directory the workers write their metrics to, by default
+        `.cache/prometheus`. Emptied when the server starts.
+"""
+
+import os
+from pathlib import Path
+
+# Set before the app imports `prometheus_client` so that the metrics of every process
+# are aggregated through files in this directory (see `utils/metrics.py`).
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", str(Path(__file__).parent / ".cache" / "prometheus")
+)
+
+worker_class = os.environ.get("WORKER_CLASS", "gthread")
+if worker_class == "gevent":
+    # Patch before the app (and its locks and connections) is imported by the master.
+    from gevent import monkey
+
+    monkey.patch_all()
+
+# `src` holds the app's top level packages (`components`, `data`, `pages`, `utils`).
+pythonpath = "src"
+preload_app = os.environ.get("PRELOAD_APP", "true").lower() == "true"
+# gunicorn switches `sync` workers with more than one thread to `gthread`.
+threads = int(os.environ.get("THREADS", "8")) if worker_class == "gthread" else 1
+worker_connections = int(os.environ.get("WORKER_CONNECTIONS", "1000"))
+
+
+def on_starting(server):
+    """Build the processed datasets once in the master process before forking.
+
+    Also empties the directory of the metrics of the workers.
+    """
+    from data.process_data import get_measurement, get_transformed_measurement
+    from utils.profiling import emit_startup_report
+
+    # The worker class as set, before gunicorn's switch of threaded `sync` workers.
+    started_with = server.cfg.settings["worker_class"].get()
+    if started_with != worker_class:
+        raise RuntimeError(
+            f"Started with --worker-class={started_with}, select the worker class "
+            f"with WORKER_CLASS={started_with} instead."
+        )
+    # Drop the metrics of earlier runs, their counters would add up with this run's.
+    metrics_dir = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    for path in metrics_dir.glob("*.db"):
+        path.unlink()
+    get_measurement()
+    get_transformed_measurement()
+    # Include the dataset phases run by the master in the startup report.
+    emit_startup_report()
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master process.
+
+    sqlite connections must not be shared across processes, each worker reconnects on
+    first use instead.
+    """
+    from data.load_data import reset_connections
+
+    reset_connections()
+
+
+def child_exit(server, worker):
+    """Mark the metrics of an exited worker as dead, see `utils/metrics.py`."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,44 +1,66 @@
 """Overall app layout for a multi-page application.
 
+Set the `STARTUP_PROFILE` environment variable to report the time and memory taken by
+each phase of the app's startup (see `utils/profiling.py`). Request and callback
+metrics are served in the Prometheus text format on `/metrics` (see `utils/metrics.py`).
+Responses are compressed and given HTTP caching headers (see `utils/responses.py`).
+
 Variables:
     app
 """
 
-import dash
-from dash import Dash, html
+import time
+
+# Taken before any other import so that the "imports" phase includes all of them.
+_IMPORTS_START = time.perf_counter()
+
+from utils.profiling import emit_startup_report, profile_phase  # noqa: E402
 
-from components.footer import footer_component
-from components.sidebar import create_sidebar_component
+with profile_phase("imports", start=_IMPORTS_START):
+    import dash
+    from dash import Dash, html
 
-# Creates app, sets external stylesheets, and configures the app to be multi-page.
-app = Dash(
-    name=__name__,
-    use_pages=True,
-    title="Dash Test App",
-    assets_ignore="input.css",
-)
+    from components.footer import footer_component
+    from components.sidebar import create_sidebar_component
+    from utils.metrics import init_metrics
+    from utils.responses import init_responses
+
+# Creates app, sets external stylesheets, and configures the app to be multi-page. The
+# modules in `pages` are imported (and the pages registered) when the app is created.
+with profile_phase("page_registration"):
+    app = Dash(
+        name=__name__,
+        use_pages=True,
+        title="Dash Test App",
+        assets_ignore="input.css",
+    )
 
 server = app.server
+init_metrics(server)
+init_responses(server)
 
 # Place the navbar and the container for page content within the app.
-app.layout = html.Div(
-    [
-        # Sidebar.
-        create_sidebar_component(),
-        # Main Content.
-        html.Div(
-            [
-                # Location for page contents.
-                dash.page_container,
-                # Footer.
-                footer_component,
-            ],
-            className="""ml-32 bg-gradient-to-br from-white to-slate-300 h-auto
+with profile_phase("layout"):
+    app.layout = html.Div(
+        [
+            # Sidebar.
+            create_sidebar_component(),
+            # Main Content.
+            html.Div(
+                [
+                    # Location for page contents.
+                    dash.page_container,
+                    # Footer.
+                    footer_component,
+                ],
+                className="""ml-32 bg-gradient-to-br from-white to-slate-300 h-auto
             flex-grow""",
-        ),
-    ],
-    className="flex",
-)
+            ),
+        ],
+        className="flex",
+    )
+
+emit_startup_report()
 
 if __name__ == "__main__":
     app.run(debug=True)
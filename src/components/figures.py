@@ -1,134 +1,347 @@
 """Create figures to be used on the dashboard page.
 
-Loads the figure template for the currently selected theme setting it as the default
-template for figure creation. Graph components are created containing different charts.
+Figures are built with plotly express and cached as JSON compatible dicts. Each figure
+is built and encoded once per version of its underlying data, so that Dash only has to
+re-encode plain dicts and lists when serving it instead of full plotly figure objects. A
+figure is rebuilt when its underlying dataset changes. Graph components are created
+empty and their figures are loaded by a callback once they are mounted. The figures in
+`STATION_FIGURES` are reloaded for the station selected on the dashboard. A station's
+figure is the figure of all stations with the station's data filled into its traces,
+so that switching stations does not rebuild the figure with plotly express. Since only
+the data of the traces differs, switching stations sends a `Patch` of the traces' x and
+y values rather than the whole figure, whose layout and template stay on the client.
+Each graph records in a `dcc.Store` whether its figure was loaded, the whole figure is
+sent until it is (e.g. when the station changes before the figure first arrives).
+Callback results are also memoized (see `utils.memoize`), so that a figure built by
+one `gunicorn` worker is served by the others.
 
 Variables:
-    bar_chart
-    avg_temp_line_chart
-    avg_precip_line_chart
+    LEGEND_LAYOUT
+    FIGURE_BUILDERS
+    STATION_FIGURES
+Functions:
+    create_bar_chart
+    create_avg_temp_line_chart
+    create_avg_precip_line_chart
+    get_figure
+    patch_trace_data
+    create_graph_component
+    load_figure
 """
 
+from __future__ import annotations
+
+import json
+import threading
+from typing import TYPE_CHECKING
+
 import plotly.express as px
-from dash import dcc
-
-from data.process_data import sample_data, transformed_measurement
-from utils.constants import ID_FIGURE_BAR, ID_FIGURE_PRECIP, ID_FIGURE_TEMP
-
-# Create `Graph` component containing a bar chart from `sample_data`.
-bar_chart = px.bar(
-    data_frame=sample_data,
-    x="Fruit",
-    y="Amount",
-    color="City",
-    barmode="group",
-    height=350,
-)
+from dash import MATCH, Input, Output, Patch, State, callback, dcc, no_update
 
-bar_chart.update_layout(
-    legend={
-        "orientation": "h",
-        "xanchor": "right",
-        "yanchor": "bottom",
-        "x": 1,
-        "y": 1.02,
-    },
-    font={"size": 11},
-    margin=dict(l=53, r=30, t=20, b=50),
+from data.process_data import get_transformed_measurement, sample_data
+from utils.constants import (
+    ID_FIGURE,
+    ID_FIGURE_BAR,
+    ID_FIGURE_LOADED,
+    ID_FIGURE_PRECIP,
+    ID_FIGURE_TEMP,
+    ID_STATION_SELECT,
 )
+from utils.memoize import memoize_callback
+from utils.profiling import profile_phase
 
-bar_chart = dcc.Graph(
-    id=ID_FIGURE_BAR,
-    figure=bar_chart,
-    config={
-        "displayModeBar": False,
-    },
-)
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
-# Create `Graph` component containing average temperature data from Hawaii.
-avg_temp_line_chart = px.line(
-    data_frame=transformed_measurement,
-    x="Day",
-    y="Temperature",
-    title="Average Daily Temperature in Hawaii",
-    color="Month",
-    markers=True,
-    labels={"Day": "Day of month"},
-    height=350,
-)
+    import plotly.graph_objects as go
+    from pandas import DataFrame
 
-avg_temp_line_chart.update_layout(
-    legend={
-        "orientation": "h",
-        "xanchor": "right",
-        "yanchor": "bottom",
-        "x": 1,
-        "y": 1.02,
-    },
-    font={"size": 11},
-    margin=dict(l=60, r=30, t=70, b=50),
-)
+# Legend placed horizontally above the plotting area.
+LEGEND_LAYOUT = {
+    "orientation": "h",
+    "xanchor": "right",
+    "yanchor": "bottom",
+    "x": 1,
+    "y": 1.02,
+}
 
-avg_temp_line_chart = dcc.Graph(
-    id=ID_FIGURE_TEMP,
-    figure=avg_temp_line_chart,
-    config={
-        "displayModeBar": False,
-    },
-)
 
-# Create `Graph` component containing average precipitation data from Hawaii.
-avg_precip_line_chart = px.line(
-    data_frame=transformed_measurement,
-    x="Day",
-    y="Precipitation",
-    title="Average Daily Precipitation in Hawaii",
-    color="Month",
-    markers=True,
-    labels={"Day": "Day of month"},
-    height=350,
-)
+def create_bar_chart(df: DataFrame) -> go.Figure:
+    """Create a grouped bar chart from `sample_data`.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Sample data with columns `Fruit`, `Amount` and `City`.
+
+    Returns
+    -------
+    go.Figure
+        Bar chart.
+    """
+    fig = px.bar(
+        data_frame=df,
+        x="Fruit",
+        y="Amount",
+        color="City",
+        barmode="group",
+        height=350,
+    )
+
+    fig.update_layout(
+        legend=LEGEND_LAYOUT,
+        font={"size": 11},
+        margin=dict(l=53, r=30, t=20, b=50),
+    )
+    return fig
+
+
+def create_avg_temp_line_chart(df: DataFrame) -> go.Figure:
+    """Create a line chart of the average daily temperature in Hawaii.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Transformed measurement data.
+
+    Returns
+    -------
+    go.Figure
+        Line chart with a line for each month.
+    """
+    fig = px.line(
+        data_frame=df,
+        x="Day",
+        y="Temperature",
+        title="Average Daily Temperature in Hawaii",
+        color="Month",
+        markers=True,
+        labels={"Day": "Day of month"},
+        height=350,
+    )
+
+    fig.update_layout(
+        legend=LEGEND_LAYOUT,
+        font={"size": 11},
+        margin=dict(l=60, r=30, t=70, b=50),
+    )
+    return fig
+
+
+def create_avg_precip_line_chart(df: DataFrame) -> go.Figure:
+    """Create a line chart of the average daily precipitation in Hawaii.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Transformed measurement data.
+
+    Returns
+    -------
+    go.Figure
+        Line chart with a line for each month.
+    """
+    fig = px.line(
+        data_frame=df,
+        x="Day",
+        y="Precipitation",
+        title="Average Daily Precipitation in Hawaii",
+        color="Month",
+        markers=True,
+        labels={"Day": "Day of month"},
+        height=350,
+    )
+
+    fig.update_layout(
+        legend=LEGEND_LAYOUT,
+        font={"size": 11},
+        margin=dict(l=60, r=30, t=70, b=50),
+    )
+    return fig
 
-avg_precip_line_chart.update_layout(
-    legend={
-        "orientation": "h",
-        "xanchor": "right",
-        "yanchor": "bottom",
-        "x": 1,
-        "y": 1.02,
-    },
-    font={"size": 11},
-    margin=dict(l=60, r=30, t=70, b=50),
-)
 
-avg_precip_line_chart = dcc.Graph(
-    id=ID_FIGURE_PRECIP,
-    figure=avg_precip_line_chart,
-    config={
-        "displayModeBar": False,
-    },
+# Maps each figure's component id to a function returning its data for a station (None
+# for all stations) and the function that builds the figure from that data.
+FIGURE_BUILDERS: dict[
+    str, tuple[Callable[[str | None], DataFrame], Callable[[DataFrame], go.Figure]]
+] = {
+    ID_FIGURE_BAR: (lambda station: sample_data, create_bar_chart),
+    ID_FIGURE_TEMP: (get_transformed_measurement, create_avg_temp_line_chart),
+    ID_FIGURE_PRECIP: (get_transformed_measurement, create_avg_precip_line_chart),
+}
+# Maps each figure whose data depends on the selected station to the column it plots
+# against `Day`, with a trace for each `Month`.
+STATION_FIGURES = {ID_FIGURE_TEMP: "Temperature", ID_FIGURE_PRECIP: "Precipitation"}
+
+# Maps each figure's component id and station to the data version it was built from and
+# the encoded figure.
+_figure_cache: dict[tuple[str, str | None], tuple[str | None, dict]] = {}
+# Reentrant since a station's figure is built from the cached figure of all stations.
+_figure_cache_lock = threading.RLock()
+
+
+def _fill_station_figure(figure: dict, df: DataFrame, column: str) -> dict:
+    """Return a copy of a figure of all stations with the traces filled from `df`."""
+    data = []
+    for trace in figure["data"]:
+        month = df[df.Month == trace["name"]]
+        # Missing values are encoded as null, as plotly does.
+        values = month[column].astype(object).where(month[column].notna(), None)
+        data.append({**trace, "x": month.Day.tolist(), "y": values.tolist()})
+    return {**figure, "data": data}
+
+
+def get_figure(figure_id: str, station: str | None = None) -> dict:
+    """Return a figure as a JSON compatible dict, building it if its data has changed.
+
+    The figure is encoded once using plotly's fastest available JSON engine and the
+    decoded result is cached. The cached dict only holds JSON native types which Dash
+    can encode much faster than a plotly figure object. The data is read and the figure
+    built while holding the cache's lock, so that each figure is built once per version
+    and a figure is never replaced by one built from older data.
+
+    Parameters
+    ----------
+    figure_id : str
+        Component id of the figure's `Graph`.
+    station : str | None, optional
+        Id of the station to show, by default None (all stations). Ignored for figures
+        not in `STATION_FIGURES`.
+
+    Returns
+    -------
+    dict
+        Figure with `data` and `layout` keys.
+    """
+    if figure_id not in STATION_FIGURES:
+        station = None
+    get_data, create_figure = FIGURE_BUILDERS[figure_id]
+    with _figure_cache_lock:
+        # Data only moves to newer versions, read under the lock it is at least as new
+        # as the data of the cached figure.
+        df = get_data(station)
+        # Datasets loaded from the dataset cache carry the version of their data.
+        version = df.attrs.get("version")
+
+        cached = _figure_cache.get((figure_id, station))
+        if cached is None or cached[0] != version:
+            with profile_phase(f"figure:{figure_id}"):
+                if station is None:
+                    figure = json.loads(create_figure(df).to_json())
+                else:
+                    figure = _fill_station_figure(
+                        get_figure(figure_id), df, column=STATION_FIGURES[figure_id]
+                    )
+                cached = (version, figure)
+            _figure_cache[(figure_id, station)] = cached
+        return cached[1]
+
+
+def patch_trace_data(figure: dict) -> Patch:
+    """Create a partial update replacing the data of each trace of a figure.
+
+    The x and y values of each trace are assigned, the rest of the figure (the
+    layout, the template and the trace styles) is left as it is on the client.
+
+    Parameters
+    ----------
+    figure : dict
+        Figure with the same traces, in the same order, as the figure on the client.
+
+    Returns
+    -------
+    Patch
+        Partial update of the figure.
+    """
+    patched = Patch()
+    for i, trace in enumerate(figure["data"]):
+        patched["data"][i]["x"] = trace["x"]
+        patched["data"][i]["y"] = trace["y"]
+    return patched
+
+
+def create_graph_component(figure_id: str) -> dcc.Loading:
+    """Create an empty graph component that is filled once it is mounted.
+
+    The graph's figure is loaded by `load_figure` after the component is added to the
+    page, each graph in its own request, so that creating the component does not
+    require any data or figure work. A store next to the graph records whether its
+    figure was loaded.
+
+    Parameters
+    ----------
+    figure_id : str
+        Id of the figure, a key of `FIGURE_BUILDERS`.
+
+    Returns
+    -------
+    dcc.Loading
+        Graph component wrapped in a loading spinner shown until the figure arrives.
+    """
+    return dcc.Loading(
+        [
+            dcc.Graph(
+                id={"type": ID_FIGURE, "index": figure_id},
+                config={
+                    "displayModeBar": False,
+                },
+                style={"height": "350px"},
+            ),
+            dcc.Store(id={"type": ID_FIGURE_LOADED, "index": figure_id}, data=False),
+        ],
+        color="#475569",
+    )
+
+
+@callback(
+    output=[
+        Output(
+            component_id={"type": ID_FIGURE, "index": MATCH},
+            component_property="figure",
+        ),
+        Output(
+            component_id={"type": ID_FIGURE_LOADED, "index": MATCH},
+            component_property="data",
+        ),
+    ],
+    inputs=[
+        Input(
+            component_id={"type": ID_FIGURE, "index": MATCH}, component_property="id"
+        ),
+        Input(component_id=ID_STATION_SELECT, component_property="value"),
+    ],
+    state=State(
+        component_id={"type": ID_FIGURE_LOADED, "index": MATCH},
+        component_property="data",
+    ),
 )
+@memoize_callback(version=lambda: get_transformed_measurement().attrs["version"])
+def load_figure(graph_id, station, loaded):
+    """Load the figure for a graph component once it has been mounted.
+
+    Once the figure was loaded, figures depending on the station are updated with the
+    data of their traces only when the selected station changes (see
+    `patch_trace_data`), other figures are left unchanged. The result only depends on
+    the arguments so that it can be memoized.
 
+    Parameters
+    ----------
+    graph_id : dict[str, str]
+        Pattern matching id of the graph component.
+    station : str | None
+        Id of the selected station, None for all stations.
+    loaded : bool
+        Whether the graph's figure was loaded.
 
-# def create_graph_component(
-#     plotting_func: Callable[..., go.Figure], id: str, fig_params: dict
-# ) -> dcc.Graph:
-#     """Create a graph component for any plotly express figure type.
-
-#     Parameters
-#     ----------
-#     plotting_func : Callable[..., go.Figure]
-#         Plotly express plotting function.
-#     id : str
-#         Id for the Graph component
-#     fig_params : dict
-#         Parameters to create and style the figure.
-
-#     Returns
-#     -------
-#     dcc.Graph
-#         Graph object containing the figure.
-#     """
-#     figure = plotting_func(**fig_params)
-
-#     return Graph(id=id, figure=figure)
+    Returns
+    -------
+    tuple[dict | Patch, bool]
+        Figure for the graph, or the partial update of its traces, and whether the
+        figure was loaded.
+    """
+    figure_id = graph_id["index"]
+    if not loaded:
+        return get_figure(figure_id, station), True
+    if figure_id not in STATION_FIGURES:
+        return no_update, no_update
+    return patch_trace_data(get_figure(figure_id, station)), no_update
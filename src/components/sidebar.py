@@ -3,29 +3,84 @@
 The create sidebar function takes in the page registry and builds page links. There is
 also a header that redirects to the home page of the app.
 
+The styling of each page link (its icon and its classes) in both the active and the
+inactive state is computed once when the sidebar is created. A clientside callback
+then restyles the page links in the browser whenever the pathname changes.
+
+Variables:
+    PAGE_LINK_CLASSES
 Functions:
+    create_page_link_styles
     create_sidebar_component
 """
-import re
 
-from dash import Input, Output, State, callback, dcc, html, page_registry
+from dash import (
+    ALL,
+    Input,
+    Output,
+    State,
+    clientside_callback,
+    dcc,
+    html,
+    page_registry,
+)
 
 from utils.constants import (
     BG_COLOR_DARK,
     BG_COLOR_LIGHT,
     HOVER_COLOR_DARK,
-    ID_BACKGROUND_ICON,
-    ID_BACKGROUND_LINK,
-    ID_DASHBOARD_ICON,
-    ID_DASHBOARD_LINK,
-    ID_HOME_ICON,
-    ID_HOME_LINK,
     ID_LOCATION,
+    ID_SIDEBAR_ICON,
+    ID_SIDEBAR_LINK,
+    ID_SIDEBAR_STYLES,
     TEXT_COLOR_DARK,
     TEXT_COLOR_LIGHT,
 )
 from utils.funcs import update_utility_classes
 
+# Classes of an inactive page link.
+PAGE_LINK_CLASSES = (
+    "px-4 py-2 flex space-x-2 items-center "
+    f"{BG_COLOR_DARK} {TEXT_COLOR_LIGHT} {HOVER_COLOR_DARK}"
+)
+
+
+def create_page_link_styles() -> dict[str, dict]:
+    """Compute the icon src and classes of every sidebar page link when active or not.
+
+    Parameters are taken from the `page_registry` data of each page that has a `sidebar`
+    key with a value of True.
+
+    Returns
+    -------
+    dict[str, dict]
+        Contains `active_page`, a mapping from pathname to the module of the page that
+        is active at that pathname, and `links`, a mapping from page module to the
+        `active` and `inactive` styling (`src` and `className`) of its page link.
+    """
+    active_link_classes = update_utility_classes(
+        current_classes=PAGE_LINK_CLASSES,
+        remove_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
+        add_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
+    )
+
+    sidebar_pages = [page for page in page_registry.values() if page.get("sidebar")]
+    return {
+        "active_page": {
+            page["relative_path"]: page["module"] for page in sidebar_pages
+        },
+        "links": {
+            page["module"]: {
+                "active": {"src": page["icon_dark"], "className": active_link_classes},
+                "inactive": {
+                    "src": page["icon_light"],
+                    "className": PAGE_LINK_CLASSES,
+                },
+            }
+            for page in sidebar_pages
+        },
+    }
+
 
 def create_sidebar_component() -> html.Div:
     """Create the sidebar component with page links for navigation.
@@ -53,16 +108,15 @@ def create_sidebar_component() -> html.Div:
         dcc.Link(
             [
                 html.Img(
-                    id=page["id_icon"],
+                    id={"type": ID_SIDEBAR_ICON, "index": page["module"]},
                     src=page["icon_light"],
                     className="aspect-square w-3",
                 ),
                 html.Div(page["name"], className="text-sm text-inherit bg-inherit"),
             ],
-            id=page["id_link"],
+            id={"type": ID_SIDEBAR_LINK, "index": page["module"]},
             href=page["relative_path"],
-            className="""px-4 py-2 flex space-x-2 items-center bg-slate-800
-            text-emerald-50 hover:bg-slate-700 """,
+            className=PAGE_LINK_CLASSES,
         )
         for page in page_registry.values()
         if page.get("sidebar")
@@ -73,6 +127,7 @@ def create_sidebar_component() -> html.Div:
         # argument can be a list but it must not contain a list as an element).
         [
             dcc.Location(id=ID_LOCATION, refresh=False),
+            dcc.Store(id=ID_SIDEBAR_STYLES, data=create_page_link_styles()),
             heading,
             *page_links,
         ],
@@ -80,165 +135,33 @@ def create_sidebar_component() -> html.Div:
     )
 
 
-@callback(
-    output={
-        "output_icon_src": {
-            "home": Output(component_id=ID_HOME_ICON, component_property="src"),
-            "background": Output(
-                component_id=ID_BACKGROUND_ICON, component_property="src"
-            ),
-            "dashboard": Output(
-                component_id=ID_DASHBOARD_ICON, component_property="src"
-            ),
-        },
-        "output_link_class": {
-            "home": Output(component_id=ID_HOME_LINK, component_property="className"),
-            "background": Output(
-                component_id=ID_BACKGROUND_LINK, component_property="className"
-            ),
-            "dashboard": Output(
-                component_id=ID_DASHBOARD_LINK, component_property="className"
-            ),
-        },
-    },
-    inputs={
-        "pathname": Input(component_id=ID_LOCATION, component_property="pathname"),
-        "input_icon_src": {
-            "home": State(component_id=ID_HOME_ICON, component_property="src"),
-            "background": State(
-                component_id=ID_BACKGROUND_ICON, component_property="src"
-            ),
-            "dashboard": State(
-                component_id=ID_DASHBOARD_ICON, component_property="src"
-            ),
-        },
-        "input_link_class": {
-            "home": State(component_id=ID_HOME_LINK, component_property="className"),
-            "background": State(
-                component_id=ID_BACKGROUND_LINK, component_property="className"
-            ),
-            "dashboard": State(
-                component_id=ID_DASHBOARD_LINK, component_property="className"
-            ),
-        },
-    },
-)
-def update_page_link_styling(pathname, input_icon_src, input_link_class):
-    """Update icons and link colors when a link is active.
-
-    Parameters
-    ----------
-    pathname : str
-        Current pathname of the app.
-    input_icon_src : dict[str, str]
-        Contains the src attribute for each page link's icon.
-    input_link_class : dict[str, str]
-        Contains the class attribute for each page link.
-
-    Returns
-    -------
-    dict[str, dict[str, str]]
-        Contains the updated icon src attributes and page link class attributes.
+# Update icons and link colors when a link is active. Runs in the browser: the styles
+# for the current pathname are looked up in the precomputed `create_page_link_styles`
+# data so that navigating does not make a request to the server. The page link ids
+# (as State) give the page of each output since outputs matched with `ALL` are ordered
+# the same way.
+clientside_callback(
     """
-    home_page = page_registry["pages.home"]
-    background_page = page_registry["pages.background"]
-    dashboard_page = page_registry["pages.dashboard"]
-
-    # Assign icon src attribute variables that will be updated below if necessary.
-    home_icon_src = input_icon_src["home"]
-    background_icon_src = input_icon_src["background"]
-    dashboard_icon_src = input_icon_src["dashboard"]
-    # Assign page link class attribute variables that will be updated below if
-    # necessary.
-    home_link_class = input_link_class["home"]
-    background_link_class = input_link_class["background"]
-    dashboard_link_class = input_link_class["dashboard"]
-
-    # Capture the color of the icon from the icon's src attribute for each page.
-    pattern = r"_([a-z]+)\."
-    icon_color = {
-        page: re.search(pattern, icon_src).group(1)
-        for page, icon_src in input_icon_src.items()
-    }
-
-    # Update the color of the icon and the color styling of the link as a whole
-    # (background color and text color) based on the current pathname.
-    if pathname == home_page["relative_path"]:
-        if icon_color["home"] != "dark":
-            home_icon_src = home_page["icon_dark"]
-            home_link_class = update_utility_classes(
-                current_classes=home_link_class,
-                remove_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
-                add_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
-            )
-        if icon_color["background"] == "dark":
-            background_icon_src = background_page["icon_light"]
-            background_link_class = update_utility_classes(
-                current_classes=background_link_class,
-                remove_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
-                add_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
-            )
-        if icon_color["dashboard"] == "dark":
-            dashboard_icon_src = dashboard_page["icon_light"]
-            dashboard_link_class = update_utility_classes(
-                current_classes=dashboard_link_class,
-                remove_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
-                add_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
-            )
-    elif pathname == background_page["relative_path"]:
-        if icon_color["home"] == "dark":
-            home_icon_src = home_page["icon_light"]
-            home_link_class = update_utility_classes(
-                current_classes=home_link_class,
-                remove_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
-                add_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
-            )
-        if icon_color["background"] != "dark":
-            background_icon_src = background_page["icon_dark"]
-            background_link_class = update_utility_classes(
-                current_classes=background_link_class,
-                remove_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
-                add_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
-            )
-        if icon_color["dashboard"] == "dark":
-            dashboard_icon_src = dashboard_page["icon_light"]
-            dashboard_link_class = update_utility_classes(
-                current_classes=dashboard_link_class,
-                remove_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
-                add_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
-            )
-    elif pathname == dashboard_page["relative_path"]:
-        if icon_color["home"] == "dark":
-            home_icon_src = home_page["icon_light"]
-            home_link_class = update_utility_classes(
-                current_classes=home_link_class,
-                remove_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
-                add_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
-            )
-        if icon_color["background"] == "dark":
-            background_icon_src = background_page["icon_light"]
-            background_link_class = update_utility_classes(
-                current_classes=background_link_class,
-                remove_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
-                add_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
-            )
-        if icon_color["dashboard"] != "dark":
-            dashboard_icon_src = dashboard_page["icon_dark"]
-            dashboard_link_class = update_utility_classes(
-                current_classes=dashboard_link_class,
-                remove_classes=[BG_COLOR_DARK, TEXT_COLOR_LIGHT, HOVER_COLOR_DARK],
-                add_classes=[BG_COLOR_LIGHT, TEXT_COLOR_DARK],
-            )
-
-    return {
-        "output_icon_src": {
-            "home": home_icon_src,
-            "background": background_icon_src,
-            "dashboard": dashboard_icon_src,
-        },
-        "output_link_class": {
-            "home": home_link_class,
-            "background": background_link_class,
-            "dashboard": dashboard_link_class,
-        },
+    function(pathname, linkIds, linkStyles) {
+        const activePage = linkStyles.active_page[pathname];
+        const styles = linkIds.map(
+            (id) => linkStyles.links[id.index][
+                id.index === activePage ? "active" : "inactive"
+            ]
+        );
+        return [styles.map((s) => s.src), styles.map((s) => s.className)];
     }
+    """,
+    Output(
+        component_id={"type": ID_SIDEBAR_ICON, "index": ALL}, component_property="src"
+    ),
+    Output(
+        component_id={"type": ID_SIDEBAR_LINK, "index": ALL},
+        component_property="className",
+    ),
+    Input(component_id=ID_LOCATION, component_property="pathname"),
+    State(
+        component_id={"type": ID_SIDEBAR_LINK, "index": ALL}, component_property="id"
+    ),
+    State(component_id=ID_SIDEBAR_STYLES, component_property="data"),
+)
@@ -0,0 +1,64 @@
+"""Build the station selector of the dashboard page.
+
+The selected station drives the temperature and precipitation charts and the climate
+table. Clearing the selection shows the data of all stations. The dropdown is created
+without options, they are loaded by a callback once it is mounted so that the page
+layout does not read any data.
+
+Functions:
+    create_station_select
+    load_station_options
+"""
+
+from dash import Input, Output, callback, dcc, html
+
+from data.process_data import get_stations
+from utils.constants import ID_STATION_SELECT
+
+
+def create_station_select() -> html.Div:
+    """Create a dropdown to select the station shown on the dashboard.
+
+    Returns
+    -------
+    html.Div
+        Labelled dropdown whose value is the id of the selected station, or None for
+        all stations. Its options are filled by `load_station_options`.
+    """
+    return html.Div(
+        [
+            html.Label("Station", htmlFor=ID_STATION_SELECT, className="font-semibold"),
+            dcc.Dropdown(
+                id=ID_STATION_SELECT,
+                options=[],
+                value=None,
+                placeholder="All stations",
+                className="w-[420px]",
+            ),
+        ],
+        className="mb-4 flex items-center space-x-3",
+    )
+
+
+@callback(
+    output=Output(component_id=ID_STATION_SELECT, component_property="options"),
+    inputs=Input(component_id=ID_STATION_SELECT, component_property="id"),
+)
+def load_station_options(station_select_id):
+    """Load the stations of the station selector once it has been mounted.
+
+    Parameters
+    ----------
+    station_select_id : str
+        Id of the station selector.
+
+    Returns
+    -------
+    list[dict[str, str]]
+        Label (name and id) and value (id) of each station, ordered by name.
+    """
+    stations = get_stations()
+    return [
+        {"label": f"{name} ({station})", "value": station}
+        for station, name in zip(stations.station, stations.name)
+    ]
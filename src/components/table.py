@@ -1,18 +1,34 @@
 """Creates Dash DataTable from a DataFrame.
 
+Paging, sorting and filtering are done server side. The table's page, sort and filter
+state is translated into a query against the dataset by a callback which returns only
+the rows of the visible page. The table shows the data of the station selected on the
+dashboard, or of all stations when none is selected. Pages are memoized by their
+query and the version of the dataset (see `utils.memoize`).
+
 Variables:
+    PAGE_SIZE
     hawaii_climate_table
+Functions:
+    update_climate_table
 """
 
+from dash import Input, Output, callback
 from dash.dash_table import DataTable
 from dash.dash_table.Format import Format, Scheme
 
-from data.process_data import transformed_measurement
-from utils.constants import ID_TABLE_CLIMATE
+from data.process_data import get_transformed_measurement
+from data.query import dataframe_table, query_page
+from utils.constants import ID_STATION_SELECT, ID_TABLE_CLIMATE
+from utils.memoize import memoize_callback
+
+# Number of rows sent to the browser per page of the table.
+PAGE_SIZE = 20
 
 hawaii_climate_table = DataTable(
     id=ID_TABLE_CLIMATE,
-    data=transformed_measurement.to_dict(orient="records"),
+    # `data` and `page_count` are filled by `update_climate_table`.
+    data=[],
     # Each column requires at least `name` and `id`. `name` is the string that will be
     # used as the column header. `id` is the name of the column from the DataFrame from
     # which to take the data from.
@@ -38,7 +54,14 @@ hawaii_climate_table = DataTable(
             "format": Format(precision=1, scheme=Scheme.fixed),
         },
     ],
-    page_action="none",
+    page_action="custom",
+    page_current=0,
+    page_size=PAGE_SIZE,
+    sort_action="custom",
+    sort_mode="multi",
+    sort_by=[],
+    filter_action="custom",
+    filter_query="",
     style_table={"height": "350px", "overflowY": "auto"},
     fixed_rows={"headers": True},
     style_as_list_view=True,
@@ -57,3 +80,58 @@ hawaii_climate_table = DataTable(
         {"if": {"row_index": "even"}, "backgroundColor": "#f8fafc"},
     ],
 )
+
+
+@callback(
+    output={
+        "data": Output(component_id=ID_TABLE_CLIMATE, component_property="data"),
+        "page_count": Output(
+            component_id=ID_TABLE_CLIMATE, component_property="page_count"
+        ),
+    },
+    inputs={
+        "page_current": Input(
+            component_id=ID_TABLE_CLIMATE, component_property="page_current"
+        ),
+        "page_size": Input(
+            component_id=ID_TABLE_CLIMATE, component_property="page_size"
+        ),
+        "sort_by": Input(component_id=ID_TABLE_CLIMATE, component_property="sort_by"),
+        "filter_query": Input(
+            component_id=ID_TABLE_CLIMATE, component_property="filter_query"
+        ),
+        "station": Input(component_id=ID_STATION_SELECT, component_property="value"),
+    },
+)
+@memoize_callback(version=lambda: get_transformed_measurement().attrs["version"])
+def update_climate_table(page_current, page_size, sort_by, filter_query, station):
+    """Query the rows of the visible page of the climate table.
+
+    Parameters
+    ----------
+    page_current : int
+        Index of the current page (zero based).
+    page_size : int
+        Number of rows per page.
+    sort_by : list[dict[str, str]]
+        Columns (and directions) to sort by.
+    filter_query : str
+        Filter expression built from the table's filter row.
+    station : str | None
+        Id of the selected station, None for all stations.
+
+    Returns
+    -------
+    dict[str, list[dict] | int]
+        Contains the rows of the current page and the total number of pages.
+    """
+    data, page_count = query_page(
+        table=dataframe_table(
+            df=get_transformed_measurement(station), name="transformed_measurement"
+        ),
+        page_current=page_current,
+        page_size=page_size,
+        sort_by=sort_by,
+        filter_query=filter_query,
+    )
+    return {"data": data, "page_count": page_count}
@@ -0,0 +1,253 @@
+"""Build the daily time series chart of the dashboard page.
+
+The chart shows the daily temperature and precipitation of the station selected on the
+dashboard (or the mean of all stations) over the range of dates picked above it. Series
+are downsampled on the server to about one point per pixel of the chart before the
+figure is built (see `data.timeseries`). Zooming or panning the chart reloads the
+visible window only, downsampled again, so that detail is added as the window narrows
+without ever sending the whole series. The figure is only sent in full when the chart
+is mounted, later updates are a `Patch` of the traces' x and y values (and of the
+`uirevision` resetting the zoom for new dates or stations). The date range picker is
+created empty (all dates) and its bounds are filled once it is mounted, so that the
+page layout does not read any data. Results are memoized by
+the dates, the station, the zoom and the version of the dataset (see `utils.memoize`).
+
+Variables:
+    CHART_WIDTH_PX
+    TIMESERIES_TRACES
+Functions:
+    downsample_traces
+    create_timeseries_figure
+    create_timeseries_component
+    load_date_range
+    update_timeseries
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+import plotly.graph_objects as go
+from dash import Input, Output, Patch, callback, ctx, dcc, html, no_update
+from plotly.subplots import make_subplots
+
+from data.process_data import get_daily_measurement, get_measurement
+from data.timeseries import downsample, slice_dates
+from utils.constants import ID_DATE_RANGE, ID_FIGURE_TIMESERIES, ID_STATION_SELECT
+from utils.memoize import memoize_callback
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+# Width of the chart in pixels, each series is downsampled to at most this many points.
+CHART_WIDTH_PX = 512
+# Column, title and downsampling method of the series plotted in each row of the chart.
+TIMESERIES_TRACES = (
+    ("tobs", "Temperature", "lttb"),
+    ("prcp", "Precipitation", "minmax"),
+)
+
+# Matches the keys of `relayoutData` holding the x range zoomed or panned to, for any of
+# the (shared) x axes of the chart.
+_RANGE_PATTERN = re.compile(r"^xaxis\d*\.range(\[(?P<bound>[01])\])?$")
+
+
+def downsample_traces(
+    daily: DataFrame, start: str | None = None, end: str | None = None
+) -> list[DataFrame]:
+    """Downsample each series of `TIMESERIES_TRACES` between two dates.
+
+    Parameters
+    ----------
+    daily : DataFrame
+        Output of `data.process_data.get_daily_measurement`.
+    start : str | None, optional
+        First date, by default None (the first date of `daily`).
+    end : str | None, optional
+        Last date, by default None (the last date of `daily`).
+
+    Returns
+    -------
+    list[DataFrame]
+        Columns `date` (as "YYYY-MM-DD" strings) and the series' column of the kept
+        rows, for each trace.
+    """
+    window = slice_dates(daily, start, end)
+    traces = []
+    for column, _, method in TIMESERIES_TRACES:
+        points = downsample(window, "date", column, n_out=CHART_WIDTH_PX, method=method)
+        # Dates without a time are encoded in about half the characters of timestamps.
+        traces.append(points.assign(date=points.date.dt.strftime("%Y-%m-%d")))
+    return traces
+
+
+def create_timeseries_figure(
+    daily: DataFrame,
+    start: str | None = None,
+    end: str | None = None,
+    uirevision: str | None = None,
+) -> go.Figure:
+    """Create a chart of the daily temperature and precipitation between two dates.
+
+    Parameters
+    ----------
+    daily : DataFrame
+        Output of `data.process_data.get_daily_measurement`.
+    start : str | None, optional
+        First date shown, by default None (the first date of `daily`).
+    end : str | None, optional
+        Last date shown, by default None (the last date of `daily`).
+    uirevision : str | None, optional
+        Figures with the same value keep the user's zoom, by default None.
+
+    Returns
+    -------
+    go.Figure
+        Line charts of the downsampled series, one above the other with a shared x
+        axis.
+    """
+    fig = make_subplots(rows=len(TIMESERIES_TRACES), cols=1, shared_xaxes=True)
+    traces = zip(TIMESERIES_TRACES, downsample_traces(daily, start, end))
+    for row, ((column, title, _), points) in enumerate(traces, start=1):
+        fig.add_trace(
+            go.Scatter(x=points.date, y=points[column], name=title, mode="lines"),
+            row=row,
+            col=1,
+        )
+        fig.update_yaxes(title_text=title, row=row, col=1)
+
+    fig.update_layout(
+        title="Daily Temperature and Precipitation in Hawaii",
+        showlegend=False,
+        height=350,
+        font={"size": 11},
+        margin=dict(l=60, r=30, t=70, b=50),
+        uirevision=uirevision,
+    )
+    return fig
+
+
+def create_timeseries_component() -> html.Div:
+    """Create the (empty) date range picker and time series chart.
+
+    Returns
+    -------
+    html.Div
+        Date range picker, whose bounds are filled by `load_date_range`, above the
+        chart which is filled by `update_timeseries`. Without picked dates the chart
+        shows all dates.
+    """
+    return html.Div(
+        [
+            dcc.DatePickerRange(
+                id=ID_DATE_RANGE,
+                display_format="YYYY-MM-DD",
+                className="p-2",
+            ),
+            dcc.Loading(
+                dcc.Graph(
+                    id=ID_FIGURE_TIMESERIES,
+                    config={"displayModeBar": False},
+                    style={"height": "350px"},
+                ),
+                color="#475569",
+            ),
+        ]
+    )
+
+
+def _zoom_window(relayout_data: dict) -> tuple[str, str] | None:
+    """Return the x range zoomed or panned to from a chart's `relayoutData`, if any."""
+    bounds = {}
+    for key, value in relayout_data.items():
+        if match := _RANGE_PATTERN.match(key):
+            if match.group("bound") is None:
+                bounds.update(enumerate(value))
+            else:
+                bounds[int(match.group("bound"))] = value
+    return (bounds[0], bounds[1]) if len(bounds) == 2 else None
+
+
+@callback(
+    output=[
+        Output(component_id=ID_DATE_RANGE, component_property="min_date_allowed"),
+        Output(component_id=ID_DATE_RANGE, component_property="max_date_allowed"),
+        Output(component_id=ID_DATE_RANGE, component_property="initial_visible_month"),
+    ],
+    inputs=Input(component_id=ID_DATE_RANGE, component_property="id"),
+)
+@memoize_callback(version=lambda: get_measurement().attrs["version"])
+def load_date_range(date_range_id):
+    """Bound the date range picker by the dates of the measurement dataset.
+
+    Parameters
+    ----------
+    date_range_id : str
+        Id of the date range picker.
+
+    Returns
+    -------
+    tuple[str, str, str]
+        First date, last date and the month the picker opens at (the first date's).
+    """
+    dates = get_measurement().date
+    first, last = dates.min().date().isoformat(), dates.max().date().isoformat()
+    return first, last, first
+
+
+@callback(
+    output=Output(component_id=ID_FIGURE_TIMESERIES, component_property="figure"),
+    inputs=[
+        Input(component_id=ID_DATE_RANGE, component_property="start_date"),
+        Input(component_id=ID_DATE_RANGE, component_property="end_date"),
+        Input(component_id=ID_STATION_SELECT, component_property="value"),
+        Input(component_id=ID_FIGURE_TIMESERIES, component_property="relayoutData"),
+    ],
+)
+@memoize_callback(version=lambda: get_measurement().attrs["version"])
+def update_timeseries(start_date, end_date, station, relayout_data):
+    """Load the time series chart for the picked dates, or for the visible window.
+
+    When the chart is zoomed or panned, only the visible window is loaded. Resetting
+    the zoom loads the picked dates again, other changes to the chart's layout are
+    ignored. The full figure is only built for the first load, updates replace the
+    data of its traces.
+
+    Parameters
+    ----------
+    start_date : str | None
+        First picked date, None for the first date.
+    end_date : str | None
+        Last picked date, None for the last date.
+    station : str | None
+        Id of the selected station, None for all stations.
+    relayout_data : dict | None
+        Changes made by the user to the chart's layout.
+
+    Returns
+    -------
+    go.Figure | Patch
+        Time series chart, or the partial update of its traces.
+    """
+    start, end = start_date, end_date
+    if ctx.triggered_id == ID_FIGURE_TIMESERIES:
+        relayout_data = relayout_data or {}
+        if window := _zoom_window(relayout_data):
+            start, end = window
+        elif not any(key.endswith(".autorange") for key in relayout_data):
+            return no_update
+
+    daily = get_daily_measurement(station)
+    # Keep the user's zoom while refining it, reset it for new dates or stations.
+    uirevision = f"{station}:{start_date}:{end_date}"
+    if ctx.triggered_id is None:
+        return create_timeseries_figure(daily, start, end, uirevision=uirevision)
+
+    patched = Patch()
+    traces = zip(TIMESERIES_TRACES, downsample_traces(daily, start, end))
+    for i, ((column, _, _), points) in enumerate(traces):
+        patched["data"][i]["x"] = points.date
+        patched["data"][i]["y"] = points[column]
+    patched["layout"]["uirevision"] = uirevision
+    return patched
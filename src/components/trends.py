@@ -0,0 +1,140 @@
+"""Build the station trends panel of the dashboard page.
+
+The yearly climate and temperature trend of every station (see `data.trends`) are only
+computed on request. The computation runs as a background callback (see
+`utils.background`) so that it does not hold up other requests: the panel shows its
+progress, station by station, and can cancel it.
+
+Functions:
+    create_trends_component
+    compute_station_trends
+"""
+
+from dash import Input, Output, html
+from dash.dash_table import DataTable
+from dash.dash_table.Format import Format, Scheme
+
+from data.process_data import get_measurement, get_stations
+from data.trends import station_trends
+from utils.background import background_callback
+from utils.constants import (
+    ID_TABLE_TRENDS,
+    ID_TRENDS_CANCEL,
+    ID_TRENDS_PROGRESS,
+    ID_TRENDS_RUN,
+)
+
+# Classes shared by the run and cancel buttons.
+_BUTTON_CLASSES = """px-3 py-1 rounded bg-slate-700 text-emerald-50 text-sm
+disabled:opacity-50"""
+
+
+def create_trends_component() -> html.Div:
+    """Create the buttons, progress bar and (empty) table of the station trends.
+
+    Returns
+    -------
+    html.Div
+        Panel whose table is filled by `compute_station_trends`.
+    """
+    return html.Div(
+        [
+            html.Div(
+                [
+                    html.Button(
+                        "Compute station trends",
+                        id=ID_TRENDS_RUN,
+                        className=_BUTTON_CLASSES,
+                    ),
+                    html.Button(
+                        "Cancel",
+                        id=ID_TRENDS_CANCEL,
+                        disabled=True,
+                        className=_BUTTON_CLASSES,
+                    ),
+                    html.Progress(id=ID_TRENDS_PROGRESS, value="0", max="1"),
+                ],
+                className="p-2 flex items-center space-x-3",
+            ),
+            DataTable(
+                id=ID_TABLE_TRENDS,
+                data=[],
+                columns=[
+                    {"name": "Station", "id": "Station"},
+                    {"name": "Years", "id": "Years", "type": "numeric"},
+                    {
+                        "name": "Temperature",
+                        "id": "Temperature",
+                        "type": "numeric",
+                        "format": Format(precision=1, scheme=Scheme.fixed),
+                    },
+                    {
+                        "name": "Trend (per decade)",
+                        "id": "Trend",
+                        "type": "numeric",
+                        "format": Format(precision=2, scheme=Scheme.fixed),
+                    },
+                    {
+                        "name": "Precipitation (yearly)",
+                        "id": "Precipitation",
+                        "type": "numeric",
+                        "format": Format(precision=1, scheme=Scheme.fixed),
+                    },
+                ],
+                style_table={"overflowX": "auto"},
+                style_as_list_view=True,
+                style_header={
+                    "color": "#ecfdf5",
+                    "fontWeight": "bold",
+                    "backgroundColor": "#475569",
+                },
+                style_cell={"padding": "10px", "textAlign": "left"},
+                style_data={"border": "none"},
+            ),
+        ]
+    )
+
+
+@background_callback(
+    output=Output(component_id=ID_TABLE_TRENDS, component_property="data"),
+    inputs=Input(component_id=ID_TRENDS_RUN, component_property="n_clicks"),
+    progress=[
+        Output(component_id=ID_TRENDS_PROGRESS, component_property="value"),
+        Output(component_id=ID_TRENDS_PROGRESS, component_property="max"),
+    ],
+    running=[
+        (
+            Output(component_id=ID_TRENDS_RUN, component_property="disabled"),
+            True,
+            False,
+        ),
+        (
+            Output(component_id=ID_TRENDS_CANCEL, component_property="disabled"),
+            False,
+            True,
+        ),
+    ],
+    cancel=Input(component_id=ID_TRENDS_CANCEL, component_property="n_clicks"),
+    prevent_initial_call=True,
+)
+def compute_station_trends(set_progress, n_clicks):
+    """Compute the trends of every station, reporting progress after each station.
+
+    Parameters
+    ----------
+    set_progress : Callable
+        Sets the value and the maximum of the progress bar.
+    n_clicks : int
+        Number of clicks of the run button.
+
+    Returns
+    -------
+    list[dict]
+        Rows of the trends table.
+    """
+    trends = station_trends(
+        get_measurement(),
+        get_stations(),
+        on_progress=lambda done, total: set_progress((str(done), str(total))),
+    )
+    return trends.to_dict("records")
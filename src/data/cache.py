@@ -0,0 +1,238 @@
+"""Persistent on-disk cache of processed datasets.
+
+Processed DataFrames are stored in a columnar layout, one `.npy` file per column (plus
+one for the categories of categorical columns), so that a warm start memory-maps the
+cached result instead of querying the source database and re-running the
+transformation. Nulls of object columns are stored as a separate mask. Each cache entry
+is keyed by a fingerprint of the source file (path and content hash) along with the
+name and version of the transformation. A stale fingerprint results in a cache miss
+which rebuilds the entry and removes the outdated ones.
+
+Hashing the contents of a large source file is slow, so the hash is recorded along
+with the file's inode, modification time and size (in `fingerprints.json` in the cache
+directory) and the file is only hashed again once its stat changes.
+
+Functions:
+    fingerprint_file
+    load_or_build
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import CACHE_DIR
+from utils.profiling import profile_phase
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from pandas import DataFrame
+
+# Size of the chunks read when hashing the contents of a source file.
+_HASH_CHUNK_SIZE = 1024 * 1024
+_MANIFEST = "manifest.json"
+# Content hash and stat of each source file when it was last hashed.
+_FINGERPRINTS_PATH = CACHE_DIR / "fingerprints.json"
+
+
+def _read_fingerprints() -> dict[str, dict]:
+    """Read the recorded content hashes of the source files."""
+    try:
+        with open(_FINGERPRINTS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_fingerprints(fingerprints: dict[str, dict]) -> None:
+    """Record the content hashes of the source files, replacing the file atomically."""
+    _FINGERPRINTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=_FINGERPRINTS_PATH.parent, prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        json.dump(fingerprints, f)
+    os.replace(tmp_path, _FINGERPRINTS_PATH)
+
+
+def fingerprint_file(path: Path) -> dict[str, str]:
+    """Fingerprint a file by its path and content hash.
+
+    The contents are only hashed when the inode, modification time or size of the file
+    differ from when it was last hashed, otherwise the recorded hash is used.
+
+    Parameters
+    ----------
+    path : Path
+        pathlib Path to the file.
+
+    Returns
+    -------
+    dict[str, str]
+        Fingerprint of the file.
+    """
+    resolved = str(path.resolve())
+    stat = path.stat()
+    file_stat = [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+    fingerprints = _read_fingerprints()
+    recorded = fingerprints.get(resolved)
+    if recorded is not None and recorded["stat"] == file_stat:
+        return {"path": resolved, "sha256": recorded["sha256"]}
+
+    content_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            content_hash.update(chunk)
+    fingerprints[resolved] = {"stat": file_stat, "sha256": content_hash.hexdigest()}
+    _write_fingerprints(fingerprints)
+    return {"path": resolved, "sha256": content_hash.hexdigest()}
+
+
+def _cache_key(name: str, source: Path, version: int) -> str:
+    """Create the cache key for a dataset from its source file and version."""
+    key_data = {
+        "name": name,
+        "version": version,
+        "source": fingerprint_file(source),
+    }
+    return hashlib.sha256(
+        json.dumps(key_data, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def _write_entry(df: DataFrame, entry_dir: Path) -> None:
+    """Write each column of `df` to its own `.npy` file along with a manifest."""
+    columns = []
+    for i, (column, series) in enumerate(df.items()):
+        entry = {"name": column, "file": f"{i}.npy"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Categoricals are stored as their codes and their categories.
+            values = series.cat.codes.to_numpy()
+            entry["categories"] = f"{i}.categories.npy"
+            np.save(
+                entry_dir / entry["categories"],
+                series.cat.categories.to_numpy().astype(str),
+                allow_pickle=False,
+            )
+        else:
+            values = series.to_numpy()
+        # Object columns are stored as fixed width unicode (pickled object arrays
+        # cannot be memory-mapped), with their nulls in a separate mask.
+        if values.dtype == object:
+            mask = pd.isna(values)
+            if mask.any():
+                entry["mask"] = f"{i}.mask.npy"
+                np.save(entry_dir / entry["mask"], mask, allow_pickle=False)
+                values = np.where(mask, "", values)
+            values = values.astype(str)
+        np.save(entry_dir / entry["file"], values, allow_pickle=False)
+        columns.append(entry)
+
+    with open(entry_dir / _MANIFEST, "w") as f:
+        json.dump({"columns": columns}, f)
+
+
+def _read_column(
+    entry_dir: Path, column: dict[str, str]
+) -> np.ndarray | pd.Categorical:
+    """Memory-map a column of a cache entry."""
+    values = np.load(entry_dir / column["file"], mmap_mode="r")
+    if "categories" in column:
+        categories = np.load(entry_dir / column["categories"])
+        return pd.Categorical.from_codes(values, categories=categories)
+    if "mask" in column:
+        values = values.astype(object)
+        values[np.load(entry_dir / column["mask"])] = None
+    return values
+
+
+def _read_entry(entry_dir: Path) -> DataFrame:
+    """Memory-map each column of a cache entry and assemble them into a DataFrame."""
+    with open(entry_dir / _MANIFEST) as f:
+        manifest = json.load(f)
+
+    # `copy=False` keeps the memory-mapped arrays as the DataFrame's columns rather
+    # than consolidating them into new (private) blocks.
+    df = pd.DataFrame(
+        {
+            column["name"]: _read_column(entry_dir, column)
+            for column in manifest["columns"]
+        },
+        copy=False,
+    )
+    # The cache key identifies the version of the data for downstream caches.
+    df.attrs["version"] = entry_dir.name
+    return df
+
+
+def load_or_build(
+    name: str,
+    build: Callable[[], DataFrame],
+    source: Path,
+    version: int,
+) -> DataFrame:
+    """Load a processed dataset from the cache, building and caching it on a miss.
+
+    The cache entry is written to a temporary directory and then renamed into place so
+    that concurrent processes never read a partially written entry. If another process
+    finished the same entry first, its result is used.
+
+    Parameters
+    ----------
+    name : str
+        Name of the dataset.
+    build : Callable[[], DataFrame]
+        Function that builds the dataset from `source`.
+    source : Path
+        pathlib Path to the source file that the dataset is built from.
+    version : int
+        Version of the transformation performed by `build`. Increment it whenever the
+        transformation changes so that existing entries are invalidated.
+
+    Returns
+    -------
+    DataFrame
+        The processed dataset with memory-mapped columns and a default index. The
+        cache key is stored in `attrs["version"]` to identify the version of the data.
+    """
+    with profile_phase(f"load_dataset:{name}"):
+        return _load_or_build(name=name, build=build, source=source, version=version)
+
+
+def _load_or_build(
+    name: str,
+    build: Callable[[], DataFrame],
+    source: Path,
+    version: int,
+) -> DataFrame:
+    """Load a processed dataset from the cache, see `load_or_build`."""
+    dataset_dir = CACHE_DIR / name
+    entry_dir = dataset_dir / _cache_key(name=name, source=source, version=version)
+
+    if not (entry_dir / _MANIFEST).exists():
+        dataset_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=dataset_dir, prefix=".tmp-"))
+        try:
+            _write_entry(build(), tmp_dir)
+            tmp_dir.rename(entry_dir)
+        except OSError:
+            # Another process renamed its entry into place first.
+            if not (entry_dir / _MANIFEST).exists():
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        # Remove entries built from outdated fingerprints or versions.
+        for stale_dir in dataset_dir.iterdir():
+            if stale_dir != entry_dir and not stale_dir.name.startswith("."):
+                shutil.rmtree(stale_dir, ignore_errors=True)
+
+    return _read_entry(entry_dir)
@@ -0,0 +1,366 @@
+"""Daily climatology cube of the measurement table.
+
+The cube holds, for each station, month and day of the month, the sum, the number of
+(non null) observations, the minimum and the maximum of each measured variable across
+all years, along with the number of rows and the largest `measurement.id`. It is built
+once from the measurement table (within the database) and is small (at most 366 rows per
+station) so that figures and tables for any subset of months, stations or statistics
+are computed from the cube with `query_cube` rather than from the raw rows.
+
+The cube is kept up to date incrementally: when the source database changes, only the
+rows added since the last update (those above the high-water mark of `measurement.id`)
+are read and merged into the cube. Rows are expected to only ever be appended, if rows
+up to the high-water mark were added or removed the cube is rebuilt from the whole
+table.
+
+The cube is sorted by station, so each station's cells form a contiguous block of rows.
+`partition_stations` indexes the blocks once per version of the cube and
+`get_station_cube` looks a station up by slicing its block, rather than filtering every
+row of the cube on each selection.
+
+Variables:
+    CLIMATOLOGY_CUBE_VERSION
+    CUBE_KEYS
+    VARIABLES
+    STATISTICS
+Functions:
+    aggregate_cube
+    merge_cubes
+    query_cube
+    partition_stations
+    get_cube
+    get_station_cube
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+import pandas as pd
+
+from data.cache import load_or_build
+from data.load_data import HAWAII_DB_PATH, get_table, reset_replaced_connections
+from data.refresh import rows_changed, source_changed
+from utils.profiling import profile_phase
+
+if TYPE_CHECKING:
+    from ibis.expr.types import Table
+    from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+# Increment whenever `aggregate_cube` changes so that cached results are rebuilt.
+CLIMATOLOGY_CUBE_VERSION = 1
+# Columns identifying each cell of the cube.
+CUBE_KEYS = ("station", "month", "day")
+# Measured variables summarized by the cube.
+VARIABLES = ("prcp", "tobs")
+# Statistics that `query_cube` can compute for each variable.
+STATISTICS = ("mean", "sum", "count", "min", "max")
+
+# How each column of the cube is combined when cells are merged.
+_MERGE_AGGREGATIONS = {
+    "rows": "sum",
+    "max_id": "max",
+    **{
+        f"{variable}_{statistic}": aggregation
+        for variable in VARIABLES
+        for statistic, aggregation in [
+            ("sum", "sum"),
+            ("count", "sum"),
+            ("min", "min"),
+            ("max", "max"),
+        ]
+    },
+}
+
+# The cube, the rows of each station within it (see `partition_stations`) and the
+# version of the cube loaded at startup, see `get_cube`.
+_cube: dict[str, Any] = {}
+_cube_lock = threading.Lock()
+
+
+def _finalize_cube(cube: DataFrame) -> DataFrame:
+    """Order the cube's cells and give its keys compact dtypes."""
+    return cube.astype({"station": "category", "month": "int8", "day": "int8"})[
+        [*CUBE_KEYS, *_MERGE_AGGREGATIONS]
+    ].sort_values(list(CUBE_KEYS), ignore_index=True)
+
+
+def aggregate_cube(input_table: Table, after_id: int | None = None) -> DataFrame:
+    """Build the climatology cube of the measurement table.
+
+    Month and day of the month are extracted from the `date` column and the rows are
+    grouped by station, month and day. All of these steps are compiled into a single
+    query that runs within the database, only the cube is materialized as a DataFrame.
+
+    Parameters
+    ----------
+    input_table : Table
+        ibis table expression of Hawaii temperature and precipitation observations.
+    after_id : int | None, optional
+        Only aggregate the rows with an `id` greater than `after_id`, by default None
+        (all rows).
+
+    Returns
+    -------
+    DataFrame
+        Columns `station`, `month`, `day`, `rows`, `max_id` and the sum, count, min
+        and max of each of the `VARIABLES` (e.g. `prcp_sum`), one row per station and
+        day of the year with observations.
+    """
+    if after_id is not None:
+        input_table = input_table.filter(input_table.id > after_id)
+
+    date = input_table.date.cast("date")
+    metrics = {"rows": input_table.count(), "max_id": input_table.id.max()}
+    for variable in VARIABLES:
+        column = input_table[variable]
+        metrics.update(
+            {
+                f"{variable}_sum": column.sum(),
+                f"{variable}_count": column.count(),
+                f"{variable}_min": column.min(),
+                f"{variable}_max": column.max(),
+            }
+        )
+
+    cube = (
+        input_table.group_by(
+            [
+                input_table.station,
+                date.month().name("month"),
+                date.day().name("day"),
+            ]
+        )
+        .aggregate(**metrics)
+        .execute()
+    )
+    # The sum is null for cells without any (non null) observations.
+    cube = cube.fillna({f"{variable}_sum": 0.0 for variable in VARIABLES})
+    return _finalize_cube(cube)
+
+
+def merge_cubes(cube: DataFrame, update: DataFrame) -> DataFrame:
+    """Merge the cube of new rows into an existing cube.
+
+    Parameters
+    ----------
+    cube : DataFrame
+        Output of `aggregate_cube`.
+    update : DataFrame
+        Output of `aggregate_cube` for rows not included in `cube`.
+
+    Returns
+    -------
+    DataFrame
+        Cube of the rows of both.
+    """
+    # Stations are concatenated as strings as the categories of the cubes may differ.
+    merged = (
+        pd.concat(
+            [cube.astype({"station": str}), update.astype({"station": str})],
+            ignore_index=True,
+        )
+        .groupby(list(CUBE_KEYS), as_index=False)
+        .agg(_MERGE_AGGREGATIONS)
+    )
+    return _finalize_cube(merged)
+
+
+def query_cube(
+    cube: DataFrame,
+    months: Sequence[int] | None = None,
+    stations: Sequence[str] | None = None,
+    variables: Sequence[str] = VARIABLES,
+    statistics: Sequence[str] = ("mean",),
+    by: Sequence[str] = ("month", "day"),
+) -> DataFrame:
+    """Summarize the cube for a subset of months and stations.
+
+    The selected cells are combined for each group of `by` (e.g. across stations for
+    the default of month and day) and the statistics are computed from the combined
+    sums, counts, minimums and maximums.
+
+    Parameters
+    ----------
+    cube : DataFrame
+        Output of `aggregate_cube` or `get_cube`.
+    months : Sequence[int] | None, optional
+        Months (1 to 12) to keep, by default None (all months).
+    stations : Sequence[str] | None, optional
+        Stations to keep, by default None (all stations).
+    variables : Sequence[str], optional
+        Variables to summarize, by default `VARIABLES`.
+    statistics : Sequence[str], optional
+        Statistics of each variable, any of `STATISTICS`, by default ("mean",).
+    by : Sequence[str], optional
+        Keys of the cube to group by, by default ("month", "day"). Pass an empty
+        sequence to summarize all selected cells together.
+
+    Returns
+    -------
+    DataFrame
+        Columns `by` followed by a `{variable}_{statistic}` column for each variable
+        and statistic, ordered by `by`.
+
+    Raises
+    ------
+    ValueError
+        If a variable, statistic or key is not in the cube.
+    """
+    for values, valid, kind in [
+        (variables, VARIABLES, "variable"),
+        (statistics, STATISTICS, "statistic"),
+        (by, CUBE_KEYS, "key"),
+    ]:
+        if invalid := set(values) - set(valid):
+            raise ValueError(
+                f"Unknown {kind}(s) {sorted(invalid)}, use any of {valid}."
+            )
+
+    selected = cube
+    if months is not None:
+        selected = selected[selected.month.isin(months)]
+    if stations is not None:
+        selected = selected[selected.station.isin(stations)]
+
+    aggregations = {
+        f"{variable}_{statistic}": _MERGE_AGGREGATIONS[f"{variable}_{statistic}"]
+        for variable in variables
+        for statistic in ("sum", "count", "min", "max")
+    }
+    if by:
+        combined = selected.groupby(list(by), observed=True).agg(aggregations)
+    else:
+        combined = selected.agg(aggregations).to_frame().T
+
+    summary = pd.DataFrame(index=combined.index)
+    for variable in variables:
+        for statistic in statistics:
+            if statistic == "mean":
+                count = combined[f"{variable}_count"]
+                # Cells without (non null) observations have a mean of NaN.
+                values = combined[f"{variable}_sum"] / count.where(count > 0)
+            else:
+                values = combined[f"{variable}_{statistic}"]
+            summary[f"{variable}_{statistic}"] = values
+    return summary.reset_index() if by else summary.reset_index(drop=True)
+
+
+def partition_stations(cube: DataFrame) -> dict[str, slice]:
+    """Index the block of rows of each station in the cube.
+
+    Parameters
+    ----------
+    cube : DataFrame
+        Output of `aggregate_cube`, sorted by station.
+
+    Returns
+    -------
+    dict[str, slice]
+        Maps each station to the slice of (positional) rows of the cube holding its
+        cells.
+    """
+    return {
+        station: slice(rows[0], rows[-1] + 1)
+        for station, rows in cube.groupby("station", observed=True).indices.items()
+    }
+
+
+def _set_cube(cube: DataFrame) -> None:
+    """Store the cube along with the rows of each station within it."""
+    _cube.update(cube=cube, partitions=partition_stations(cube))
+
+
+def _refresh_cube() -> None:
+    """Merge the rows added to the measurement table since the last update."""
+    # The database file may have been replaced rather than modified, reconnect so that
+    # the current file is read.
+    reset_replaced_connections(HAWAII_DB_PATH)
+    table = get_table(name="measurement")
+    cube = _cube["cube"]
+    high_water_mark = int(cube.max_id.max()) if len(cube) else 0
+
+    if rows_changed(table, high_water_mark, known_rows=cube.rows.sum()):
+        logger.info("Rows were removed from measurement, rebuilding its cube.")
+        cube = aggregate_cube(table)
+    else:
+        update = aggregate_cube(table, after_id=high_water_mark)
+        if update.empty:
+            return
+        logger.info("Adding %d new rows of measurement to its cube.", update.rows.sum())
+        cube = merge_cubes(cube, update)
+
+    cube.attrs[
+        "version"
+    ] = f"{_cube['base_version']}+{cube.max_id.max()}-{cube.rows.sum()}"
+    _set_cube(cube)
+
+
+def _update_cube() -> None:
+    """Load the cube on first use, afterwards merge new rows when the database changes.
+
+    Must be called with `_cube_lock` held.
+    """
+    if not _cube:
+        # Record the state of the database before reading it so that changes made
+        # while reading are picked up by the next check.
+        source_changed(HAWAII_DB_PATH, consumer="climatology_cube")
+        cube = load_or_build(
+            name="climatology_cube",
+            build=lambda: aggregate_cube(get_table(name="measurement")),
+            source=HAWAII_DB_PATH,
+            version=CLIMATOLOGY_CUBE_VERSION,
+        )
+        _cube["base_version"] = cube.attrs["version"]
+        _set_cube(cube)
+    elif source_changed(HAWAII_DB_PATH, consumer="climatology_cube"):
+        with profile_phase("refresh_climatology_cube"):
+            _refresh_cube()
+
+
+def get_cube() -> DataFrame:
+    """Return the climatology cube of the measurement table, loading it on first use.
+
+    The cube is memory-mapped from the on-disk cache and is only rebuilt when the
+    database or `aggregate_cube` changes. Subsequent calls check whether the database
+    changed (at most every few seconds, see `data.refresh`) and merge the new rows into
+    the cube. The version of the cube is stored in `attrs["version"]`.
+
+    Returns
+    -------
+    DataFrame
+        Output of `aggregate_cube` for the Hawaii measurement table.
+    """
+    with _cube_lock:
+        _update_cube()
+        return _cube["cube"]
+
+
+def get_station_cube(station: str) -> DataFrame:
+    """Return the cells of the climatology cube of a single station.
+
+    The station's block of rows is looked up in the partition index of the cube, no
+    other row of the cube is read.
+
+    Parameters
+    ----------
+    station : str
+        Id of the station, e.g. "USC00519397".
+
+    Returns
+    -------
+    DataFrame
+        Rows of `get_cube` for the station, empty for unknown stations. Carries the
+        version of the cube in `attrs["version"]`.
+    """
+    with _cube_lock:
+        _update_cube()
+        cube = _cube["cube"]
+        station_cube = cube.iloc[_cube["partitions"].get(station, slice(0, 0))]
+    station_cube.attrs["version"] = cube.attrs["version"]
+    return station_cube
@@ -0,0 +1,168 @@
+"""Pool read-only connections to sqlite databases.
+
+The app only reads its databases, every connection handed out by `checkout` is opened
+read-only (`mode=ro`, with `PRAGMA query_only`) and tuned for reads:
+
+- The database file is memory-mapped (`PRAGMA mmap_size`) so that pages are read from
+  the OS page cache without being copied into sqlite's own cache, and a large page
+  cache (`PRAGMA cache_size`) keeps the pages read by earlier queries.
+- With `SQLITE_IMMUTABLE` set, databases are opened `immutable`: sqlite skips locking
+  and change detection entirely. This is off by default since it is incompatible with
+  picking up changes to the database while the app runs (see `data.refresh`), use it
+  only for a database that is never modified while it is served. Databases in WAL
+  mode, whose latest writes are only in their `-wal` file which `immutable` ignores,
+  are never opened `immutable`.
+
+Connections are kept per thread (sqlite connections must not be shared between threads)
+and per process, so that each thread of each worker reuses its own connection across
+requests instead of reconnecting for every query. A connection is health checked when
+it is checked out and replaced when it is no longer usable (e.g. closed). `reset_pool`
+makes every thread reconnect, e.g. after the database file has been replaced.
+
+Environment Variables:
+    SQLITE_MMAP_MB: Size of the memory-mapped part of each database, by default 256.
+        Set to 0 to read without memory-mapping.
+    SQLITE_CACHE_MB: Size of the page cache of each connection, by default 64.
+    SQLITE_IMMUTABLE: "true" or "false", open databases `immutable`, by default
+        "false". Changes made to a database while the app runs are then not picked up
+        and may be read as a corrupt database.
+
+Variables:
+    SQLITE_MMAP_SIZE
+    SQLITE_CACHE_SIZE_KB
+    SQLITE_IMMUTABLE
+Functions:
+    is_wal
+    connection_uri
+    open_connection
+    checkout
+    reset_pool
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# Bytes of each database that are memory-mapped rather than read into the page cache.
+SQLITE_MMAP_SIZE = int(float(os.environ.get("SQLITE_MMAP_MB", "256")) * 1024**2)
+# Page cache of each connection in KiB (negative `cache_size` values are in KiB).
+SQLITE_CACHE_SIZE_KB = int(float(os.environ.get("SQLITE_CACHE_MB", "64")) * 1024)
+# Skip locking and change detection, only for databases never modified while served.
+SQLITE_IMMUTABLE = os.environ.get("SQLITE_IMMUTABLE", "false").lower() == "true"
+
+# Connections of the current thread by database path, see `checkout`.
+_connections = threading.local()
+# Incremented by `reset_pool`, connections of an earlier generation are discarded.
+_generation = 0
+
+
+def is_wal(path: Path) -> bool:
+    """Check whether a sqlite database is in WAL mode.
+
+    Reads the file format version numbers of the database header rather than opening
+    a connection, they are 2 in WAL mode.
+
+    Parameters
+    ----------
+    path : Path
+        pathlib Path to the sqlite db.
+
+    Returns
+    -------
+    bool
+        Whether the database is in WAL mode.
+    """
+    with open(path, "rb") as f:
+        header = f.read(20)
+    return header[18:20] == b"\x02\x02"
+
+
+def connection_uri(path: Path) -> str:
+    """Return the URI opening a sqlite database read-only.
+
+    Parameters
+    ----------
+    path : Path
+        pathlib Path to the sqlite db.
+
+    Returns
+    -------
+    str
+        `file:` URI with `mode=ro`, and `immutable=1` when `SQLITE_IMMUTABLE` is set
+        and the database is not in WAL mode.
+    """
+    path = path.resolve()
+    uri = f"{path.as_uri()}?mode=ro"
+    if SQLITE_IMMUTABLE and not is_wal(path):
+        uri += "&immutable=1"
+    return uri
+
+
+def open_connection(path: Path) -> sqlite3.Connection:
+    """Open a read-only connection to a sqlite database, tuned for reads.
+
+    Parameters
+    ----------
+    path : Path
+        pathlib Path to the sqlite db.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Read-only connection.
+    """
+    connection = sqlite3.connect(connection_uri(path), uri=True)
+    connection.execute("PRAGMA query_only = ON")
+    connection.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    connection.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+    connection.execute("PRAGMA temp_store = MEMORY")
+    return connection
+
+
+def _is_healthy(connection: sqlite3.Connection) -> bool:
+    """Check that a connection can still run queries."""
+    try:
+        connection.execute("SELECT 1").fetchone()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def checkout(path: Path) -> sqlite3.Connection:
+    """Return the current thread's read-only connection to a sqlite database.
+
+    The connection is opened on the thread's first call (see `open_connection`) and
+    reused by its subsequent calls until `reset_pool` is called. It is health checked
+    on every call and replaced when it is no longer usable. The connection must only be
+    used by the calling thread and must not be closed by the caller.
+
+    Parameters
+    ----------
+    path : Path
+        pathlib Path to the sqlite db.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Read-only connection.
+    """
+    # Connections inherited from the parent of a forked process are not reused either.
+    key = (os.getpid(), _generation)
+    if getattr(_connections, "key", None) != key:
+        _connections.key, _connections.by_path = key, {}
+    connection = _connections.by_path.get(path)
+    if connection is None or not _is_healthy(connection):
+        connection = _connections.by_path[path] = open_connection(path)
+    return connection
+
+
+def reset_pool() -> None:
+    """Discard the connections of every thread, each reconnects on its next checkout."""
+    global _generation
+    _generation += 1
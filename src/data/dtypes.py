@@ -0,0 +1,155 @@
+"""Compact the dtypes of loaded DataFrames.
+
+DataFrames are read with default dtypes: text as object strings and numbers as 64 bit
+values. Compacting them after loading reduces the memory held by each worker and speeds
+up grouping and filtering:
+
+- Text columns holding ISO dates are parsed (once) into `datetime64`.
+- Other text columns with few distinct values become categoricals.
+- Integer columns are downcast to the smallest integer type holding their values.
+- Float columns are downcast to `float32` when no value changes (e.g. whole numbers).
+
+DataFrames loaded in batches are compacted batch by batch and then concatenated with
+`concat_compacted`, which keeps the categoricals of the batches.
+
+Variables:
+    CATEGORY_MAX_UNIQUE_RATIO
+Functions:
+    compact_dtypes
+    concat_compacted
+    memory_report
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+if TYPE_CHECKING:
+    from pandas import DataFrame, Series
+
+logger = logging.getLogger(__name__)
+
+# Text columns become categoricals when at most this fraction of their values is unique.
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+_ISO_DATE_PATTERN = r"\d{4}-\d{2}-\d{2}"
+
+
+def _compact_column(series: Series) -> Series:
+    """Return `series` with the most compact dtype that keeps every value."""
+    if series.dtype == object:
+        values = series.dropna()
+        if values.empty or pd.api.types.infer_dtype(values) != "string":
+            return series
+        if values.str.fullmatch(_ISO_DATE_PATTERN).all():
+            return pd.to_datetime(series, format="%Y-%m-%d")
+        if values.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(values):
+            return series.astype("category")
+        return series
+
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, downcast="integer")
+
+    if pd.api.types.is_float_dtype(series.dtype) and series.dtype != np.float32:
+        downcast = series.astype(np.float32)
+        if np.array_equal(
+            downcast.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True
+        ):
+            return downcast
+    return series
+
+
+def compact_dtypes(
+    df: DataFrame, name: str = "DataFrame", log: bool = True
+) -> DataFrame:
+    """Convert each column of a DataFrame to a more compact dtype where lossless.
+
+    The memory used before and after is logged.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Loaded data with default dtypes.
+    name : str, optional
+        Name of the data in the log message, by default "DataFrame".
+    log : bool, optional
+        Whether to log the memory used, by default True.
+
+    Returns
+    -------
+    DataFrame
+        New DataFrame with compacted columns.
+    """
+    compacted = pd.DataFrame(
+        {column: _compact_column(series) for column, series in df.items()},
+        index=df.index,
+    )
+    if not log:
+        return compacted
+    report = memory_report(df, compacted)
+    logger.info(
+        "Compacted %s from %.2f MB to %.2f MB.",
+        name,
+        report.mb_before.sum(),
+        report.mb_after.sum(),
+    )
+    return compacted
+
+
+def concat_compacted(frames: list[DataFrame]) -> DataFrame:
+    """Concatenate compacted DataFrames with the same columns.
+
+    Columns that are categorical in every DataFrame stay categorical with the (sorted)
+    union of their categories, rather than falling back to object strings as with
+    `pd.concat`. Other columns are concatenated with `pd.concat`, run `compact_dtypes`
+    on the result to compact the columns whose dtypes differed between the DataFrames.
+
+    Parameters
+    ----------
+    frames : list[DataFrame]
+        Compacted DataFrames (see `compact_dtypes`), at least one.
+
+    Returns
+    -------
+    DataFrame
+        Rows of every DataFrame in order, with a new range index.
+    """
+    columns = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[column] = pd.Series(
+                union_categoricals(parts, sort_categories=True), name=column
+            )
+        else:
+            columns[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def memory_report(before: DataFrame, after: DataFrame) -> DataFrame:
+    """Compare the dtype and memory of each column of two versions of a DataFrame.
+
+    Parameters
+    ----------
+    before : DataFrame
+        Original data.
+    after : DataFrame
+        Data after converting dtypes, with the same columns.
+
+    Returns
+    -------
+    DataFrame
+        One row per column with its dtype and memory (MB) before and after.
+    """
+    return pd.DataFrame(
+        {
+            "dtype_before": before.dtypes.astype(str),
+            "dtype_after": after.dtypes.astype(str),
+            "mb_before": before.memory_usage(index=False, deep=True) / 1024**2,
+            "mb_after": after.memory_usage(index=False, deep=True) / 1024**2,
+        }
+    )
@@ -1,34 +1,320 @@
 """Load data resources.
 
-Loads data into DataFrames for further processing and for the production of example
-figures and tables.
+Data is loaded lazily, nothing is read when this module is imported. Tables within the
+sqlite database are handed out as ibis table expressions so that consumers can select
+the columns and filter the rows they need before anything is materialized. DataFrames
+are only materialized the first time they are requested and are cached afterwards.
+Materialized tables have their dtypes compacted (see `data.dtypes`).
+
+Query results can also be streamed as DataFrames of at most `BATCH_SIZE` rows, so that
+the memory needed to process a table is bounded by the batch size rather than by the
+size of the table.
+
+Connections are kept per thread (and per process): an ibis backend caches the schemas
+it reflects and sqlite connections must not be shared between threads, so each thread
+of a threaded server (e.g. `gunicorn --worker-class gthread`) connects on first use and
+reuses its own backend afterwards. Each backend runs its queries on its thread's pooled
+read-only connection (see `data.connections`) instead of opening a new connection for
+every query. `reset_connections` makes every thread reconnect, e.g. after forking.
+Connections see the rows written to their database file, but keep reading the file
+they opened once it is replaced (e.g. by a new copy synced to the shared drive),
+`reset_replaced_connections` makes every thread reconnect only in that case.
 
 Variables:
-    hawaii_weather_data
-    playoff_teams
+    HAWAII_DB_PATH
+    PLAYOFF_TEAMS_PATH
+    BATCH_SIZE
 Functions:
+    connect_sqlite
+    reset_connections
+    reset_replaced_connections
+    get_table
+    iter_batches
+    materialize
+    load_table
+    load_playoff_teams
     load_sqlite_data
 """
 
 from __future__ import annotations
 
+import logging
+import os
+import threading
+from collections.abc import Iterator
+from functools import cache, partial
 from typing import TYPE_CHECKING
 
 import ibis
 import pandas as pd
+import sqlalchemy as sa
 
+from data.connections import checkout, reset_pool
+from data.dtypes import compact_dtypes, concat_compacted
 from utils.constants import DATA_DIR, GOOGLE_DRIVE_DIR
+from utils.profiling import profile_phase
 
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from ibis.backends.base import BaseBackend
+    from ibis.expr.types import Table
     from pandas import DataFrame
 
+logger = logging.getLogger(__name__)
+
+# Prefer the shared google drive copy of the database when it is available.
+HAWAII_DB_PATH = (GOOGLE_DRIVE_DIR or DATA_DIR) / "hawaii.sqlite"
+PLAYOFF_TEAMS_PATH = DATA_DIR / "playoff_teams_df.csv"
+# Number of rows fetched from the database at a time when streaming query results.
+BATCH_SIZE = 50_000
+
+
+# Backends of the current thread by database path, see `connect_sqlite`.
+_backends = threading.local()
+# Incremented by `reset_connections`, backends of an earlier generation are discarded.
+_generation = 0
+# Inode of each database when the first backend of the current generation connected to
+# it, see `reset_replaced_connections`.
+_inodes: dict[Path, int] = {}
+_inodes_lock = threading.Lock()
+
+
+@profile_phase("connect_sqlite")
+def _connect(path: Path) -> BaseBackend:
+    """Create an ibis backend querying the current thread's pooled connection."""
+    backend = ibis.sqlite.connect(path)
+    engine = backend.con
+    # The engine opens (and closes) a connection for every query by default, hand it
+    # the pooled connection instead, checked with a ping whenever the engine uses it.
+    pool = sa.pool.StaticPool(
+        partial(checkout, path), pre_ping=True, dialect=engine.dialect
+    )
+    # Keep the setup ibis and sqlalchemy run on new connections (e.g. ibis' UDFs).
+    for listener in engine.pool.dispatch.connect:
+        sa.event.listen(pool, "connect", listener)
+    engine.pool = pool
+    return backend
+
+
+def connect_sqlite(path: Path = HAWAII_DB_PATH) -> BaseBackend:
+    """Connect to a sqlite database, reusing the current thread's connection.
+
+    Each thread (of each process) gets its own backend, created on its first call and
+    reused by its subsequent calls until `reset_connections` is called.
+
+    Parameters
+    ----------
+    path : Path, optional
+        pathlib Path to sqlite db, by default `HAWAII_DB_PATH`.
+
+    Returns
+    -------
+    BaseBackend
+        ibis sqlite backend connected to the database.
+    """
+    # Backends inherited from the parent of a forked process are not reused either.
+    key = (os.getpid(), _generation)
+    if getattr(_backends, "key", None) != key:
+        _backends.key, _backends.by_path = key, {}
+    backend = _backends.by_path.get(path)
+    if backend is None:
+        with _inodes_lock:
+            _inodes.setdefault(path, path.stat().st_ino)
+        backend = _backends.by_path[path] = _connect(path)
+    return backend
+
+
+def reset_connections() -> None:
+    """Discard the backends and connections of every thread.
+
+    Each thread reconnects on its next use.
+    """
+    global _generation
+    with _inodes_lock:
+        _generation += 1
+        _inodes.clear()
+    reset_pool()
+
+
+def reset_replaced_connections(path: Path = HAWAII_DB_PATH) -> None:
+    """Discard the backends and connections of every thread if a database was replaced.
+
+    The reset is global rather than limited to the calling thread: once the file is
+    replaced, the connections of every thread still read the previous file. While the
+    file is only modified in place (e.g. rows are appended), the connections see the
+    changes and are kept.
+
+    Parameters
+    ----------
+    path : Path, optional
+        pathlib Path to sqlite db, by default `HAWAII_DB_PATH`.
+    """
+    with _inodes_lock:
+        inode = _inodes.get(path)
+    if inode is not None and path.stat().st_ino != inode:
+        logger.info("%s was replaced, reconnecting.", path.name)
+        reset_connections()
+
+
+def get_table(name: str, path: Path = HAWAII_DB_PATH) -> Table:
+    """Return a deferred ibis table expression for a table in a sqlite database.
+
+    No data is read until the expression (or an expression built on top of it) is
+    executed.
+
+    Parameters
+    ----------
+    name : str
+        Name of the table.
+    path : Path, optional
+        pathlib Path to sqlite db, by default `HAWAII_DB_PATH`.
+
+    Returns
+    -------
+    Table
+        ibis table expression.
+    """
+    return connect_sqlite(path).table(name=name)
+
+
+def iter_batches(
+    expr: Table, batch_size: int = BATCH_SIZE, path: Path = HAWAII_DB_PATH
+) -> Iterator[DataFrame]:
+    """Execute a table expression, yielding the result in batches of rows.
+
+    Rows are fetched from the database cursor `batch_size` at a time, only one batch is
+    held in memory by this function. Each batch has the same columns and dtypes as the
+    result of `expr.execute()`.
+
+    Parameters
+    ----------
+    expr : Table
+        ibis table expression built on a table from `get_table`.
+    batch_size : int, optional
+        Maximum number of rows in each batch, by default `BATCH_SIZE`.
+    path : Path, optional
+        pathlib Path to the sqlite db `expr` queries, by default `HAWAII_DB_PATH`.
+
+    Yields
+    ------
+    DataFrame
+        Batch of rows of the result.
+    """
+    backend = connect_sqlite(path)
+    schema = expr.schema()
+    with backend.con.connect() as connection:
+        result = connection.execute(backend.compile(expr))
+        while rows := result.fetchmany(batch_size):
+            batch = pd.DataFrame.from_records(
+                rows, columns=schema.names, coerce_float=True
+            )
+            yield schema.apply_to(batch)
+
+
+def materialize(expr: Table, name: str, path: Path = HAWAII_DB_PATH) -> DataFrame:
+    """Materialize a table expression as a DataFrame with compacted dtypes.
+
+    Rows are fetched in batches (see `iter_batches`) and each batch is converted to
+    compact dtypes as it arrives, e.g. ISO date strings to `datetime64` and repeated
+    strings to categoricals (see `data.dtypes.compact_dtypes`). Only one batch of raw
+    rows is held in memory at a time, the compacted batches are held until they are
+    concatenated, so the peak is about twice the size of the compacted result.
+
+    Parameters
+    ----------
+    expr : Table
+        ibis table expression built on a table from `get_table`.
+    name : str
+        Name of the result in log messages.
+    path : Path, optional
+        pathlib Path to the sqlite db `expr` queries, by default `HAWAII_DB_PATH`.
+
+    Returns
+    -------
+    DataFrame
+        Result of the expression with compacted dtypes.
+    """
+    loaded_bytes = 0
+    batches = []
+    for batch in iter_batches(expr, path=path):
+        loaded_bytes += batch.memory_usage(index=False, deep=True).sum()
+        batches.append(compact_dtypes(batch, log=False))
+    if not batches:
+        empty = expr.schema().apply_to(pd.DataFrame(columns=expr.columns))
+        return compact_dtypes(empty, name=name)
+
+    # Compact again the columns whose dtypes differ between batches (e.g. strings
+    # repeated across the table but not within a batch).
+    df = compact_dtypes(concat_compacted(batches), log=False)
+    logger.info(
+        "Compacted %s from %.2f MB to %.2f MB.",
+        name,
+        loaded_bytes / 1024**2,
+        df.memory_usage(index=False, deep=True).sum() / 1024**2,
+    )
+    return df
+
+
+@cache
+def load_table(
+    name: str,
+    columns: tuple[str, ...] | None = None,
+    path: Path = HAWAII_DB_PATH,
+) -> DataFrame:
+    """Materialize a table from a sqlite database as a DataFrame.
+
+    Only the requested columns are read, in batches and with compacted dtypes (see
+    `materialize`). The result is cached so that the table is only read on the first
+    request, callers must therefore not modify the returned DataFrame in place.
+
+    Parameters
+    ----------
+    name : str
+        Name of the table.
+    columns : tuple[str, ...] | None, optional
+        Columns to read, by default None (all columns).
+    path : Path, optional
+        pathlib Path to sqlite db, by default `HAWAII_DB_PATH`.
+
+    Returns
+    -------
+    DataFrame
+        Requested columns of the table with compacted dtypes.
+    """
+    with profile_phase(f"load_table:{name}"):
+        table = get_table(name=name, path=path)
+        if columns is not None:
+            table = table.select(list(columns))
+        return materialize(table, name=name, path=path)
+
+
+@cache
+def load_playoff_teams(columns: tuple[str, ...] | None = None) -> DataFrame:
+    """Read the playoff teams csv file, caching the result.
+
+    Parameters
+    ----------
+    columns : tuple[str, ...] | None, optional
+        Columns to read, by default None (all columns).
+
+    Returns
+    -------
+    DataFrame
+        Playoff teams data.
+    """
+    with profile_phase("load_playoff_teams"):
+        return pd.read_csv(
+            filepath_or_buffer=PLAYOFF_TEAMS_PATH,
+            usecols=list(columns) if columns is not None else None,
+        )
+
 
 def load_sqlite_data(path: Path) -> dict[str, DataFrame]:
     """Read sqlite database and return a dict of DataFrames.
 
     Returns all tables within a sqlite database as DataFrames without any processing.
+    This reads every table in full, prefer `get_table` or `load_table` within the app.
 
     Parameters
     ----------
@@ -40,18 +326,5 @@ def load_sqlite_data(path: Path) -> dict[str, DataFrame]:
     dict[str, DataFrame]
         Keys are the table names and values are the associated DataFrames.
     """
-    # Connect to the db.
-    db = ibis.sqlite.connect(path)
-    # Collect table names.
-    tables_names = db.list_tables()
-    # `db.table()` returns an ibis `Table` instance and `execute()` converts it into a
-    # DataFrame.
-    return {name: db.table(name=name).execute() for name in tables_names}
-
-
-if GOOGLE_DRIVE_DIR:
-    hawaii_weather_data = load_sqlite_data(path=GOOGLE_DRIVE_DIR / "hawaii.sqlite")
-else:
-    hawaii_weather_data = load_sqlite_data(path=DATA_DIR / "hawaii.sqlite")
-
-playoff_teams = pd.read_csv(filepath_or_buffer=DATA_DIR / "playoff_teams_df.csv")
+    db = connect_sqlite(path)
+    return {name: load_table(name=name, path=path) for name in db.list_tables()}
@@ -3,77 +3,295 @@
 Transformations are applied to the relevant DataFrames to prepare them for usage in
 figures and/or tables.
 
+The transformed measurement dataset holds the mean precipitation and temperature of
+each day of June and December, either across all stations or for a single station. It
+is derived from the climatology cube (see `data.climatology`), which is kept up to date
+incrementally as rows are added to the source database, and recomputed whenever the
+cube changes.
+
+The measurement dataset holds the rows of the measurement table along with calendar
+features (integer year, month, day and day of year) parsed once from the `date` column,
+so that transforms can filter and group on integer codes rather than on dates or
+strings. It is cached with its calendar features and updated with new rows in the same
+way as the climatology cube. The daily series of each station plotted on the dashboard
+are derived from it.
+
 Variables:
-    transformed_measurement
+    MONTH_ABBREVIATIONS
+    MEASUREMENT_VERSION
+    CALENDAR_FEATURES
     sample_data
 Functions:
+    add_calendar_features
+    get_measurement
     transform_measurement
+    get_transformed_measurement
+    get_daily_measurement
+    get_stations
 """
 
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any
+
 import pandas as pd
-from pandas import DataFrame
 
-from data.load_data import hawaii_weather_data
+from data.cache import load_or_build
+from data.climatology import get_cube, get_station_cube, query_cube
+from data.dtypes import compact_dtypes
+from data.load_data import (
+    HAWAII_DB_PATH,
+    get_table,
+    load_table,
+    materialize,
+    reset_replaced_connections,
+)
+from data.refresh import rows_changed, source_changed
+from utils.profiling import profile_phase
 
-# Set the `measurement` DataFrame from the Hawaii data dictionary.
-measurement = hawaii_weather_data["measurement"]
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
+logger = logging.getLogger(__name__)
 
-def transform_measurement(input_df: DataFrame) -> DataFrame:
-    """Transform the input DataFrame for use in figures and tables.
+# Month number to abbreviation for the months kept by `transform_measurement`.
+MONTH_ABBREVIATIONS = {6: "Jun", 12: "Dec"}
+# Increment whenever `add_calendar_features` changes so that cached results are rebuilt.
+MEASUREMENT_VERSION = 1
+# Calendar features added by `add_calendar_features` and their dtypes.
+CALENDAR_FEATURES = {
+    "year": "int16",
+    "month": "int8",
+    "day": "int8",
+    "day_of_year": "int16",
+}
 
-    Month and day of the month columns are created from the `date` column. Data is
-    filtered to June and December only. Data is then grouped by levels `month` and
-    `day`. The mean is calculated for each day across all years. The dataset is
-    restacked in a logical order (June observations before December) and the columns
-    renamed.
+# Transformed dataset of all stations (key None) and of each station derived from the
+# latest version of the climatology cube, see `get_transformed_measurement`.
+_transformed: dict[str | None, DataFrame] = {}
+_transformed_lock = threading.Lock()
+# Daily series of all stations (key None) and of each station derived from the latest
+# version of the measurement dataset, see `get_daily_measurement`.
+_daily: dict[str | None, DataFrame] = {}
+_daily_lock = threading.Lock()
+# Rows of the measurement table with calendar features and the version of the dataset
+# loaded at startup, see `get_measurement`.
+_measurement_rows: dict[str, Any] = {}
+_measurement_rows_lock = threading.Lock()
+
+
+def add_calendar_features(df: DataFrame, column: str = "date") -> DataFrame:
+    """Add integer calendar features of a date column.
+
+    The date column is parsed (once) into `datetime64` unless it already is, then the
+    year, month, day of the month and day of the year are extracted as small integers.
 
     Parameters
     ----------
-    input_df : DataFrame
-        Dataset of Hawaii temperature and precipitation observations.
+    df : DataFrame
+        Data with a date column holding `datetime64` values or ISO date strings.
+    column : str, optional
+        Name of the date column, by default "date".
 
     Returns
     -------
     DataFrame
-        Transformed dataset ready for figure and table creation.
+        New DataFrame with the date column as `datetime64` and the `CALENDAR_FEATURES`
+        columns added.
     """
-    # Extract month and day of month data from `date` column.
-    df = input_df.copy()
-    df["month"] = pd.DatetimeIndex(df["date"]).month_name()
-    df["day"] = pd.DatetimeIndex(df["date"]).day
-    df.drop(["id", "station", "date"], axis=1, inplace=True)
+    dates = df[column]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="%Y-%m-%d")
 
-    # Filter for June and December data.
-    df_jun_dec = df.loc[(df["month"] == "June") | (df["month"] == "December")]
+    features = {
+        "year": dates.dt.year,
+        "month": dates.dt.month,
+        "day": dates.dt.day,
+        "day_of_year": dates.dt.dayofyear,
+    }
+    return df.assign(
+        **{column: dates},
+        **{
+            name: values.astype(CALENDAR_FEATURES[name])
+            for name, values in features.items()
+        },
+    )
 
-    # Replace month name with abbreviation.
-    df_jun_dec = df_jun_dec.replace({"month": {"June": "Jun", "December": "Dec"}})
 
-    # Group by month and day of month, calculate mean.
-    df_jun_dec_avg = df_jun_dec.groupby(["month", "day"], as_index=False)[
-        ["prcp", "tobs"]
-    ].mean()
+def _read_measurement(after_id: int | None = None) -> DataFrame:
+    """Read the rows of the measurement table with calendar features."""
+    table = get_table(name="measurement")
+    if after_id is not None:
+        table = table.filter(table.id > after_id)
+    return add_calendar_features(materialize(table, name="measurement"))
+
+
+def _refresh_measurement_rows() -> None:
+    """Append the rows added to the measurement table since the last update."""
+    # The database file may have been replaced rather than modified, reconnect so that
+    # the current file is read.
+    reset_replaced_connections(HAWAII_DB_PATH)
+    rows = _measurement_rows["rows"]
+    high_water_mark = int(rows.id.max()) if len(rows) else 0
+
+    if rows_changed(get_table(name="measurement"), high_water_mark, len(rows)):
+        logger.info("Rows were removed from measurement, reloading it.")
+        rows = _read_measurement()
+    else:
+        new_rows = _read_measurement(after_id=high_water_mark)
+        if new_rows.empty:
+            return
+        # Categoricals with different categories are concatenated as strings, compact
+        # them again.
+        rows = compact_dtypes(
+            pd.concat([rows, new_rows], ignore_index=True), name="measurement"
+        )
+
+    base_version = _measurement_rows["base_version"]
+    rows.attrs["version"] = f"{base_version}+{rows.id.max()}-{len(rows)}"
+    _measurement_rows["rows"] = rows
 
-    # Stack June data above December data.
-    df_jun_dec_avg = df_jun_dec_avg.sort_values(
-        by=["month", "day"], ascending=[False, True]
-    )
 
-    # Rename each column as titles.
-    transformed_df = df_jun_dec_avg.rename(
-        columns={
-            "month": "Month",
-            "day": "Day",
-            "prcp": "Precipitation",
-            "tobs": "Temperature",
+def get_measurement() -> DataFrame:
+    """Return the rows of the measurement table with calendar features.
+
+    The dataset is memory-mapped from the on-disk cache and is only rebuilt when the
+    database or `add_calendar_features` changes. Subsequent calls check whether the
+    database changed (at most every few seconds, see `data.refresh`) and append the new
+    rows. The version of the dataset is stored in `attrs["version"]`.
+
+    Returns
+    -------
+    DataFrame
+        Columns `id`, `station` (categorical), `date` (`datetime64`), `prcp` and `tobs`
+        followed by the `CALENDAR_FEATURES`.
+    """
+    with _measurement_rows_lock:
+        if not _measurement_rows:
+            # Record the state of the database before reading it so that changes made
+            # while reading are picked up by the next check.
+            source_changed(HAWAII_DB_PATH, consumer="measurement")
+            rows = load_or_build(
+                name="measurement",
+                build=_read_measurement,
+                source=HAWAII_DB_PATH,
+                version=MEASUREMENT_VERSION,
+            )
+            _measurement_rows.update(rows=rows, base_version=rows.attrs["version"])
+        elif source_changed(HAWAII_DB_PATH, consumer="measurement"):
+            with profile_phase("refresh_measurement"):
+                _refresh_measurement_rows()
+        return _measurement_rows["rows"]
+
+
+def transform_measurement(cube: DataFrame) -> DataFrame:
+    """Transform the climatology cube for use in figures and tables.
+
+    The mean precipitation and temperature are calculated for each day of June and
+    December across all years and stations. The dataset is ordered logically (June
+    observations before December) and the columns renamed.
+
+    Parameters
+    ----------
+    cube : DataFrame
+        Output of `data.climatology.aggregate_cube`.
+
+    Returns
+    -------
+    DataFrame
+        Transformed dataset ready for figure and table creation.
+    """
+    means = query_cube(cube, months=list(MONTH_ABBREVIATIONS))
+    transformed = pd.DataFrame(
+        {
+            "Month": means.month.map(MONTH_ABBREVIATIONS),
+            "Day": means.day.astype("int64"),
+            "Precipitation": means.prcp_mean,
+            "Temperature": means.tobs_mean,
         }
     )
 
-    return transformed_df
+    # Stack June data above December data.
+    return transformed.sort_values(
+        ["Month", "Day"], ascending=[False, True], ignore_index=True
+    )
+
+
+def get_transformed_measurement(station: str | None = None) -> DataFrame:
+    """Return the transformed measurement dataset of all stations or of one station.
+
+    The dataset is derived from the climatology cube (see `data.climatology.get_cube`),
+    or from the station's block of the cube (see `data.climatology.get_station_cube`),
+    and only recomputed when the version of the cube changes, which is stored in
+    `attrs["version"]`.
+
+    Parameters
+    ----------
+    station : str | None, optional
+        Id of the station, by default None (all stations).
+
+    Returns
+    -------
+    DataFrame
+        Mean precipitation and temperature of each day of June and December.
+    """
+    cube = get_cube() if station is None else get_station_cube(station)
+    with _transformed_lock:
+        transformed = _transformed.get(station)
+        if transformed is None or transformed.attrs["version"] != cube.attrs["version"]:
+            transformed = transform_measurement(cube)
+            # Figures are rebuilt when the version of their data changes.
+            transformed.attrs["version"] = cube.attrs["version"]
+            _transformed[station] = transformed
+        return transformed
+
+
+def get_daily_measurement(station: str | None = None) -> DataFrame:
+    """Return the daily precipitation and temperature of one or all stations.
 
+    The series is derived from the measurement dataset (see `get_measurement`) and only
+    recomputed when the version of the dataset changes, which is stored in
+    `attrs["version"]`.
+
+    Parameters
+    ----------
+    station : str | None, optional
+        Id of the station, by default None (the mean of all stations for each date).
+
+    Returns
+    -------
+    DataFrame
+        Columns `date` (`datetime64`), `prcp` and `tobs`, one row per date with
+        observations, sorted by date.
+    """
+    rows = get_measurement()
+    with _daily_lock:
+        daily = _daily.get(station)
+        if daily is None or daily.attrs["version"] != rows.attrs["version"]:
+            if station is None:
+                daily = rows.groupby("date", as_index=False)[["prcp", "tobs"]].mean()
+            else:
+                daily = rows.loc[rows.station == station, ["date", "prcp", "tobs"]]
+                daily = daily.sort_values("date", ignore_index=True)
+            daily.attrs["version"] = rows.attrs["version"]
+            _daily[station] = daily
+        return daily
+
+
+def get_stations() -> DataFrame:
+    """Return the id and name of each station, ordered by name.
+
+    Returns
+    -------
+    DataFrame
+        Columns `station` and `name`.
+    """
+    return load_table(name="station", columns=("station", "name")).sort_values(
+        "name", ignore_index=True
+    )
 
-transformed_measurement = transform_measurement(measurement)
 
 # Sample data from plotly.
 sample_data = pd.DataFrame(
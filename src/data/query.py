@@ -0,0 +1,192 @@
+"""Translate DataTable page, sort and filter state into ibis queries.
+
+A DataTable with `page_action`, `sort_action` and `filter_action` set to "custom"
+leaves paging, sorting and filtering to callbacks. The functions here turn that state
+into an ibis query against a table expression so that only the rows of the visible page
+are materialized, regardless of the size of the table.
+
+Variables:
+    FILTER_OPERATORS
+Functions:
+    dataframe_table
+    parse_filter_query
+    query_page
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+from typing import TYPE_CHECKING
+
+import ibis
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from ibis.expr.types import BooleanValue, Column, Table
+    from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+# Maps each DataTable filter operator (both its symbol and its name) to a function
+# building the ibis predicate for a column and a value.
+FILTER_OPERATORS: dict[str, Callable[[Column, str | float], BooleanValue]] = {
+    "=": lambda col, value: col == value,
+    "eq": lambda col, value: col == value,
+    "!=": lambda col, value: col != value,
+    "ne": lambda col, value: col != value,
+    "<": lambda col, value: col < value,
+    "lt": lambda col, value: col < value,
+    "<=": lambda col, value: col <= value,
+    "le": lambda col, value: col <= value,
+    ">": lambda col, value: col > value,
+    "gt": lambda col, value: col > value,
+    ">=": lambda col, value: col >= value,
+    "ge": lambda col, value: col >= value,
+    "contains": lambda col, value: col.cast("string").contains(str(value)),
+    "datestartswith": lambda col, value: col.cast("string").startswith(str(value)),
+}
+
+# Matches a single filter expression such as `{Day} >= 10` or `{Month} contains "Jun"`.
+_FILTER_PATTERN = re.compile(
+    r"^\s*\{(?P<column>[^}]+)\}\s+(?P<operator>\S+)\s+(?P<value>.+?)\s*$"
+)
+# Matches a value wrapped in any of the quote characters the DataTable uses.
+_QUOTED_PATTERN = re.compile(r"^([\"'`])(?P<value>.*)\1$")
+
+
+def dataframe_table(df: DataFrame, name: str) -> Table:
+    """Wrap a DataFrame in an ibis table expression backed by the pandas backend.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Data to query.
+    name : str
+        Name of the table.
+
+    Returns
+    -------
+    Table
+        ibis table expression over `df`.
+    """
+    return ibis.pandas.connect({name: df}).table(name)
+
+
+def _unquote(value: str) -> str:
+    """Remove the quotes around a filter value, if any."""
+    if quoted := _QUOTED_PATTERN.match(value):
+        return quoted.group("value")
+    return value
+
+
+def _parse_value(value: str) -> str | float:
+    """Parse a filter value into a string (if quoted or not numeric) or a number."""
+    if _QUOTED_PATTERN.match(value):
+        return _unquote(value)
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def parse_filter_query(table: Table, filter_query: str) -> list[BooleanValue]:
+    """Parse a DataTable `filter_query` string into ibis predicates.
+
+    Expressions joined by `&&` are each parsed into a predicate. Operators may carry
+    the DataTable's case prefix (`s` for case sensitive, `i` for case insensitive).
+    Expressions that reference unknown columns or operators, or that compare a numeric
+    column with text, are skipped since the user may still be typing them. Values are
+    compared as text, as typed, with string columns and by the `contains` and
+    `datestartswith` operators (e.g. `{Day} contains 1` matches days 1, 10 to 19, ...).
+
+    Parameters
+    ----------
+    table : Table
+        ibis table expression being filtered.
+    filter_query : str
+        `filter_query` property of the DataTable.
+
+    Returns
+    -------
+    list[BooleanValue]
+        Predicates to filter `table` with.
+    """
+    predicates = []
+    for part in filter_query.split(" && "):
+        if not (match := _FILTER_PATTERN.match(part)):
+            continue
+
+        column_id, operator = match.group("column"), match.group("operator")
+        value = _parse_value(match.group("value"))
+        case_insensitive = False
+        if operator not in FILTER_OPERATORS and operator[1:] in FILTER_OPERATORS:
+            case_insensitive = operator[0] == "i"
+            operator = operator[1:]
+
+        if column_id not in table.columns or operator not in FILTER_OPERATORS:
+            logger.debug(f"Skipping unsupported filter expression: '{part}'")
+            continue
+
+        column = table[column_id]
+        if column.type().is_string() or operator in ("contains", "datestartswith"):
+            value = _unquote(match.group("value"))
+        if isinstance(value, str):
+            if column.type().is_numeric() and operator not in (
+                "contains",
+                "datestartswith",
+            ):
+                logger.debug(f"Skipping text comparison on numeric column: '{part}'")
+                continue
+            if case_insensitive:
+                column, value = column.cast("string").lower(), value.lower()
+        predicates.append(FILTER_OPERATORS[operator](column, value))
+    return predicates
+
+
+def query_page(
+    table: Table,
+    page_current: int,
+    page_size: int,
+    sort_by: list[dict[str, str]] | None = None,
+    filter_query: str = "",
+) -> tuple[list[dict], int]:
+    """Filter, sort and page a table, materializing only the rows of one page.
+
+    Parameters
+    ----------
+    table : Table
+        ibis table expression to query.
+    page_current : int
+        Index of the page to return (zero based).
+    page_size : int
+        Number of rows per page.
+    sort_by : list[dict[str, str]] | None, optional
+        `sort_by` property of the DataTable, by default None.
+    filter_query : str, optional
+        `filter_query` property of the DataTable, by default "".
+
+    Returns
+    -------
+    tuple[list[dict], int]
+        Records of the requested page and the total number of pages.
+    """
+    if predicates := parse_filter_query(table=table, filter_query=filter_query):
+        table = table.filter(predicates)
+
+    page_count = max(1, math.ceil(table.count().execute() / page_size))
+
+    sort_keys = [
+        ibis.desc(sort["column_id"])
+        if sort["direction"] == "desc"
+        else ibis.asc(sort["column_id"])
+        for sort in sort_by or []
+        if sort["column_id"] in table.columns
+    ]
+    if sort_keys:
+        table = table.order_by(sort_keys)
+
+    page = table.limit(page_size, offset=page_current * page_size).execute()
+    return page.to_dict(orient="records"), page_count
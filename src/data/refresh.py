@@ -0,0 +1,121 @@
+"""Detect changes to source files of the app's datasets.
+
+The source database can be updated while the app is running (e.g. the shared google
+drive copy of `hawaii.sqlite`). Rather than watching the file from a background thread,
+the file is checked when its data is accessed, at most once every
+`REFRESH_INTERVAL_S` seconds, so that the check costs nothing on most requests.
+
+A file is considered changed when its inode, modification time or size changes, or
+those of its write-ahead log (`-wal` file) for sqlite databases in WAL mode, whose
+writes only reach the database file itself at checkpoints.
+
+Datasets built from a database table are updated with the rows added since the last
+update, `rows_changed` detects when rows were removed instead so that they are rebuilt.
+
+Environment Variables:
+    DATA_REFRESH_INTERVAL: Minimum number of seconds between checks of a source file,
+        by default 5. Set to 0 to check on every access.
+
+Variables:
+    REFRESH_INTERVAL_S
+Functions:
+    stat_source
+    source_changed
+    rows_changed
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from ibis.expr.types import Table
+
+REFRESH_INTERVAL_S = float(os.environ.get("DATA_REFRESH_INTERVAL", "5"))
+
+# Maps each source path and consumer to the time the consumer last checked the path and
+# its stat at that time.
+_last_checked: dict[tuple[Path, str], tuple[float, tuple[int, ...]]] = {}
+_lock = threading.Lock()
+
+
+def stat_source(path: Path) -> tuple[int, ...]:
+    """Return the inode, modification time and size of a file and of its `-wal` file.
+
+    Parameters
+    ----------
+    path : Path
+        pathlib Path to the file.
+
+    Returns
+    -------
+    tuple[int, ...]
+        Inode, modification time (ns) and size of the file, followed by those of the
+        write-ahead log when there is one.
+    """
+    stats = []
+    for file_path in (path, path.with_name(f"{path.name}-wal")):
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            continue
+        stats.extend((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+    return tuple(stats)
+
+
+def source_changed(path: Path, consumer: str) -> bool:
+    """Check whether a source file changed since the consumer's previous check.
+
+    Each consumer (e.g. each dataset built from the file) is tracked separately, so
+    that every consumer sees each change. The first check of a file records its state
+    and returns False, make it before reading the file so that changes made while
+    reading are picked up by the next check. Checks made within `REFRESH_INTERVAL_S`
+    seconds of the previous one return False without touching the file.
+
+    Parameters
+    ----------
+    path : Path
+        pathlib Path to the source file.
+    consumer : str
+        Name of the consumer of the file.
+
+    Returns
+    -------
+    bool
+        Whether the file changed.
+    """
+    now = time.monotonic()
+    with _lock:
+        previous = _last_checked.get((path, consumer))
+        if previous is not None and now - previous[0] < REFRESH_INTERVAL_S:
+            return False
+
+        stat = stat_source(path)
+        _last_checked[(path, consumer)] = (now, stat)
+        return previous is not None and previous[1] != stat
+
+
+def rows_changed(table: Table, high_water_mark: int, known_rows: int) -> bool:
+    """Check whether rows up to the high-water mark were added or removed.
+
+    Parameters
+    ----------
+    table : Table
+        ibis table expression with an increasing integer `id` column.
+    high_water_mark : int
+        Largest `id` included in the dataset built from the table.
+    known_rows : int
+        Number of rows of the table included in the dataset.
+
+    Returns
+    -------
+    bool
+        Whether the number of rows with an `id` up to `high_water_mark` differs from
+        `known_rows`.
+    """
+    return table.filter(table.id <= high_water_mark).count().execute() != known_rows
@@ -0,0 +1,204 @@
+"""Select and downsample daily time series for plotting.
+
+A daily series spanning years holds far more points than a chart has pixels, sending
+all of them makes both the response and the browser's rendering slow. Series are
+instead reduced on the server to about one point per pixel of the chart:
+
+- `lttb`: Largest-Triangle-Three-Buckets, keeps the points that preserve the visual
+  shape of the line. Suited to smooth series such as temperature.
+- `minmax`: keeps the smallest and the largest value of each bucket, so that no spike
+  is lost. Suited to spiky series such as precipitation.
+
+Both return the positions of the kept points, the selected rows keep their original
+values. Series are expected to be sorted by date, so that the rows of a date range are
+found by binary search (`slice_dates`) rather than by filtering every row.
+
+Variables:
+    DOWNSAMPLERS
+Functions:
+    lttb
+    minmax
+    downsample
+    slice_dates
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from pandas import DataFrame
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Downsample a series with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. The points in between are split into
+    `n_out - 2` buckets and, for each bucket, the point forming the largest triangle
+    with the previously kept point and the average of the next bucket is kept.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Increasing numeric x values.
+    y : np.ndarray
+        y values without NaN, the same length as `x`.
+    n_out : int
+        Number of points to keep.
+
+    Returns
+    -------
+    np.ndarray
+        Increasing positions of the kept points, all positions when the series has no
+        more than `n_out` points (or `n_out` is below 3).
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    # Bucket `i` holds the points from `edges[i]` up to `edges[i + 1]`, the last point
+    # forms the final bucket on its own.
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.int64), n)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end, next_end = edges[i], edges[i + 1], edges[i + 2]
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        # Twice the area of the triangles formed with each point of the bucket.
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Downsample a series to the smallest and largest value of each bucket.
+
+    The points are split into `n_out // 2` buckets of consecutive points and the
+    positions of the minimum and the maximum of each bucket are kept.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Increasing x values (unused, accepted for the same signature as `lttb`).
+    y : np.ndarray
+        y values without NaN.
+    n_out : int
+        Maximum number of points to keep.
+
+    Returns
+    -------
+    np.ndarray
+        Increasing positions of the kept points, all positions when the series has no
+        more than `n_out` points (or `n_out` is below 2).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    buckets = np.repeat(
+        np.arange(n_out // 2), np.diff(np.linspace(0, n, n_out // 2 + 1).astype(int))
+    )
+    # Within each bucket, points are ordered by value: the first of each bucket is its
+    # minimum and the last its maximum.
+    order = np.lexsort((y, buckets))
+    starts = np.searchsorted(buckets[order], np.arange(n_out // 2))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+# Maps the name of each downsampling method to its function.
+DOWNSAMPLERS: dict[str, Callable[[np.ndarray, np.ndarray, int], np.ndarray]] = {
+    "lttb": lttb,
+    "minmax": minmax,
+}
+
+
+def downsample(
+    df: DataFrame, x: str, y: str, n_out: int, method: str = "lttb"
+) -> DataFrame:
+    """Downsample a column of a DataFrame for plotting.
+
+    Rows where `y` is missing are dropped before downsampling.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Data sorted by `x`.
+    x : str
+        Name of the x column, numeric or `datetime64`.
+    y : str
+        Name of the column to downsample.
+    n_out : int
+        Maximum number of points to keep, e.g. the width of the chart in pixels.
+    method : str, optional
+        Key of `DOWNSAMPLERS`, by default "lttb".
+
+    Returns
+    -------
+    DataFrame
+        Columns `x` and `y` of the kept rows.
+
+    Raises
+    ------
+    ValueError
+        If `method` is not a key of `DOWNSAMPLERS`.
+    """
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown method {method!r}, use any of {list(DOWNSAMPLERS)}.")
+
+    valid = df.loc[df[y].notna(), [x, y]]
+    x_values = valid[x].to_numpy()
+    if np.issubdtype(x_values.dtype, np.datetime64):
+        x_values = x_values.view(np.int64)
+    kept = DOWNSAMPLERS[method](x_values, valid[y].to_numpy(), n_out)
+    return valid.iloc[kept]
+
+
+def slice_dates(
+    df: DataFrame,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    column: str = "date",
+) -> DataFrame:
+    """Return the rows of a date range, found by binary search.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Data sorted by `column`.
+    start : str | pd.Timestamp | None, optional
+        First date of the range (inclusive), by default None (from the first row).
+    end : str | pd.Timestamp | None, optional
+        Last date of the range (inclusive), by default None (up to the last row).
+    column : str, optional
+        Name of the `datetime64` column, by default "date".
+
+    Returns
+    -------
+    DataFrame
+        Rows of `df` within the range.
+    """
+    dates = df[column].to_numpy()
+    first = (
+        0 if start is None else dates.searchsorted(pd.Timestamp(start).to_datetime64())
+    )
+    last = (
+        len(dates)
+        if end is None
+        else dates.searchsorted(pd.Timestamp(end).to_datetime64(), side="right")
+    )
+    return df.iloc[first:last]
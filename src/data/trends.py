@@ -0,0 +1,96 @@
+"""Long term climate trends of each station.
+
+For each station, the observations of each year are summarized (mean temperature and
+total precipitation) and a linear trend is fitted to the yearly mean temperatures. Only
+years with at least `MIN_DAYS_PER_YEAR` temperature observations are kept, so that
+partially observed years do not skew the trend.
+
+The analysis reads every row of the measurement table and can take a while on long
+records, it is run by a background callback (see `utils.background`) which reports
+progress after each station.
+
+Variables:
+    MIN_DAYS_PER_YEAR
+Functions:
+    station_trends
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from pandas import DataFrame
+
+# Years with fewer temperature observations are left out of a station's summary.
+MIN_DAYS_PER_YEAR = 300
+
+
+def station_trends(
+    rows: DataFrame,
+    stations: DataFrame,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> DataFrame:
+    """Summarize the yearly climate of each station and its temperature trend.
+
+    Parameters
+    ----------
+    rows : DataFrame
+        Output of `data.process_data.get_measurement`.
+    stations : DataFrame
+        Output of `data.process_data.get_stations`.
+    on_progress : Callable[[int, int], None] | None, optional
+        Called with the number of stations done and the number of stations after each
+        station, by default None.
+
+    Returns
+    -------
+    DataFrame
+        Columns `Station` (name), `Years` (number of years kept), `Temperature` (mean
+        of the yearly means), `Trend` (change of the yearly mean temperature per
+        decade, NaN with fewer than two years) and `Precipitation` (mean yearly total),
+        one row per station in the order of `stations`.
+    """
+    # Summarize the years of all stations in one pass over the rows.
+    yearly = rows.groupby(["station", "year"], observed=True).agg(
+        days=("tobs", "count"),
+        tobs=("tobs", "mean"),
+        prcp=("prcp", "sum"),
+    )
+    yearly = yearly[yearly.days >= MIN_DAYS_PER_YEAR]
+    years_by_station = {
+        station: station_years.droplevel("station")
+        for station, station_years in yearly.groupby(level="station", observed=True)
+    }
+
+    summaries = []
+    for done, (station, name) in enumerate(
+        zip(stations.station, stations.name), start=1
+    ):
+        station_years = years_by_station.get(station, yearly.iloc[:0])
+        trend = np.nan
+        if len(station_years) >= 2:
+            # Slope of the least squares line, per year.
+            trend = np.polyfit(
+                station_years.index.to_numpy(), station_years.tobs.to_numpy(), 1
+            )[0]
+        summaries.append(
+            {
+                "Station": name,
+                "Years": len(station_years),
+                "Temperature": station_years.tobs.mean(),
+                "Trend": trend * 10,
+                "Precipitation": station_years.prcp.mean(),
+            }
+        )
+        if on_progress is not None:
+            on_progress(done, len(stations))
+    return pd.DataFrame(
+        summaries,
+        columns=["Station", "Years", "Temperature", "Trend", "Precipitation"],
+    )
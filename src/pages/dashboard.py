@@ -1,23 +1,29 @@
 """Layout for the dashboard page.
 
-Arranges different dashboard elements on the dashboard page.
+Arranges different dashboard elements on the dashboard page. The layout only contains
+placeholders for the charts and the table, each of them is filled by its own callback
+once the page is mounted so that no data is loaded until the page is visited. A station
+selector above them narrows the temperature and precipitation charts, the table and the
+daily time series chart down to a single station. The station trends panel is only
+computed on request, in the background.
 
-Variables:
-    bar_chart_row
-    hawaii_line_chart_row
-    table_row
+Functions:
     layout
 """
 
-from dash import html, register_page
+from dash import dcc, html, register_page
 
-from components.figures import avg_precip_line_chart, avg_temp_line_chart, bar_chart
+from components.figures import create_graph_component
+from components.station_select import create_station_select
 from components.table import hawaii_climate_table
+from components.timeseries import create_timeseries_component
+from components.trends import create_trends_component
 from utils.constants import (
     DASHBOARD_ICON_DARK,
     DASHBOARD_ICON_LIGHT,
-    ID_DASHBOARD_ICON,
-    ID_DASHBOARD_LINK,
+    ID_FIGURE_BAR,
+    ID_FIGURE_PRECIP,
+    ID_FIGURE_TEMP,
 )
 
 # Needed for the app to see this module as a page. The `navbar` argument is included so
@@ -26,53 +32,78 @@ register_page(
     __name__,
     sidebar=True,
     order=2,
-    id_icon=ID_DASHBOARD_ICON,
-    id_link=ID_DASHBOARD_LINK,
     icon_light=DASHBOARD_ICON_LIGHT,
     icon_dark=DASHBOARD_ICON_DARK,
 )
 
-dashboard_grid = html.Div(
-    [
-        html.Div(
-            avg_temp_line_chart,
-            className="w-[512px] shadow-md lg:justify-self-end lg:max-xl:w-[420px]",
-        ),
-        html.Div(
-            bar_chart,
-            className="w-[512px] shadow-md lg:justify-self-start lg:max-xl:w-[420px]",
-        ),
-        html.Div(
-            avg_precip_line_chart,
-            className="w-[512px] lg:justify-self-end shadow-md lg:max-xl:w-[420px]",
-        ),
-        html.Div(
-            hawaii_climate_table,
-            className="""z-0 shadow-md w-[512px] lg:justify-self-start
-            lg:max-xl:w-[420px]""",
-        ),
-    ],
-    className="grid gap-4 lg:grid-cols-2 max-lg:justify-items-center",
-)
 
-# `layout` is required for Dash multi-page apps.
-layout = html.Div(
-    [
-        html.Div(
-            "Dashboard",
-            className="""py-1.5 flex justify-center bg-slate-700 text-emerald-50
-            font-semibold""",
-        ),
-        html.Div(
-            [
-                html.P(
-                    "This is the Dash Test App dashboard.",
-                    className="mb-4 text-inherit",
-                ),
-                dashboard_grid,
-            ],
-            className="p-4 text-slate-700 mb-8",
-        ),
-    ],
-    className="min-h-screen",
-)
+# `layout` is required for Dash multi-page apps. As a function it is called each time
+# the page is visited.
+def layout(**kwargs) -> html.Div:
+    """Create the dashboard page layout.
+
+    Parameters
+    ----------
+    **kwargs
+        Query string parameters of the page's url (unused).
+
+    Returns
+    -------
+    html.Div
+        Dashboard page with a station selector and placeholders for the charts, the
+        tables and the time series chart.
+    """
+    dashboard_grid = html.Div(
+        [
+            html.Div(
+                create_graph_component(ID_FIGURE_TEMP),
+                className="w-[512px] shadow-md lg:justify-self-end lg:max-xl:w-[420px]",
+            ),
+            html.Div(
+                create_graph_component(ID_FIGURE_BAR),
+                className="""w-[512px] shadow-md lg:justify-self-start
+                lg:max-xl:w-[420px]""",
+            ),
+            html.Div(
+                create_graph_component(ID_FIGURE_PRECIP),
+                className="w-[512px] lg:justify-self-end shadow-md lg:max-xl:w-[420px]",
+            ),
+            html.Div(
+                dcc.Loading(hawaii_climate_table, color="#475569"),
+                className="""z-0 shadow-md w-[512px] lg:justify-self-start
+                lg:max-xl:w-[420px]""",
+            ),
+            html.Div(
+                create_timeseries_component(),
+                className="w-[512px] lg:justify-self-end shadow-md lg:max-xl:w-[420px]",
+            ),
+            html.Div(
+                create_trends_component(),
+                className="""w-[512px] shadow-md lg:justify-self-start
+                lg:max-xl:w-[420px]""",
+            ),
+        ],
+        className="grid gap-4 lg:grid-cols-2 max-lg:justify-items-center",
+    )
+
+    return html.Div(
+        [
+            html.Div(
+                "Dashboard",
+                className="""py-1.5 flex justify-center bg-slate-700 text-emerald-50
+                font-semibold""",
+            ),
+            html.Div(
+                [
+                    html.P(
+                        "This is the Dash Test App dashboard.",
+                        className="mb-4 text-inherit",
+                    ),
+                    create_station_select(),
+                    dashboard_grid,
+                ],
+                className="p-4 text-slate-700 mb-8",
+            ),
+        ],
+        className="min-h-screen",
+    )
@@ -6,7 +6,7 @@ Variables:
 
 from dash import html, register_page
 
-from utils.constants import HOME_ICON_DARK, HOME_ICON_LIGHT, ID_HOME_ICON, ID_HOME_LINK
+from utils.constants import HOME_ICON_DARK, HOME_ICON_LIGHT
 
 # Needed for the app to see this module as a page.
 register_page(
@@ -14,8 +14,6 @@ register_page(
     path="/",
     sidebar=True,
     order=0,
-    id_icon=ID_HOME_ICON,
-    id_link=ID_HOME_LINK,
     icon_light=HOME_ICON_LIGHT,
     icon_dark=HOME_ICON_DARK,
 )
@@ -9,19 +9,12 @@ Variables:
 
 from dash import html, register_page
 
-from utils.constants import (
-    BACKGROUND_ICON_DARK,
-    BACKGROUND_ICON_LIGHT,
-    ID_QUARTO_ICON,
-    ID_QUARTO_LINK,
-)
+from utils.constants import BACKGROUND_ICON_DARK, BACKGROUND_ICON_LIGHT
 
 register_page(
     __name__,
     sidebar=True,
     order=3,
-    id_icon=ID_QUARTO_ICON,
-    id_link=ID_QUARTO_LINK,
     icon_light=BACKGROUND_ICON_LIGHT,
     icon_dark=BACKGROUND_ICON_DARK,
 )
@@ -0,0 +1,132 @@
+"""Run slow callbacks in the background, off the request path.
+
+Callbacks registered with `background_callback` run in a separate process managed by
+Dash's `DiskcacheManager`: the request that triggers the callback returns immediately
+and the browser polls for the progress and the result, so a slow computation does not
+tie up a server worker (or thread) while it runs. Jobs and their results are kept in a
+`diskcache` cache within the dataset cache directory, shared by every `gunicorn` worker,
+so no external broker (e.g. redis) is needed.
+
+Background callbacks require the `diskcache`, `multiprocess` and `psutil` packages,
+declared as the `dash[diskcache]` dependency. When background callbacks are disabled,
+or (with a warning) when the packages are missing, `background_callback` registers a
+regular callback instead: it runs within the request and its progress and cancel
+components are ignored.
+
+Environment Variables:
+    BACKGROUND_CALLBACKS: "true" or "false", run background callbacks in separate
+        processes, by default "true".
+
+Variables:
+    BACKGROUND_CACHE_DIR
+    BACKGROUND_RESULT_EXPIRE_S
+    background_callback_manager
+Functions:
+    background_callback
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+from typing import TYPE_CHECKING, Any
+
+from dash import DiskcacheManager, callback
+
+from utils.constants import CACHE_DIR
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# Directory of the cache holding background jobs, their progress and their results.
+BACKGROUND_CACHE_DIR = CACHE_DIR / "background_callbacks"
+# Results not retrieved within this many seconds are removed from the cache.
+BACKGROUND_RESULT_EXPIRE_S = 3600
+
+
+def _create_manager() -> DiskcacheManager | None:
+    """Create the background callback manager, None when it is unavailable."""
+    if os.environ.get("BACKGROUND_CALLBACKS", "true").lower() != "true":
+        return None
+    try:
+        import diskcache
+
+        return DiskcacheManager(
+            diskcache.Cache(BACKGROUND_CACHE_DIR), expire=BACKGROUND_RESULT_EXPIRE_S
+        )
+    except ImportError:
+        logger.warning(
+            'Background callbacks run within requests since "dash[diskcache]" is not '
+            "installed, their progress and cancel components are ignored."
+        )
+        return None
+
+
+background_callback_manager = _create_manager()
+
+
+def _ignore_progress(*args: Any) -> None:
+    """Stand in for `set_progress` when a callback runs within the request."""
+
+
+def background_callback(
+    *args: Any,
+    progress: Any = None,
+    progress_default: Any = None,
+    running: Any = None,
+    cancel: Any = None,
+    **kwargs: Any,
+) -> Callable[[Callable], Callable]:
+    """Register a callback that runs in the background when a manager is available.
+
+    Takes the same arguments as `dash.callback`. The decorated function always takes a
+    `set_progress` function as its first argument, followed by the callback's inputs:
+    call it with the values of the `progress` outputs to report progress.
+
+    Parameters
+    ----------
+    *args : Any
+        Positional arguments of `dash.callback` (outputs, inputs and states).
+    progress : Any, optional
+        Output(s) updated by `set_progress`, by default None.
+    progress_default : Any, optional
+        Values of the `progress` outputs when the callback is not running, by default
+        None.
+    running : Any, optional
+        (Output, value while running, value when done) tuples, by default None.
+    cancel : Any, optional
+        Input(s) whose change cancels the running job, by default None.
+    **kwargs : Any
+        Keyword arguments of `dash.callback`.
+
+    Returns
+    -------
+    Callable[[Callable], Callable]
+        Decorator registering the callback.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        """Register `func` as a background or, as a fallback, a regular callback."""
+        if background_callback_manager is not None:
+            return callback(
+                *args,
+                background=True,
+                manager=background_callback_manager,
+                progress=progress,
+                progress_default=progress_default,
+                running=running,
+                cancel=cancel,
+                **kwargs,
+            )(func)
+
+        @functools.wraps(func)
+        def run_in_request(*inputs: Any) -> Any:
+            """Run the callback within the request, without reporting progress."""
+            return func(_ignore_progress, *inputs)
+
+        return callback(*args, **kwargs)(run_in_request)
+
+    return decorator
@@ -8,6 +8,8 @@ Constants:
     Data Directories:
         GOOGLE_DRIVE_DIR: Path to shared google drive collaboration folder.
         DATA_DIR: Path to the `data` directory in the project root (`dash-test-app`).
+        CACHE_DIR: Path to the `.cache` directory in the project root used for
+            processed datasets.
 
     External Links:
         APP_SOURCE_CODE_URL
@@ -32,40 +34,48 @@ Constants:
         HOVER_COLOR_DARK
 
     Component Ids:
-        ID_BACKGROUND_ICON
-        ID_BACKGROUND_LINK
-        ID_DASHBOARD_ICON
-        ID_DASHBOARD_LINK
-        ID_QUARTO_ICON
-        ID_QUARTO_LINK
+        ID_DATE_RANGE
+        ID_FIGURE
+        ID_FIGURE_LOADED
         ID_FIGURE_BAR
         ID_FIGURE_TEMP
         ID_FIGURE_PRECIP
-        ID_HOME_ICON
-        ID_HOME_LINK
+        ID_FIGURE_TIMESERIES
         ID_LOCATION
+        ID_SIDEBAR_ICON
+        ID_SIDEBAR_LINK
+        ID_SIDEBAR_STYLES
+        ID_STATION_SELECT
         ID_TABLE_CLIMATE
+        ID_TABLE_TRENDS
+        ID_TRENDS_CANCEL
+        ID_TRENDS_PROGRESS
+        ID_TRENDS_RUN
 """
 
 from pathlib import Path
 
 import tomli
 
+from utils.profiling import profile_phase
+
 # Load secrets.toml --------------------------------------------------------------------
 
 # Use the file path (`__file__`) of this module to form the paths to both the google
 # drive collaboration folder and to the project's data directory. `parents[2]` is the
 # 3rd parent (since index 2 is 3rd element) of the file path for this module: the
 # project's root directory `dash-test-app`.
-try:
-    with open(Path(__file__).parents[2] / "secrets.toml", "rb") as f:
-        secrets = tomli.load(f)
-    GOOGLE_DRIVE_DIR = Path(secrets["google_drive"]["path"])
-except FileNotFoundError:
-    GOOGLE_DRIVE_DIR = None
-
-# Data Directory -----------------------------------------------------------------------
+with profile_phase("secrets"):
+    try:
+        with open(Path(__file__).parents[2] / "secrets.toml", "rb") as f:
+            secrets = tomli.load(f)
+        GOOGLE_DRIVE_DIR = Path(secrets["google_drive"]["path"])
+    except FileNotFoundError:
+        GOOGLE_DRIVE_DIR = None
+
+# Data Directories ---------------------------------------------------------------------
 DATA_DIR = Path(__file__).parents[2] / "data"
+CACHE_DIR = Path(__file__).parents[2] / ".cache"
 
 
 # External Links -----------------------------------------------------------------------
@@ -94,16 +104,20 @@ HOVER_COLOR_DARK = "hover:bg-slate-700"
 
 
 # Component Ids ------------------------------------------------------------------------
-ID_BACKGROUND_ICON = "background-icon"
-ID_BACKGROUND_LINK = "background-link"
-ID_DASHBOARD_ICON = "dashboard-icon"
-ID_DASHBOARD_LINK = "dashboard-link"
-ID_QUARTO_ICON = "quarto-icon"
-ID_QUARTO_LINK = "quarto-link"
+ID_DATE_RANGE = "date-range"
+ID_FIGURE = "figure"
+ID_FIGURE_LOADED = "figure-loaded"
 ID_FIGURE_BAR = "figure-bar"
 ID_FIGURE_TEMP = "figure-temp"
 ID_FIGURE_PRECIP = "figure-precip"
-ID_HOME_ICON = "home-icon"
-ID_HOME_LINK = "home-link"
+ID_FIGURE_TIMESERIES = "figure-timeseries"
 ID_LOCATION = "location"
+ID_SIDEBAR_ICON = "sidebar-icon"
+ID_SIDEBAR_LINK = "sidebar-link"
+ID_SIDEBAR_STYLES = "sidebar-styles"
+ID_STATION_SELECT = "station-select"
 ID_TABLE_CLIMATE = "table-climate"
+ID_TABLE_TRENDS = "table-trends"
+ID_TRENDS_CANCEL = "trends-cancel"
+ID_TRENDS_PROGRESS = "trends-progress"
+ID_TRENDS_RUN = "trends-run"
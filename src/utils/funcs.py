@@ -5,9 +5,13 @@ Functions:
 """
 import logging
 import re
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Pattern to match the prefix of a utility class.
+_PREFIX_PATTERN = re.compile(r"^-?([a-z:]+)")
+
 
 def update_utility_classes(
     current_classes: str,
@@ -31,6 +35,9 @@ def update_utility_classes(
     classes with the same prefix. If this is the case, the warning can be suppressed by
     setting the `ignore_prefix_warning` to True.
 
+    Results are cached by the combination of `current_classes`, `remove_classes` and
+    `add_classes` since callbacks tend to repeat the same few updates.
+
     Parameters
     ----------
     current_classes : str
@@ -54,62 +61,110 @@ def update_utility_classes(
             "Please provide at least one of these arguments."
         )
 
+    # Lists are not hashable, the cached update is keyed on tuples instead.
+    updated_classes, prefix_warnings, error = _update_utility_classes(
+        current_classes=current_classes,
+        remove_classes=tuple(remove_classes or ()),
+        add_classes=tuple(add_classes or ()),
+    )
+
+    # Warnings (found before any error) are emitted on every call, including calls
+    # served from the cache.
+    if not ignore_prefix_warning:
+        for prefix_warning in prefix_warnings:
+            logger.warning(prefix_warning)
+    # A new exception is raised each time so that the cached one is left untouched.
+    if error is not None:
+        raise type(error)(*error.args) from error.__cause__
+    return updated_classes
+
+
+@lru_cache(maxsize=256)
+def _update_utility_classes(
+    current_classes: str,
+    remove_classes: tuple[str, ...],
+    add_classes: tuple[str, ...],
+) -> tuple[str | None, tuple[str, ...], Exception | None]:
+    """Update a utility class string, see `update_utility_classes`.
+
+    Callbacks repeatedly pass the same few combinations of arguments so results are
+    cached. Errors are returned rather than raised so that they are cached too, along
+    with the warnings found before the error occurred.
+
+    Returns
+    -------
+    tuple[str | None, tuple[str, ...], Exception | None]
+        Updated utility class string (None if there is an error), the prefix warnings
+        to be emitted and the error to be raised.
+    """
     current_class_list = current_classes.split()
-    # Pattern to match the prefix of a utility class.
-    prefix_pattern = r"^-?([a-z:]+)"
+    prefix_warnings: list[str] = []
+    try:
+        _apply_updates(
+            current_classes=current_classes,
+            current_class_list=current_class_list,
+            remove_classes=remove_classes,
+            add_classes=add_classes,
+            prefix_warnings=prefix_warnings,
+        )
+    except (ValueError, RuntimeError) as err:
+        return None, tuple(prefix_warnings), err
+    return " ".join(current_class_list), tuple(prefix_warnings), None
 
+
+def _apply_updates(
+    current_classes: str,
+    current_class_list: list[str],
+    remove_classes: tuple[str, ...],
+    add_classes: tuple[str, ...],
+    prefix_warnings: list[str],
+) -> None:
+    """Remove and add classes in place, appending any prefix warnings."""
     # Remove and/or Add Classes --------------------------------------------------------
-    if remove_classes:
-        for remove_class in remove_classes:
-            try:
-                current_class_list.remove(remove_class)
-            except ValueError as err:
-                raise ValueError(
-                    f"The string '{remove_class}', from the `remove_classes` argument, "
-                    f"was not found in the `current_classes` string:\n"
-                    f"'{current_classes}'"
-                ) from err
-
-    if add_classes:
-        for add_class in add_classes:
-            # Check if the class is already in the `current_class_list`.
-            if add_class in current_class_list:
-                raise RuntimeError(
-                    f"The string '{add_class}', from the `add_classes` argument, is "
-                    f"already found within the `current_classes` string:\n"
-                    f"'{current_classes}'"
-                )
-
-            # Capture the prefix of the incoming add class.
-            try:
-                prefix = re.search(prefix_pattern, add_class).group(1)
-            except AttributeError as err:
-                raise RuntimeError(
-                    f"The string '{add_class}', from the `add_classes` argument, is "
-                    f"not a valid utility class."
-                ) from err
-
-            # Capture all classes from `current_classes_list` that match the prefix for
-            # the current add class.
-            prefix_match_classes = []
-            for util_class in current_class_list:
-                prefix_match = re.search(prefix, util_class)
-                if prefix_match:
-                    prefix_match_classes.append(util_class)
-
-            # Warn that there are matches that could result in classes that get
-            # overridden by the add. This is a warning and not an error because it is
-            # possible to have more than one utility class with the same prefix and not
-            # have any overriding behavior.
-            if prefix_match_classes:
-                if not ignore_prefix_warning:
-                    logger.warning(
-                        f"WARNING: Upon adding the string '{add_class}', the following "
-                        f"class(es) with the same prefix '{prefix}' were found within "
-                        f"the `current_classes` string: {prefix_match_classes}\nIf "
-                        f"this addition does not result in conflicts, this warning can "
-                        f"be suppressed by setting the `ignore_prefix_warning` "
-                        f"argument to True.\n"
-                    )
-            current_class_list.append(add_class)
-    return " ".join(current_class_list)
+    for remove_class in remove_classes:
+        try:
+            current_class_list.remove(remove_class)
+        except ValueError as err:
+            raise ValueError(
+                f"The string '{remove_class}', from the `remove_classes` argument, "
+                f"was not found in the `current_classes` string:\n"
+                f"'{current_classes}'"
+            ) from err
+
+    for add_class in add_classes:
+        # Check if the class is already in the `current_class_list`.
+        if add_class in current_class_list:
+            raise RuntimeError(
+                f"The string '{add_class}', from the `add_classes` argument, is "
+                f"already found within the `current_classes` string:\n"
+                f"'{current_classes}'"
+            )
+
+        # Capture the prefix of the incoming add class.
+        if not (prefix_match := _PREFIX_PATTERN.match(add_class)):
+            raise RuntimeError(
+                f"The string '{add_class}', from the `add_classes` argument, is "
+                f"not a valid utility class."
+            )
+        prefix = prefix_match.group(1)
+
+        # Capture all classes from `current_class_list` that contain the prefix for the
+        # current add class. The prefix only contains letters and colons so a substring
+        # test is equivalent to a regex search and much cheaper.
+        prefix_match_classes = [
+            util_class for util_class in current_class_list if prefix in util_class
+        ]
+
+        # Warn that there are matches that could result in classes that get overridden
+        # by the add. This is a warning and not an error because it is possible to have
+        # more than one utility class with the same prefix and not have any overriding
+        # behavior.
+        if prefix_match_classes:
+            prefix_warnings.append(
+                f"WARNING: Upon adding the string '{add_class}', the following "
+                f"class(es) with the same prefix '{prefix}' were found within the "
+                f"`current_classes` string: {prefix_match_classes}\nIf this addition "
+                f"does not result in conflicts, this warning can be suppressed by "
+                f"setting the `ignore_prefix_warning` argument to True.\n"
+            )
+        current_class_list.append(add_class)
@@ -0,0 +1,340 @@
+"""Memoize the results of data driven callbacks.
+
+Callbacks whose result only depends on their inputs and on the version of the data
+they read (e.g. a table page for a station of the current `hawaii.sqlite` snapshot) are
+decorated with `memoize_callback`. Results are keyed by the callback, the inputs that
+triggered it, the values of its inputs and the version of its data, so that a new
+version of the data never serves a stale result.
+
+Results are kept in two tiers:
+
+- `MemoryCache`: an in-process LRU cache holding the results themselves, served
+  without any copy or deserialization.
+- `DiskCache`: an optional sqlite file in the dataset cache directory holding pickled
+  results, shared by every `gunicorn` worker so that a result computed by one worker
+  is served by all of them. Hits only write to the file about once a minute per result
+  and errors of the file (e.g. while it is locked by other workers) count as misses.
+
+Both tiers expire results after `CALLBACK_CACHE_TTL_S` seconds and evict the least
+recently used results beyond their size limit (the size of a result is the size of its
+pickle). Hits and misses of each tier are counted by
+`utils.metrics.callback_cache_requests`, exposed on `/metrics`, and the time Dash takes
+to serialize the results is recorded by `utils.metrics.serialization_time`.
+
+Environment Variables:
+    CALLBACK_CACHE_TTL: Seconds results are kept, by default 300.
+    CALLBACK_CACHE_MAX_MB: Size limit of the in-process tier of each process, by
+        default 64.
+    CALLBACK_CACHE_DISK: "true" or "false", use the shared on-disk tier, by default
+        "true".
+    CALLBACK_CACHE_DISK_MAX_MB: Size limit of the on-disk tier, by default 256.
+
+Variables:
+    CALLBACK_CACHE_TTL_S
+    CALLBACK_CACHE_MAX_BYTES
+    CALLBACK_CACHE_DISK
+    CALLBACK_CACHE_DISK_MAX_BYTES
+    CALLBACK_CACHE_PATH
+Classes:
+    MemoryCache
+    DiskCache
+Functions:
+    memoize_callback
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from dash import ctx
+
+from utils.constants import CACHE_DIR
+from utils.metrics import callback_cache_requests, mark_callback_done
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_CACHE_TTL_S = float(os.environ.get("CALLBACK_CACHE_TTL", "300"))
+CALLBACK_CACHE_MAX_BYTES = int(
+    float(os.environ.get("CALLBACK_CACHE_MAX_MB", "64")) * 1024**2
+)
+CALLBACK_CACHE_DISK = os.environ.get("CALLBACK_CACHE_DISK", "true").lower() == "true"
+CALLBACK_CACHE_DISK_MAX_BYTES = int(
+    float(os.environ.get("CALLBACK_CACHE_DISK_MAX_MB", "256")) * 1024**2
+)
+CALLBACK_CACHE_PATH = CACHE_DIR / "callback_cache.sqlite"
+
+# Returned by the caches' `get` for keys without a (live) result, results may be None.
+_MISSING = object()
+# Seconds before the access time of an on-disk result is written again on a hit.
+_ACCESS_UPDATE_INTERVAL_S = 60
+
+
+class MemoryCache:
+    """A thread safe in-process LRU cache with a time to live and a size limit.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Total size of the results beyond which the least recently used are evicted.
+    ttl_s : float
+        Seconds after which a result expires.
+    """
+
+    def __init__(self, max_bytes: int, ttl_s: float) -> None:
+        """Create an empty cache."""
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        # Maps each key to the time its result expires, its size and the result, from
+        # the least to the most recently used.
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Return the result stored for `key`, `_MISSING` if there is none (or expired).
+
+        Parameters
+        ----------
+        key : str
+            Key of the result.
+
+        Returns
+        -------
+        Any
+            Stored result.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                self._size -= entry[1]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key: str, value: Any, size: int) -> None:
+        """Store a result, evicting the least recently used beyond the size limit.
+
+        Parameters
+        ----------
+        key : str
+            Key of the result.
+        value : Any
+            Result, callers must not modify it afterwards.
+        size : int
+            Size of the result in bytes.
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if (previous := self._entries.pop(key, None)) is not None:
+                self._size -= previous[1]
+            self._entries[key] = (time.monotonic() + self.ttl_s, size, value)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+
+class DiskCache:
+    """A sqlite cache of pickled results shared by processes.
+
+    Each thread of each process uses its own connection. The database is in WAL mode
+    so that readers do not block each other or the writer.
+
+    Parameters
+    ----------
+    path : Path
+        pathlib Path to the sqlite file, created if needed.
+    max_bytes : int
+        Total size of the results beyond which the least recently used are evicted.
+    ttl_s : float
+        Seconds after which a result expires.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, ttl_s: float) -> None:
+        """Create a cache stored in `path`, the file is opened on first use."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread, connecting on first use."""
+        # Connections must not be used across processes, reconnect after a fork.
+        if getattr(self._local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, "
+                "value BLOB NOT NULL, size INTEGER NOT NULL, expires REAL NOT NULL, "
+                "accessed REAL NOT NULL)"
+            )
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return self._local.connection
+
+    def get(self, key: str) -> bytes | None:
+        """Return the pickled result stored for `key`, None if missing (or expired).
+
+        The access time of the result, used to evict the least recently used, is only
+        written when it is older than `_ACCESS_UPDATE_INTERVAL_S`, so that most hits
+        only read the database. Errors of the database (e.g. when it stays locked by
+        other writers) are logged and treated as a miss.
+
+        Parameters
+        ----------
+        key : str
+            Key of the result.
+
+        Returns
+        -------
+        bytes | None
+            Pickled result.
+        """
+        now = time.time()
+        row = None
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT value, accessed FROM results WHERE key = ? AND expires > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now - _ACCESS_UPDATE_INTERVAL_S:
+                connection.execute(
+                    "UPDATE results SET accessed = ? WHERE key = ?", (now, key)
+                )
+        except sqlite3.Error as error:
+            logger.warning("Callback cache lookup failed: %s", error)
+            # A result read before the access time failed to update is still served.
+            return row[0] if row is not None else None
+        return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store a pickled result, evicting expired and least recently used results.
+
+        Errors of the database are logged and the result is not stored.
+
+        Parameters
+        ----------
+        key : str
+            Key of the result.
+        value : bytes
+            Pickled result.
+        """
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now + self.ttl_s, now),
+                )
+                connection.execute("DELETE FROM results WHERE expires <= ?", (now,))
+                # Keep the most recently used results within the size limit.
+                connection.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM (SELECT key, "
+                    "SUM(size) OVER (ORDER BY accessed DESC, key) AS total FROM "
+                    "results) WHERE total > ?)",
+                    (self.max_bytes,),
+                )
+        except sqlite3.Error as error:
+            logger.warning("Callback cache store failed: %s", error)
+
+
+_memory_cache = MemoryCache(CALLBACK_CACHE_MAX_BYTES, CALLBACK_CACHE_TTL_S)
+_disk_cache = (
+    DiskCache(CALLBACK_CACHE_PATH, CALLBACK_CACHE_DISK_MAX_BYTES, CALLBACK_CACHE_TTL_S)
+    if CALLBACK_CACHE_DISK
+    else None
+)
+
+
+def _cache_key(name: str, version: str | None, args: tuple, kwargs: dict) -> str:
+    """Hash the callback, its triggering inputs, its inputs and its data version."""
+    key = json.dumps(
+        [name, version, sorted(ctx.triggered_prop_ids), args, kwargs],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def memoize_callback(version: Callable[[], str | None]) -> Callable:
+    """Memoize the results of a callback by its inputs and the version of its data.
+
+    Apply below `dash.callback`. The result is looked up in the in-process tier, then in
+    the on-disk tier (when enabled), and only computed when neither holds it. Results
+    must be picklable and are shared between requests, they must not be modified.
+
+    Parameters
+    ----------
+    version : Callable[[], str | None]
+        Returns the version of the data the callback reads, e.g. the `attrs["version"]`
+        of a dataset.
+
+    Returns
+    -------
+    Callable
+        Decorator memoizing the callback.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        """Memoize `func`."""
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def memoized(*args: Any, **kwargs: Any) -> Any:
+            """Return the memoized result of the callback, computing it on a miss."""
+            value = _lookup(_cache_key(name, version(), args, kwargs), args, kwargs)
+            mark_callback_done()
+            return value
+
+        def _lookup(key: str, args: tuple, kwargs: dict) -> Any:
+            """Return the result stored for `key` in either tier, or compute it."""
+            value = _memory_cache.get(key)
+            if value is not _MISSING:
+                callback_cache_requests.labels(name, "memory", "hit").inc()
+                return value
+            callback_cache_requests.labels(name, "memory", "miss").inc()
+
+            if _disk_cache is not None:
+                pickled = _disk_cache.get(key)
+                if pickled is not None:
+                    callback_cache_requests.labels(name, "disk", "hit").inc()
+                    value = pickle.loads(pickled)
+                    _memory_cache.set(key, value, size=len(pickled))
+                    return value
+                callback_cache_requests.labels(name, "disk", "miss").inc()
+
+            value = func(*args, **kwargs)
+            pickled = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            _memory_cache.set(key, value, size=len(pickled))
+            if _disk_cache is not None:
+                _disk_cache.set(key, pickled)
+            return value
+
+        return memoized
+
+    return decorator
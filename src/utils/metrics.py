@@ -0,0 +1,160 @@
+"""Request and callback metrics for the Flask server behind the app.
+
+Records latency and response size histograms for every route, latency histograms for
+every Dash callback (requests to `_dash-update-component`, labelled by the callback's
+outputs) and, for memoized callbacks (see `utils.memoize`), the time Dash takes to turn
+their result into the response, mostly serializing it to JSON. Counters of the hits and
+misses of the callback result cache are recorded alongside. The metrics are exposed in
+the Prometheus text format on the `/metrics` endpoint which only answers requests from
+the local machine.
+
+Metrics are recorded with `prometheus_client`. When `PROMETHEUS_MULTIPROC_DIR` is set
+(as `gunicorn.conf.py` does) each process writes its metrics to files in that directory
+and `/metrics` reports the sum over every worker, whichever worker serves the scrape.
+Otherwise (e.g. the development server) the metrics of the single process are reported.
+
+Environment Variables:
+    PROMETHEUS_MULTIPROC_DIR: Directory shared by the processes serving the app to
+        aggregate their metrics, read by `prometheus_client` when it is imported. It
+        must exist and be emptied before the server starts.
+
+Variables:
+    LATENCY_BUCKETS
+    SIZE_BUCKETS
+    request_latency
+    response_size
+    callback_latency
+    serialization_time
+    callback_cache_requests
+Functions:
+    mark_callback_done
+    init_metrics
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import TYPE_CHECKING
+
+import flask
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+if TYPE_CHECKING:
+    from flask import Flask, Response
+
+# Upper bounds of the histogram buckets, in seconds and in bytes.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(1024 * 4**i for i in range(8))
+_LOCAL_ADDRS = {"127.0.0.1", "::1"}
+_DASH_CALLBACK_ROUTE = "/_dash-update-component"
+
+request_latency = Histogram(
+    "http_request_duration_seconds",
+    "Time taken to handle a request, by route.",
+    ("route", "method", "status"),
+    buckets=LATENCY_BUCKETS,
+)
+response_size = Histogram(
+    "http_response_size_bytes",
+    "Size of the response body, by route.",
+    ("route", "method"),
+    buckets=SIZE_BUCKETS,
+)
+callback_latency = Histogram(
+    "dash_callback_duration_seconds",
+    "Time taken to handle a Dash callback request, by callback output.",
+    ("callback",),
+    buckets=LATENCY_BUCKETS,
+)
+serialization_time = Histogram(
+    "dash_serialization_duration_seconds",
+    "Time from a memoized callback returning its result to the response being ready, "
+    "mostly spent serializing the result to JSON, by callback output.",
+    ("callback",),
+    buckets=LATENCY_BUCKETS,
+)
+# Exposed as `dash_callback_cache_requests_total`.
+callback_cache_requests = Counter(
+    "dash_callback_cache_requests",
+    "Lookups of the callback result cache, by callback, tier and result.",
+    ("callback", "tier", "result"),
+)
+
+
+def mark_callback_done() -> None:
+    """Record that the callback of the current request has returned its result.
+
+    Called by callback wrappers (see `utils.memoize`), the time from this call to the
+    end of the request is recorded by `serialization_time`.
+    """
+    if flask.has_request_context():
+        flask.g.callback_done = time.perf_counter()
+
+
+def _start_timer() -> None:
+    """Store the start time of the request."""
+    flask.g.request_start = time.perf_counter()
+
+
+def _record_request(response: Response) -> Response:
+    """Record the latency, size and serialization time of the request."""
+    start = flask.g.get("request_start")
+    request = flask.request
+    if start is None or request.path == "/metrics":
+        return response
+
+    end = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    request_latency.labels(route, request.method, str(response.status_code)).observe(
+        end - start
+    )
+
+    size = response.content_length
+    if size is None and not response.direct_passthrough:
+        size = response.calculate_content_length()
+    if size is not None:
+        response_size.labels(route, request.method).observe(size)
+
+    if route == _DASH_CALLBACK_ROUTE:
+        body = request.get_json(silent=True) or {}
+        output = str(body.get("output", "<unknown>"))
+        callback_latency.labels(output).observe(end - start)
+        if (done := flask.g.get("callback_done")) is not None:
+            serialization_time.labels(output).observe(end - done)
+    return response
+
+
+def _serve_metrics() -> Response:
+    """Serve the metrics in the Prometheus text format to local clients only."""
+    if flask.request.remote_addr not in _LOCAL_ADDRS:
+        flask.abort(404)
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Sum the metrics written by every process rather than only this worker's.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return flask.Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(server: Flask) -> None:
+    """Record request and callback metrics and serve them on `/metrics`.
+
+    Parameters
+    ----------
+    server : Flask
+        Flask server of the Dash app.
+    """
+    server.before_request(_start_timer)
+    server.after_request(_record_request)
+    server.add_url_rule("/metrics", "metrics", _serve_metrics)
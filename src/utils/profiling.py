@@ -0,0 +1,197 @@
+"""Startup instrumentation for the app.
+
+When enabled, the wall time, resident memory (RSS) and number of modules imported are
+recorded for each phase of the app's startup (imports, loading secrets, loading and
+transforming data, building figures, registering pages and building the layout). The
+phases are emitted as a structured (JSON) report so that boot time can be tracked across
+releases. Phases can be nested, each phase records its depth.
+
+Phases that run lazily (e.g. the first time data is needed) are recorded whenever they
+happen, emitting the report again includes them. The depth of the phases is tracked per
+thread, so that phases recorded by concurrent requests do not nest into each other.
+
+Environment Variables:
+    STARTUP_PROFILE: Enables the instrumentation. Set to "true" to write the report to
+        stderr or to a file path (with a directory or a suffix, e.g.
+        "startup-{pid}.json") to write the report to that file. A `{pid}` placeholder
+        in the path is replaced by the process id so that each gunicorn worker writes
+        its own report. "false", "0" or unset disables it, other values are rejected.
+
+Variables:
+    PROFILING_ENABLED
+Functions:
+    profile_phase
+    startup_report
+    emit_startup_report
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def _parse_startup_profile(value: str) -> tuple[bool, str | None]:
+    """Return whether profiling is enabled and the report path of `STARTUP_PROFILE`.
+
+    Parameters
+    ----------
+    value : str
+        Value of the `STARTUP_PROFILE` environment variable.
+
+    Returns
+    -------
+    tuple[bool, str | None]
+        Whether profiling is enabled and the path of the report, None for stderr.
+
+    Raises
+    ------
+    ValueError
+        If the value is neither a boolean nor a file path.
+    """
+    if value.lower() in ("", "0", "false"):
+        return False, None
+    if value.lower() in ("1", "true"):
+        return True, None
+    if Path(value).suffix or os.sep in value:
+        return True, value
+    raise ValueError(
+        f"Invalid STARTUP_PROFILE {value!r}, use true, 1, false, 0 or a file path"
+        " such as startup-{pid}.json."
+    )
+
+
+PROFILING_ENABLED, _REPORT_PATH = _parse_startup_profile(
+    os.environ.get("STARTUP_PROFILE", "")
+)
+
+# Time at which this module was imported, the start times of the phases are reported
+# relative to it or to the earliest phase if it started before.
+_START_TIME = time.perf_counter()
+# Recorded phases, with their absolute `time.perf_counter()` start time.
+_phases: list[dict[str, str | int | float]] = []
+_phases_lock = threading.Lock()
+# Depth of the phase being entered by each thread.
+_local = threading.local()
+
+
+def _rss_mb() -> float:
+    """Return the current resident memory of the process in MB.
+
+    Reads `/proc/self/statm` where available (Linux), otherwise falls back to the peak
+    resident memory reported by `getrusage`.
+    """
+    try:
+        resident_pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # `ru_maxrss` is in bytes on macOS and in kB elsewhere.
+        return max_rss / 1024**2 if sys.platform == "darwin" else max_rss / 1024
+
+
+@contextmanager
+def profile_phase(name: str, start: float | None = None) -> Iterator[None]:
+    """Record the wall time and memory of a startup phase.
+
+    Can be used as a context manager or as a decorator. Does nothing unless profiling
+    is enabled with the `STARTUP_PROFILE` environment variable.
+
+    Parameters
+    ----------
+    name : str
+        Name of the phase.
+    start : float | None, optional
+        `time.perf_counter()` value at which the phase started, e.g. taken before this
+        module was imported, by default None (when the phase is entered). Memory and
+        modules imported are still measured from when the phase is entered.
+
+    Yields
+    ------
+    None
+    """
+    if not PROFILING_ENABLED:
+        yield
+        return
+
+    depth = getattr(_local, "depth", 0)
+    if start is None:
+        start = time.perf_counter()
+    phase: dict[str, str | int | float] = {"name": name, "depth": depth, "start": start}
+    start_rss = _rss_mb()
+    start_modules = len(sys.modules)
+    _local.depth = depth + 1
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        end_rss = _rss_mb()
+        phase.update(
+            {
+                "wall_s": round(time.perf_counter() - start, 4),
+                "rss_mb": round(end_rss, 1),
+                "rss_delta_mb": round(end_rss - start_rss, 1),
+                "modules_imported": len(sys.modules) - start_modules,
+            }
+        )
+        with _phases_lock:
+            _phases.append(phase)
+
+
+def _relative_phase(
+    phase: dict[str, str | int | float], origin: float
+) -> dict[str, str | int | float]:
+    """Replace the absolute start time of a phase with its offset from `origin`."""
+    metrics = dict(phase)
+    start = metrics.pop("start")
+    return {
+        "name": metrics.pop("name"),
+        "depth": metrics.pop("depth"),
+        "start_s": round(start - origin, 4),
+        **metrics,
+    }
+
+
+def startup_report() -> dict:
+    """Create a report of the phases recorded so far, ordered by start time.
+
+    Returns
+    -------
+    dict
+        Process information, totals and the recorded phases. The start time of each
+        phase (`start_s`) and the elapsed time are relative to the import of this module
+        or to the earliest phase if it started before.
+    """
+    with _phases_lock:
+        phases = sorted(_phases, key=lambda phase: phase["start"])
+    origin = min(_START_TIME, phases[0]["start"]) if phases else _START_TIME
+    return {
+        "pid": os.getpid(),
+        "python": sys.version.split()[0],
+        "elapsed_s": round(time.perf_counter() - origin, 4),
+        "rss_mb": round(_rss_mb(), 1),
+        "modules_loaded": len(sys.modules),
+        "phases": [_relative_phase(phase, origin) for phase in phases],
+    }
+
+
+def emit_startup_report() -> None:
+    """Write the startup report to stderr or to the file given by `STARTUP_PROFILE`.
+
+    Does nothing unless profiling is enabled.
+    """
+    if not PROFILING_ENABLED:
+        return
+
+    report = json.dumps(startup_report(), indent=2)
+    if _REPORT_PATH is None:
+        print(report, file=sys.stderr)
+    else:
+        Path(_REPORT_PATH.format(pid=os.getpid())).write_text(report)
@@ -0,0 +1,193 @@
+"""Response compression and HTTP caching for the Flask server behind the app.
+
+Responses are compressed with brotli (when the optional `brotli` extra is installed) or
+gzip, depending on the client's `Accept-Encoding`. Streamed and passthrough responses
+are never read to be compressed, and ranges of static files (e.g. to resume a download)
+are served from the uncompressed file as is. The compressed bodies of static
+responses (assets, Dash component bundles and the layout) are cached by ETag so that
+each is only compressed once per encoding.
+
+`_dash-layout` and asset responses are given an ETag and answered with a 304 when the
+client already has the current version. Fingerprinted resources (Dash component bundles
+and assets requested with Dash's `?m=<modified time>` query string) are cached by
+browsers for a year as immutable, other assets and the layout must be revalidated.
+
+Variables:
+    COMPRESSIBLE_MIMETYPES
+    MIN_COMPRESS_SIZE
+    MAX_COMPRESSED_CACHE_BYTES
+Functions:
+    init_responses
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import flask
+from dash.fingerprint import check_fingerprint
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+if TYPE_CHECKING:
+    from flask import Flask, Response
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+MIN_COMPRESS_SIZE = 500
+MAX_COMPRESSED_CACHE_BYTES = 32 * 1024**2
+
+_IMMUTABLE = "public, max-age=31536000, immutable"
+_LAYOUT_RULE = "/_dash-layout"
+_COMPONENT_SUITES_PREFIX = "/_dash-component-suites/"
+# Dash serves the assets folder from a blueprint, Flask from its own static folder.
+_ASSET_ENDPOINTS = {"_dash_assets.static", "static"}
+
+# Compressed bodies keyed by (ETag, encoding), least recently used first.
+_compressed: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+_compressed_bytes = 0
+_compressed_lock = threading.Lock()
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    """Compress `body` with "br" (brotli) or "gzip"."""
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def _cached_compress(body: bytes, encoding: str, etag: str) -> bytes:
+    """Compress `body`, reusing the result for responses with the same ETag."""
+    global _compressed_bytes
+    key = (etag, encoding)
+    with _compressed_lock:
+        if key in _compressed:
+            _compressed.move_to_end(key)
+            return _compressed[key]
+
+    compressed = _compress(body, encoding)
+    with _compressed_lock:
+        if key not in _compressed:
+            _compressed[key] = compressed
+            _compressed_bytes += len(compressed)
+        while _compressed_bytes > MAX_COMPRESSED_CACHE_BYTES:
+            _, evicted = _compressed.popitem(last=False)
+            _compressed_bytes -= len(evicted)
+    return compressed
+
+
+def _negotiate_encoding(response: Response) -> str | None:
+    """Choose the encoding of the response from the request's `Accept-Encoding`.
+
+    Compressible responses are marked as varying on `Accept-Encoding` whichever
+    encoding is chosen, so that shared caches keep each representation apart.
+    """
+    if (
+        response.status_code != 200
+        or response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return None
+
+    response.vary.add("Accept-Encoding")
+    accept_encodings = flask.request.accept_encodings
+    if brotli is not None and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+
+def _is_static(request: flask.Request) -> bool:
+    """Check whether the request is for an asset or a Dash component bundle."""
+    return request.endpoint in _ASSET_ENDPOINTS or request.path.startswith(
+        _COMPONENT_SUITES_PREFIX
+    )
+
+
+def _is_fingerprinted(request: flask.Request) -> bool:
+    """Check whether the requested resource's URL changes whenever its content does."""
+    if request.endpoint in _ASSET_ENDPOINTS:
+        return "m" in request.args
+    return check_fingerprint(request.path)[1]
+
+
+def _optimize_response(response: Response) -> Response:
+    """Add caching headers to the response, answer with a 304 or compress it."""
+    request = flask.request
+    is_layout = request.url_rule is not None and request.url_rule.rule == _LAYOUT_RULE
+    if request.method != "GET" or not (is_layout or _is_static(request)):
+        # Dynamic responses (pages, callbacks) are compressed without caching.
+        if (encoding := _negotiate_encoding(response)) is not None:
+            _encode(response, response.get_data(), encoding, etag=None)
+        return response
+
+    if _is_fingerprinted(request):
+        response.headers["Cache-Control"] = _IMMUTABLE
+    elif response.status_code in (200, 304):
+        response.headers["Cache-Control"] = "no-cache"
+    if response.status_code != 200 or request.range is not None:
+        # Ranges refer to the uncompressed file, partial (206) and range requested
+        # responses are served as is.
+        return response
+
+    # Static files are passed through to the server untouched, read them to hash and
+    # compress them.
+    response.direct_passthrough = False
+    body = response.get_data()
+    etag = response.get_etag()[0] or hashlib.sha1(body).hexdigest()
+    encoding = _negotiate_encoding(response)
+
+    # Compressed bodies are cached by ETag, answering a conditional request with a 304
+    # after compressing the body is cheap.
+    encoded = encoding is not None and _encode(response, body, encoding, etag=etag)
+    # Each encoding is a different representation so it needs its own ETag.
+    response.set_etag(f"{etag}-{encoding}" if encoded else etag)
+    response.make_conditional(request)
+    return response
+
+
+def _encode(response: Response, body: bytes, encoding: str, etag: str | None) -> bool:
+    """Replace the body of the response with its compressed version if it is large.
+
+    Returns whether the body was compressed.
+    """
+    if len(body) < MIN_COMPRESS_SIZE:
+        return False
+
+    if etag is None:
+        compressed = _compress(body, encoding)
+    else:
+        compressed = _cached_compress(body, encoding, etag=etag)
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    # Ranges are only served from the uncompressed representation.
+    response.headers.pop("Accept-Ranges", None)
+    return True
+
+
+def init_responses(server: Flask) -> None:
+    """Compress responses and add HTTP caching headers to static responses.
+
+    Parameters
+    ----------
+    server : Flask
+        Flask server of the Dash app.
+    """
+    server.after_request(_optimize_response)
@@ -0,0 +1,95 @@
+"""Fixtures shared by the tests."""
+
+import sqlite3
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import cache, climatology, process_data, refresh
+from data.load_data import get_table, materialize
+
+
+def measurement_rows(start="2015-01-01", end="2017-12-31", first_id=1, seed=0):
+    """Return rows of two stations with different numbers of observations per day.
+
+    Parameters
+    ----------
+    start : str, optional
+        First date, by default "2015-01-01".
+    end : str, optional
+        Last date, by default "2017-12-31".
+    first_id : int, optional
+        `id` of the first row, by default 1.
+    seed : int, optional
+        Seed of the random values, by default 0.
+
+    Returns
+    -------
+    DataFrame
+        Columns `id`, `station`, `date`, `prcp` and `tobs`.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, end, freq="D")
+    # Station B only reports every third day, so the stations weigh differently.
+    rows = pd.concat(
+        [
+            pd.DataFrame({"station": "A", "date": dates}),
+            pd.DataFrame({"station": "B", "date": dates[::3]}),
+        ],
+        ignore_index=True,
+    ).sort_values(["date", "station"], ignore_index=True)
+    rows["prcp"] = rng.gamma(0.5, 0.4, len(rows)).round(2)
+    rows["tobs"] = rng.integers(55, 85, len(rows)).astype(float)
+    # Some observations are missing.
+    rows.loc[rng.random(len(rows)) < 0.1, "prcp"] = np.nan
+    rows.insert(0, "id", np.arange(first_id, first_id + len(rows)))
+    return rows
+
+
+def insert_measurement_rows(path, rows):
+    """Insert rows of `measurement_rows` into the measurement table of a database."""
+    values = rows.astype(object).where(rows.notna(), None)
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS measurement (id INTEGER PRIMARY KEY, "
+            "station TEXT, date TEXT, prcp FLOAT, tobs FLOAT)"
+        )
+        connection.executemany(
+            "INSERT INTO measurement VALUES (?, ?, ?, ?, ?)",
+            [
+                (r.id, r.station, r.date.strftime("%Y-%m-%d"), r.prcp, r.tobs)
+                for r in values.itertuples()
+            ],
+        )
+    connection.close()
+
+
+@pytest.fixture
+def measurement_db(tmp_path):
+    """Return the path to a measurement database and its rows."""
+    path = tmp_path / "hawaii.sqlite"
+    rows = measurement_rows()
+    insert_measurement_rows(path, rows)
+    return path, rows
+
+
+@pytest.fixture
+def measurement_source(measurement_db, tmp_path, monkeypatch):
+    """Point the cached datasets at a temporary database and refresh on every call."""
+    path, rows = measurement_db
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(cache, "_FINGERPRINTS_PATH", tmp_path / "fingerprints.json")
+    monkeypatch.setattr(refresh, "REFRESH_INTERVAL_S", 0)
+    monkeypatch.setattr(refresh, "_last_checked", {})
+    monkeypatch.setattr(climatology, "HAWAII_DB_PATH", path)
+    monkeypatch.setattr(climatology, "get_table", partial(get_table, path=path))
+    monkeypatch.setattr(climatology, "_cube", {})
+    monkeypatch.setattr(process_data, "HAWAII_DB_PATH", path)
+    monkeypatch.setattr(process_data, "get_table", partial(get_table, path=path))
+    monkeypatch.setattr(process_data, "materialize", partial(materialize, path=path))
+    monkeypatch.setattr(process_data, "_measurement_rows", {})
+    monkeypatch.setattr(process_data, "_transformed", {})
+    monkeypatch.setattr(process_data, "_daily", {})
+    return path, rows
@@ -0,0 +1,57 @@
+"""Tests for `data.cache`."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the cache entries and fingerprints in a temporary directory."""
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(cache, "_FINGERPRINTS_PATH", tmp_path / "fingerprints.json")
+    return tmp_path
+
+
+def test_load_or_build_keeps_nulls(cache_dir):
+    """Read nulls of object columns back as nulls rather than as strings."""
+    source = cache_dir / "source.txt"
+    source.write_text("source")
+    df = pd.DataFrame(
+        {
+            "name": ["a", None, np.nan, "None"],
+            "station": pd.Categorical(["x", None, "y", "x"]),
+            "value": [1.0, np.nan, 3.0, 4.0],
+        }
+    )
+
+    built = cache.load_or_build("test", build=lambda: df, source=source, version=1)
+    loaded = cache.load_or_build("test", build=pytest.fail, source=source, version=1)
+
+    for result in (built, loaded):
+        assert result.name.isna().tolist() == [False, True, True, False]
+        assert result.name[3] == "None"
+        assert result.station.isna().tolist() == [False, True, False, False]
+
+
+def test_fingerprint_file_hashes_on_stat_change(cache_dir):
+    """Reuse the recorded hash until the stat of the file changes."""
+    source = cache_dir / "source.txt"
+    source.write_text("source")
+    fingerprint = cache.fingerprint_file(source)
+
+    # A recorded hash is used as long as the stat is the same.
+    fingerprints = json.loads(cache._FINGERPRINTS_PATH.read_text())
+    fingerprints[fingerprint["path"]]["sha256"] = "recorded"
+    cache._FINGERPRINTS_PATH.write_text(json.dumps(fingerprints))
+    assert cache.fingerprint_file(source)["sha256"] == "recorded"
+
+    source.write_text("changed source")
+    assert cache.fingerprint_file(source)["sha256"] not in (
+        "recorded",
+        fingerprint["sha256"],
+    )
@@ -0,0 +1,54 @@
+"""Tests for `data.climatology`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.climatology import aggregate_cube, merge_cubes, query_cube
+from data.load_data import get_table
+
+
+def test_query_cube_equals_groupby_mean(measurement_db):
+    """Compute the same means as a pandas groupby of the raw rows."""
+    path, rows = measurement_db
+    cube = aggregate_cube(get_table(name="measurement", path=path))
+
+    means = query_cube(cube, months=[6, 12])
+
+    jun_dec = rows[rows.date.dt.month.isin([6, 12])]
+    expected = (
+        jun_dec.groupby([jun_dec.date.dt.month.rename("month"), jun_dec.date.dt.day])[
+            ["prcp", "tobs"]
+        ]
+        .mean()
+        .reset_index()
+    )
+    np.testing.assert_array_equal(means.month, expected.month)
+    np.testing.assert_array_equal(means.day, expected.date)
+    np.testing.assert_allclose(means.prcp_mean, expected.prcp)
+    np.testing.assert_allclose(means.tobs_mean, expected.tobs)
+
+
+def test_query_cube_weights_by_count(measurement_db):
+    """Weight the mean of combined cells by their counts, not a mean of means."""
+    path, rows = measurement_db
+    cube = aggregate_cube(get_table(name="measurement", path=path))
+
+    mean = query_cube(cube, variables=["tobs"], by=[]).tobs_mean[0]
+
+    assert mean == pytest.approx(rows.tobs.mean())
+    assert mean != pytest.approx(rows.groupby("station").tobs.mean().mean())
+
+
+def test_merge_cubes_equals_aggregate(measurement_db):
+    """Merge the cubes of two parts of the rows into the cube of all of them."""
+    path, rows = measurement_db
+    table = get_table(name="measurement", path=path)
+    high_water_mark = len(rows) // 2
+
+    merged = merge_cubes(
+        aggregate_cube(table.filter(table.id <= high_water_mark)),
+        aggregate_cube(table, after_id=high_water_mark),
+    )
+
+    pd.testing.assert_frame_equal(merged, aggregate_cube(table))
@@ -0,0 +1,54 @@
+"""Tests for `data.connections`."""
+
+import sqlite3
+
+import pytest
+
+from data import connections
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Return the path to a small sqlite database."""
+    path = tmp_path / "test.sqlite"
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE t (a INTEGER)")
+        connection.execute("INSERT INTO t VALUES (1)")
+    connection.close()
+    return path
+
+
+def test_connection_is_read_only_and_not_immutable(database):
+    """Open read-only without `immutable` unless it is opted in."""
+    query = connections.connection_uri(database).split("?")[1]
+    assert query == "mode=ro"
+    with pytest.raises(sqlite3.OperationalError):
+        connections.open_connection(database).execute("INSERT INTO t VALUES (2)")
+
+
+def test_checkout_sees_changes(database):
+    """Read rows written to the database after the connection was opened."""
+    connection = connections.checkout(database)
+    assert connection.execute("SELECT COUNT(*) FROM t").fetchone() == (1,)
+    with sqlite3.connect(database) as writer:
+        writer.execute("INSERT INTO t VALUES (2)")
+    writer.close()
+    assert connections.checkout(database) is connection
+    assert connection.execute("SELECT COUNT(*) FROM t").fetchone() == (2,)
+
+
+def test_checkout_replaces_closed_connection(database):
+    """Replace a connection that can no longer run queries."""
+    connection = connections.checkout(database)
+    connection.close()
+    assert connections.checkout(database) is not connection
+
+
+def test_immutable_is_opt_in(database, monkeypatch):
+    """Open `immutable` when opted in, but never a database in WAL mode."""
+    monkeypatch.setattr(connections, "SQLITE_IMMUTABLE", True)
+    assert connections.connection_uri(database).endswith("?mode=ro&immutable=1")
+    with sqlite3.connect(database) as connection:
+        connection.execute("PRAGMA journal_mode=WAL")
+    connection.close()
+    assert connections.connection_uri(database).endswith("?mode=ro")
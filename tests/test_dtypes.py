@@ -0,0 +1,22 @@
+"""Tests for `data.dtypes`."""
+
+import pandas as pd
+
+from data.dtypes import compact_dtypes, concat_compacted
+
+
+def test_concat_compacted():
+    """Concatenate compacted batches as if the whole DataFrame had been compacted."""
+    df = pd.DataFrame(
+        {
+            "station": ["B", "B", "A", "A", "C", "C"],
+            "date": ["2017-01-01", "2017-01-02"] * 3,
+            "tobs": [70.0, 71.0, 72.0, 73.0, 74.0, 75.0],
+        }
+    )
+    batches = [compact_dtypes(df.iloc[i : i + 2], log=False) for i in range(0, 6, 2)]
+
+    result = concat_compacted(batches)
+
+    pd.testing.assert_frame_equal(result, compact_dtypes(df))
+    assert result.station.cat.categories.tolist() == ["A", "B", "C"]
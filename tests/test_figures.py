@@ -0,0 +1,111 @@
+"""Tests for `components.figures`."""
+
+import copy
+import inspect
+import threading
+import time
+
+import pytest
+from dash import no_update
+
+from components import figures
+from components.figures import get_figure, load_figure, patch_trace_data
+from utils.constants import ID_FIGURE, ID_FIGURE_BAR, ID_FIGURE_TEMP
+
+# The callback without its memoization, so that each call computes its result.
+_load_figure = inspect.unwrap(load_figure)
+
+
+@pytest.fixture(autouse=True)
+def figure_cache(measurement_source, monkeypatch):
+    """Build the figures from the temporary database."""
+    monkeypatch.setattr(figures, "_figure_cache", {})
+
+
+def _apply_patch(figure, patch):
+    """Apply the operations of a `Patch` to a copy of a figure dict."""
+    figure = copy.deepcopy(figure)
+    for operation in patch.to_plotly_json()["operations"]:
+        assert operation["operation"] == "Assign"
+        *path, key = operation["location"]
+        target = figure
+        for location in path:
+            target = target[location]
+        target[key] = operation["params"]["value"]
+    return figure
+
+
+@pytest.mark.parametrize("figure_id", list(figures.STATION_FIGURES))
+def test_patch_matches_station_figure(figure_id):
+    """Turn the figure of all stations into the station's figure with the patch."""
+    base = copy.deepcopy(get_figure(figure_id))
+    patch, loaded = _load_figure({"type": ID_FIGURE, "index": figure_id}, "B", True)
+    assert isinstance(patch, figures.Patch)
+    assert loaded is no_update
+
+    operations = patch.to_plotly_json()["operations"]
+    assert {tuple(operation["location"]) for operation in operations} <= {
+        ("data", i, key)
+        for i in range(len(base["data"]))
+        for key in ("x", "y", "customdata")
+    }
+    station_figure = get_figure(figure_id, "B")
+    assert _apply_patch(base, patch) == station_figure
+    assert station_figure != base
+
+
+def test_patch_only_replaces_trace_data():
+    """Leave the layout and the trace styles out of the patch."""
+    figure = get_figure(ID_FIGURE_TEMP, "A")
+    patched = _apply_patch({"data": [{}, {}], "layout": {}}, patch_trace_data(figure))
+    assert patched["layout"] == {}
+    assert [set(trace) for trace in patched["data"]] == [{"x", "y"}, {"x", "y"}]
+
+
+def test_station_change_before_figure_loaded_sends_figure():
+    """Send the whole station figure while the graph has not received its figure."""
+    graph_id = {"type": ID_FIGURE, "index": ID_FIGURE_TEMP}
+    figure, loaded = _load_figure(graph_id, "B", False)
+    assert figure == get_figure(ID_FIGURE_TEMP, "B")
+    assert loaded is True
+
+
+def test_station_change_leaves_other_figures():
+    """Leave figures that do not depend on the station unchanged once loaded."""
+    graph_id = {"type": ID_FIGURE, "index": ID_FIGURE_BAR}
+    assert _load_figure(graph_id, "B", True) == (no_update, no_update)
+    figure, loaded = _load_figure(graph_id, "B", False)
+    assert figure == get_figure(ID_FIGURE_BAR)
+    assert loaded is True
+
+
+def test_concurrent_calls_build_each_version_once(monkeypatch):
+    """Build a figure once per version and keep the newest version cached."""
+    versions = iter(range(100))
+    builds = []
+
+    def get_data(station):
+        """Return the sample data with a newer version on each call."""
+        df = figures.sample_data.copy()
+        df.attrs["version"] = next(versions) // 4
+        return df
+
+    def create_figure(df):
+        """Build the bar chart slowly."""
+        builds.append(df.attrs["version"])
+        time.sleep(0.01)
+        return figures.create_bar_chart(df)
+
+    monkeypatch.setitem(
+        figures.FIGURE_BUILDERS, ID_FIGURE_BAR, (get_data, create_figure)
+    )
+    threads = [
+        threading.Thread(target=get_figure, args=(ID_FIGURE_BAR,)) for _ in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert builds == [0, 1, 2, 3]
+    assert figures._figure_cache[(ID_FIGURE_BAR, None)][0] == 3
@@ -0,0 +1,118 @@
+"""Tests for `utils.funcs`."""
+
+import logging
+import re
+
+import pytest
+
+from utils.funcs import _update_utility_classes, update_utility_classes
+
+# Cases of `current_classes`, `remove_classes` and `add_classes`.
+CASES = [
+    ("flex p-4 text-sm", None, ["bg-white"]),
+    ("flex p-4 text-sm", ["p-4"], ["p-2"]),
+    ("flex p-4 text-sm flex", ["flex"], ["gap-2"]),
+    ("flex p-4 text-sm", ["text-sm", "flex"], None),
+    ("text-sm context-menu hover:text-red-500", None, ["text-lg"]),
+    ("mt-2 bg-white", None, ["-mt-4", "bg-black"]),
+    ("mt-2 bg-white", [], []),
+    ("flex p-4", ["gap-2"], None),
+    ("flex p-4", None, ["p-4"]),
+    ("flex p-4", None, ["gap-2", "gap-2"]),
+    ("flex p-4", None, ["bg-white", "42"]),
+]
+
+
+def _reference_update(current_classes, remove_classes=None, add_classes=None):
+    """Update classes as the implementation did before results were cached.
+
+    Returns the updated classes (None on error), the classes matched by each prefix
+    warning and the type and message of the error.
+    """
+    current_class_list = current_classes.split()
+    warnings = []
+    try:
+        for remove_class in remove_classes or []:
+            try:
+                current_class_list.remove(remove_class)
+            except ValueError as err:
+                raise ValueError(remove_class) from err
+        for add_class in add_classes or []:
+            if add_class in current_class_list:
+                raise RuntimeError(add_class)
+            try:
+                prefix = re.search(r"^-?([a-z:]+)", add_class).group(1)
+            except AttributeError as err:
+                raise RuntimeError(add_class) from err
+            matches = [c for c in current_class_list if re.search(prefix, c)]
+            if matches:
+                warnings.append(matches)
+            current_class_list.append(add_class)
+    except (ValueError, RuntimeError) as err:
+        return None, warnings, type(err)
+    return " ".join(current_class_list), warnings, None
+
+
+@pytest.fixture(autouse=True)
+def cache_clear():
+    """Start each test with an empty cache."""
+    _update_utility_classes.cache_clear()
+
+
+@pytest.mark.parametrize(("current", "remove", "add"), CASES)
+def test_matches_reference(current, remove, add, caplog):
+    """Return the same classes, warnings and errors as before results were cached."""
+    expected, expected_warnings, expected_error = _reference_update(
+        current, remove, add
+    )
+    # The second call is served from the cache.
+    for _ in range(2):
+        caplog.clear()
+        with caplog.at_level(logging.WARNING, logger="utils.funcs"):
+            try:
+                updated = update_utility_classes(current, remove, add)
+                error = None
+            except (ValueError, RuntimeError) as err:
+                updated, error = None, type(err)
+        assert updated == expected
+        assert error is expected_error
+        assert [
+            re.search(r"string: (\[.*\])", record.message).group(1)
+            for record in caplog.records
+        ] == [str(matches) for matches in expected_warnings]
+
+
+def test_cached_call_warns_again(caplog):
+    """Emit the prefix warning on every call, including those served from the cache."""
+    with caplog.at_level(logging.WARNING, logger="utils.funcs"):
+        for _ in range(2):
+            update_utility_classes("p-4 text-sm", add_classes=["p-2"])
+    assert len(caplog.records) == 2
+    assert _update_utility_classes.cache_info().hits == 1
+
+    caplog.clear()
+    update_utility_classes(
+        "p-4 text-sm", add_classes=["p-2"], ignore_prefix_warning=True
+    )
+    assert not caplog.records
+
+
+def test_cached_conflict_raises_fresh_exception():
+    """Raise a new exception on every call, with the message and cause of the first."""
+    errors = []
+    for _ in range(2):
+        with pytest.raises(ValueError, match="gap-2") as excinfo:
+            update_utility_classes("flex p-4", remove_classes=["gap-2"])
+        errors.append(excinfo.value)
+    assert _update_utility_classes.cache_info().hits == 1
+    assert errors[0] is not errors[1]
+    assert errors[0].args == errors[1].args
+    assert isinstance(errors[1].__cause__, ValueError)
+
+
+def test_prefix_warning_only_lists_classes_containing_the_prefix(caplog):
+    """List the classes containing the prefix of the added class and no others."""
+    with caplog.at_level(logging.WARNING, logger="utils.funcs"):
+        update_utility_classes("bg-white text-sm border-b", add_classes=["bg-black"])
+    (record,) = caplog.records
+    assert "['bg-white']" in record.message
@@ -0,0 +1,58 @@
+"""Tests for `utils.memoize`."""
+
+import sqlite3
+
+import pytest
+
+from utils import memoize
+from utils.memoize import DiskCache
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    """Return an empty on-disk cache."""
+    return DiskCache(tmp_path / "cache.sqlite", max_bytes=1024, ttl_s=60)
+
+
+def _accessed(disk_cache, key):
+    """Return the access time stored for `key`."""
+    with sqlite3.connect(disk_cache.path) as connection:
+        query = "SELECT accessed FROM results WHERE key = ?"
+        return connection.execute(query, (key,)).fetchone()[0]
+
+
+def test_get_updates_access_time_at_intervals(disk_cache, monkeypatch):
+    """Only write the access time of a hit when the stored one is old."""
+    disk_cache.set("key", b"value")
+    stored = _accessed(disk_cache, "key")
+
+    assert disk_cache.get("key") == b"value"
+    assert _accessed(disk_cache, "key") == stored
+
+    monkeypatch.setattr(memoize, "_ACCESS_UPDATE_INTERVAL_S", -1)
+    assert disk_cache.get("key") == b"value"
+    assert _accessed(disk_cache, "key") > stored
+
+
+def test_errors_are_misses(disk_cache, tmp_path, caplog):
+    """Treat a database that cannot be used as a miss."""
+    # A directory cannot be opened as a database.
+    unusable = DiskCache(tmp_path, max_bytes=1024, ttl_s=60)
+    unusable.set("key", b"value")
+    assert unusable.get("key") is None
+    assert len(caplog.records) == 2
+
+    disk_cache.set("key", b"value")
+    # Hold the write lock so that the cache cannot write.
+    blocker = sqlite3.connect(disk_cache.path, timeout=0, isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+    disk_cache._local.connection.execute("PRAGMA busy_timeout = 0")
+
+    try:
+        disk_cache.set("other", b"value")
+        assert disk_cache.get("other") is None
+        assert disk_cache.get("key") == b"value"
+        assert "database is locked" in caplog.records[-1].getMessage()
+    finally:
+        blocker.rollback()
+        blocker.close()
@@ -0,0 +1,46 @@
+"""Tests for `utils.metrics`."""
+
+import flask
+import pytest
+
+from utils.metrics import init_metrics, mark_callback_done
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Return a test client of a server recording metrics in a single process."""
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    server = flask.Flask(__name__)
+
+    @server.post("/_dash-update-component")
+    def update_component():
+        """Stand in for Dash's callback route."""
+        mark_callback_done()
+        return "{}"
+
+    init_metrics(server)
+    return server.test_client()
+
+
+def _sample(metrics, prefix):
+    """Return the value of the sample whose line starts with `prefix`."""
+    lines = [line for line in metrics.splitlines() if line.startswith(prefix)]
+    return float(lines[0].split()[-1]) if lines else 0.0
+
+
+def test_serve_metrics(client):
+    """Count callback requests and the time after the callback returned."""
+    prefix = 'dash_serialization_duration_seconds_count{callback="test-output.data"}'
+    before = _sample(client.get("/metrics").text, prefix)
+
+    client.post("/_dash-update-component", json={"output": "test-output.data"})
+
+    metrics = client.get("/metrics").text
+    assert _sample(metrics, prefix) == before + 1
+    assert "http_request_duration_seconds_bucket" in metrics
+
+
+def test_metrics_local_only(client):
+    """Hide the metrics from remote clients."""
+    response = client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    assert response.status_code == 404
@@ -0,0 +1,80 @@
+"""Tests for `utils.profiling`."""
+
+import threading
+import time
+
+import pytest
+
+from utils import profiling
+from utils.profiling import profile_phase, startup_report
+
+
+@pytest.fixture(autouse=True)
+def phases(monkeypatch):
+    """Enable profiling with no phases recorded."""
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "_phases", [])
+
+
+def _phases_by_name():
+    """Return the phases of the startup report by name."""
+    return {phase["name"]: phase for phase in startup_report()["phases"]}
+
+
+def _record_phase(name):
+    """Record an empty phase."""
+    with profile_phase(name):
+        pass
+
+
+def test_depth_is_tracked_per_thread():
+    """Record a phase of another thread at its own depth rather than nested."""
+    with profile_phase("outer"):
+        with profile_phase("inner"):
+            thread = threading.Thread(target=_record_phase, args=("thread",))
+            thread.start()
+            thread.join()
+
+    phases = _phases_by_name()
+    assert phases["outer"]["depth"] == 0
+    assert phases["inner"]["depth"] == 1
+    assert phases["thread"]["depth"] == 0
+
+
+def test_earlier_start_does_not_shift_recorded_phases():
+    """Report every phase relative to the same origin, whatever the recording order."""
+    with profile_phase("late"):
+        pass
+    late = _phases_by_name()["late"]["start_s"]
+    with profile_phase("early", start=profiling._START_TIME - 1):
+        pass
+
+    phases = _phases_by_name()
+    assert phases["early"]["start_s"] == 0
+    assert phases["late"]["start_s"] == pytest.approx(late + 1, abs=1e-3)
+    assert [phase["name"] for phase in startup_report()["phases"]] == ["early", "late"]
+    assert startup_report()["elapsed_s"] > time.perf_counter() - profiling._START_TIME
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("", (False, None)),
+        ("0", (False, None)),
+        ("False", (False, None)),
+        ("1", (True, None)),
+        ("true", (True, None)),
+        ("startup-{pid}.json", (True, "startup-{pid}.json")),
+        ("profiles/startup", (True, "profiles/startup")),
+    ],
+)
+def test_parse_startup_profile(value, expected):
+    """Accept booleans and file paths."""
+    assert profiling._parse_startup_profile(value) == expected
+
+
+@pytest.mark.parametrize("value", ["yes", "on", "2"])
+def test_parse_startup_profile_rejects_other_values(value):
+    """Reject values that are neither booleans nor file paths."""
+    with pytest.raises(ValueError, match="STARTUP_PROFILE"):
+        profiling._parse_startup_profile(value)
@@ -0,0 +1,43 @@
+"""Tests for `data.query`."""
+
+import pandas as pd
+import pytest
+
+from data.query import dataframe_table, query_page
+
+
+@pytest.fixture
+def table():
+    """Return a small transformed measurement table."""
+    df = pd.DataFrame(
+        {
+            "Month": ["Jun", "Jun", "Jun", "Dec"],
+            "Day": [1, 2, 11, 21],
+            "Precipitation": [0.1, 0.2, 0.0, 0.3],
+        }
+    )
+    return dataframe_table(df=df, name="transformed_measurement")
+
+
+def _days(table, filter_query):
+    """Return the `Day` of the rows matching `filter_query`."""
+    rows, _ = query_page(
+        table=table, page_current=0, page_size=10, filter_query=filter_query
+    )
+    return [row["Day"] for row in rows]
+
+
+def test_number_compared_with_string_column(table):
+    """Compare unquoted numbers with string columns as text instead of failing."""
+    assert _days(table, "{Month} = 6") == []
+    assert _days(table, "{Month} = Jun") == [1, 2, 11]
+
+
+def test_contains_number_uses_typed_text(table):
+    """Match the operand as typed rather than its float representation."""
+    assert _days(table, "{Day} contains 1") == [1, 11, 21]
+
+
+def test_text_compared_with_numeric_column_is_skipped(table):
+    """Ignore comparisons of numeric columns with text."""
+    assert _days(table, "{Day} > abc") == [1, 2, 11, 21]
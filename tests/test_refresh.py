@@ -0,0 +1,99 @@
+"""Tests of the incremental refresh of the datasets derived from the database."""
+
+import os
+import shutil
+
+import pandas as pd
+from conftest import insert_measurement_rows, measurement_rows
+
+from data import climatology, load_data, process_data
+from data.load_data import get_table
+
+
+def _spy(monkeypatch, module, name):
+    """Record the keyword arguments and results of the calls to a module function."""
+    function = getattr(module, name)
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        result = function(*args, **kwargs)
+        calls.append((kwargs, result))
+        return result
+
+    monkeypatch.setattr(module, name, wrapper)
+    return calls
+
+
+def _append_rows(path, rows):
+    """Append a year of rows past the high-water mark of the database."""
+    new_rows = measurement_rows(
+        start="2018-01-01", end="2018-12-31", first_id=rows.id.max() + 1, seed=1
+    )
+    insert_measurement_rows(path, new_rows)
+    return new_rows
+
+
+def test_cube_refresh_merges_only_new_rows(measurement_source, monkeypatch):
+    """Merge only the appended rows into the cube, as a full rebuild would."""
+    path, rows = measurement_source
+    aggregations = _spy(monkeypatch, climatology, "aggregate_cube")
+    checks = _spy(monkeypatch, climatology, "rows_changed")
+    climatology.get_cube()
+    assert [kwargs for kwargs, _ in aggregations] == [{}]
+
+    new_rows = _append_rows(path, rows)
+    cube = climatology.get_cube()
+    kwargs, update = aggregations[-1]
+    assert kwargs == {"after_id": rows.id.max()}
+    assert update.rows.sum() == len(new_rows)
+    assert len(checks) == 1
+
+    rebuilt = climatology.aggregate_cube(get_table(name="measurement", path=path))
+    pd.testing.assert_frame_equal(cube, rebuilt, check_like=True)
+
+    # The source did not change since, the cube is neither queried nor replaced.
+    calls = len(aggregations)
+    assert climatology.get_cube() is cube
+    assert len(aggregations) == calls
+    assert len(checks) == 1
+
+
+def test_measurement_refresh_appends_only_new_rows(measurement_source, monkeypatch):
+    """Append only the new rows to the measurement dataset, as a full reload would."""
+    path, rows = measurement_source
+    reads = _spy(monkeypatch, process_data, "_read_measurement")
+    checks = _spy(monkeypatch, process_data, "rows_changed")
+    process_data.get_measurement()
+    assert len(reads) == 1
+
+    new_rows = _append_rows(path, rows)
+    measurement = process_data.get_measurement()
+    kwargs, appended = reads[-1]
+    assert kwargs == {"after_id": rows.id.max()}
+    assert appended.id.tolist() == new_rows.id.tolist()
+    assert len(checks) == 1
+
+    rebuilt = process_data._read_measurement()
+    pd.testing.assert_frame_equal(measurement, rebuilt, check_categorical=False)
+
+    calls = len(reads)
+    assert process_data.get_measurement() is measurement
+    assert len(reads) == calls
+    assert len(checks) == 1
+
+
+def test_connections_are_only_reset_when_the_database_is_replaced(measurement_source):
+    """Keep the connections while rows are appended, reconnect once it is replaced."""
+    path, rows = measurement_source
+    get_table(name="measurement", path=path)
+    generation = load_data._generation
+
+    _append_rows(path, rows)
+    load_data.reset_replaced_connections(path)
+    assert load_data._generation == generation
+
+    replacement = path.with_suffix(".new")
+    shutil.copy(path, replacement)
+    os.replace(replacement, path)
+    load_data.reset_replaced_connections(path)
+    assert load_data._generation == generation + 1
@@ -0,0 +1,71 @@
+"""Tests for `utils.responses`."""
+
+import flask
+import pytest
+
+from utils.responses import init_responses
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Return a test client of a server with a static text file."""
+    (tmp_path / "file.txt").write_text("text " * 1000)
+    (tmp_path / "small.txt").write_text("text")
+    server = flask.Flask(__name__, static_folder=tmp_path, static_url_path="/static")
+
+    @server.get("/download")
+    def download():
+        """Serve the text file from a dynamic route."""
+        return flask.send_file(tmp_path / "file.txt")
+
+    init_responses(server)
+    return server.test_client()
+
+
+def test_compresses_static_files(client):
+    """Compress static files without advertising ranges of the compressed body."""
+    response = client.get("/static/file.txt", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Ranges" not in response.headers
+
+
+def test_etag_of_encoding_only_when_compressed(client):
+    """Suffix the ETag with the encoding only when the body was compressed."""
+    headers = {"Accept-Encoding": "gzip"}
+    large = client.get("/static/file.txt", headers=headers)
+    small = client.get("/static/small.txt", headers=headers)
+    identity = client.get("/static/small.txt")
+    revalidated = client.get(
+        "/static/small.txt", headers={**headers, "If-None-Match": small.headers["ETag"]}
+    )
+
+    assert large.headers["ETag"].endswith('-gzip"')
+    assert "Content-Encoding" not in small.headers
+    assert small.headers["ETag"] == identity.headers["ETag"]
+    assert revalidated.status_code == 304
+
+
+def test_serves_ranges_uncompressed(client):
+    """Serve ranges of static files from the uncompressed file."""
+    compressed = client.get("/static/file.txt", headers={"Accept-Encoding": "gzip"})
+    headers = {"Accept-Encoding": "gzip", "Range": "bytes=0-9"}
+
+    partial = client.get("/static/file.txt", headers=headers)
+    # The ETag of the compressed representation does not match the file's.
+    mismatched = client.get(
+        "/static/file.txt", headers={**headers, "If-Range": compressed.headers["ETag"]}
+    )
+
+    assert partial.status_code == 206 and partial.data == b"text text "
+    assert mismatched.status_code == 200
+    assert "Content-Encoding" not in mismatched.headers
+    assert mismatched.data == b"text " * 1000
+
+
+def test_passthrough_not_compressed(client):
+    """Leave passthrough responses of dynamic routes to the server."""
+    response = client.get("/download", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.data == b"text " * 1000
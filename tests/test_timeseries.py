@@ -0,0 +1,85 @@
+"""Tests for `data.timeseries`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.timeseries import downsample, lttb, minmax, slice_dates
+
+# A year of daily values: a smooth seasonal cycle with a single spike.
+N_DAYS = 365
+SPIKE = 200
+
+
+def _series():
+    """Return x positions and y values of the known series."""
+    x = np.arange(N_DAYS)
+    y = np.sin(2 * np.pi * x / N_DAYS)
+    y[SPIKE] = 10.0
+    return x, y
+
+
+def _frame():
+    """Return the known series as a DataFrame of daily dates."""
+    x, y = _series()
+    dates = pd.date_range("2017-01-01", periods=N_DAYS, freq="D")
+    return pd.DataFrame({"date": dates, "tobs": y})
+
+
+def test_lttb_keeps_first_last_and_count():
+    """Keep the first and last points and exactly the requested number of points."""
+    x, y = _series()
+    kept = lttb(x, y, 50)
+
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == N_DAYS - 1
+    assert np.all(np.diff(kept) > 0)
+
+
+def test_minmax_count():
+    """Keep the minimum and maximum of each bucket, the requested number of points."""
+    x, y = _series()
+    kept = minmax(x, y, 50)
+
+    assert len(kept) == 50
+    assert np.all(np.diff(kept) > 0)
+
+
+@pytest.mark.parametrize("method", [lttb, minmax])
+def test_spike_survives(method):
+    """Keep a single spike whichever method is used."""
+    x, y = _series()
+    assert SPIKE in method(x, y, 50)
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_under_threshold(method):
+    """Return every row when the series already fits in the requested points."""
+    df = _frame()
+    result = downsample(df, x="date", y="tobs", n_out=N_DAYS, method=method)
+
+    pd.testing.assert_frame_equal(result, df)
+
+
+def test_downsample_unknown_method():
+    """Reject methods that are not in `DOWNSAMPLERS`."""
+    with pytest.raises(ValueError):
+        downsample(_frame(), x="date", y="tobs", n_out=10, method="mean")
+
+
+def test_slice_dates_inclusive():
+    """Include the rows of both bounds."""
+    result = slice_dates(_frame(), "2017-02-01", "2017-02-28")
+
+    assert result.date.iloc[0] == pd.Timestamp("2017-02-01")
+    assert result.date.iloc[-1] == pd.Timestamp("2017-02-28")
+    assert len(result) == 28
+
+
+def test_slice_dates_outside_data():
+    """Return no rows for a range outside the data."""
+    df = _frame()
+
+    assert slice_dates(df, "2018-01-01", "2018-12-31").empty
+    assert slice_dates(df, "2016-01-01", "2016-12-31").empty
+    assert len(slice_dates(df)) == N_DAYS
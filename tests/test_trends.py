@@ -0,0 +1,46 @@
+"""Tests for `data.trends`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.trends import MIN_DAYS_PER_YEAR, station_trends
+
+
+def _rows(station, years, tobs_by_year):
+    """Return `MIN_DAYS_PER_YEAR` daily rows of a station for each year."""
+    return pd.DataFrame(
+        {
+            "station": station,
+            "year": np.repeat(years, MIN_DAYS_PER_YEAR),
+            "tobs": np.repeat(tobs_by_year, MIN_DAYS_PER_YEAR),
+            "prcp": 0.1,
+        }
+    )
+
+
+def test_station_trends():
+    """Summarize each station in the order of `stations`, reporting progress."""
+    rows = pd.concat(
+        [
+            _rows("A", [2000, 2001, 2002], [70.0, 71.0, 72.0]),
+            _rows("B", [2000], [80.0]),
+            # Too few observations to keep the year.
+            _rows("B", [2001], [90.0]).iloc[:10],
+        ],
+        ignore_index=True,
+    ).astype({"station": "category"})
+    stations = pd.DataFrame({"station": ["B", "A", "C"], "name": ["b", "a", "c"]})
+    progress = []
+
+    trends = station_trends(
+        rows, stations, on_progress=lambda done, total: progress.append((done, total))
+    )
+
+    assert trends.Station.tolist() == ["b", "a", "c"]
+    assert trends.Years.tolist() == [1, 3, 0]
+    assert trends.Temperature.tolist()[:2] == [80.0, 71.0]
+    assert trends.Trend[1] == pytest.approx(10.0)
+    assert np.isnan(trends.Trend[0]) and np.isnan(trends.Temperature[2])
+    assert trends.Precipitation[1] == pytest.approx(0.1 * MIN_DAYS_PER_YEAR)
+    assert progress == [(1, 3), (2, 3), (3, 3)]